@@ -0,0 +1,3 @@
+"""
+Speed benchmarks for wordler, kept apart from the unit tests
+"""
@@ -0,0 +1,242 @@
+"""
+Micro benchmarks for each stage of pattern_processor, and end to end benchmarks of
+get_candidate_words, over a set of real query shapes
+
+Run with `python3 -m benchmarks.pattern_processor`. Results are written as JSON, and can be saved
+as a baseline that later runs are compared against, failing when any benchmark is slower than
+the baseline by more than its threshold in benchmarks/config.json.
+"""
+import argparse
+from functools import partial
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+import wordlertools.pattern_processor as pattern_processor
+from wordlertools.word_store import WordStore
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+CONFIG_FILE = os.path.join(BENCHMARK_DIR, "config.json")
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, "baseline.json")
+WORDS_FILE = os.path.join(os.path.dirname(BENCHMARK_DIR), "data", "words_alpha.txt")
+WORD_LENGTH = 5
+
+# named (locked pattern, floating patterns, excluded letters) queries, covering the shapes
+# seen from players part way through a game
+QUERY_SHAPES: Dict[str, Tuple[str, Set[str], str]] = {
+    "all_known": ("_a_t_", {"__n_s"}, "erip"),
+    "excluded_only": ("", set(), "aeiou"),
+    "floating_only": ("", {"_s___", "___e_"}, "ator"),
+    "locked_only": ("s____", set(), ""),
+    "repeated_letter": ("a____", {"_a___", "__a__", "___a_", "____a"}, ""),
+    "multi_letter_floater": ("", {"pp___"}, ""),
+}
+
+
+def time_call(function: Callable[[], Any], repeat: int = 5) -> float:
+    """Time a function, taking the best of several runs to reduce noise
+
+    Arguments:
+    function: function to be timed, called with no arguments
+    repeat: number of runs, each of enough calls to take at least 0.2 seconds
+
+    Return: seconds per call, from the fastest run
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def build_benchmarks(words: Set[str]) -> Dict[str, Callable[[], Any]]:
+    """Set up every benchmark against a dictionary
+
+    Each stage of the permutation engine is given the inputs it would receive for each query
+    shape, worked out here so only the stage itself is timed.
+
+    Arguments:
+    words: dictionary words
+
+    Return: dictionary of benchmark name against the function to be timed
+    """
+    store = WordStore(words)
+    sized_words = pattern_processor.get_words_specified_length(WORD_LENGTH, words)
+    benchmarks: Dict[str, Callable[[], Any]] = {
+        "get_words_specified_length": partial(
+            pattern_processor.get_words_specified_length, WORD_LENGTH, words
+        ),
+    }
+
+    for shape, (locked, floating, excluded) in QUERY_SHAPES.items():
+        letters = pattern_processor.get_letters_for_permutations(
+            floating, locked, WORD_LENGTH
+        )
+        permutations = pattern_processor.generate_letter_permutations(
+            letters, WORD_LENGTH
+        )
+        patterns = pattern_processor.merge_patterns(locked, floating, permutations)
+        pattern_words = pattern_processor.get_words_from_pattern(
+            patterns, excluded, sized_words
+        )
+        candidates = pattern_processor.remove_invalid_words(floating, pattern_words)
+
+        benchmarks[f"generate_letter_permutations[{shape}]"] = partial(
+            pattern_processor.generate_letter_permutations, letters, WORD_LENGTH
+        )
+        benchmarks[f"merge_patterns[{shape}]"] = partial(
+            pattern_processor.merge_patterns, locked, floating, permutations
+        )
+        benchmarks[f"get_words_from_pattern[{shape}]"] = partial(
+            pattern_processor.get_words_from_pattern, patterns, excluded, sized_words
+        )
+        benchmarks[f"remove_invalid_words[{shape}]"] = partial(
+            pattern_processor.remove_invalid_words, floating, pattern_words
+        )
+        benchmarks[f"calc_letter_frequency[{shape}]"] = partial(
+            pattern_processor.calc_letter_frequency, candidates, floating, locked, True
+        )
+
+        for engine, source, base_words in (
+            (pattern_processor.ENGINE_PERMUTATION, "set", words),
+            (pattern_processor.ENGINE_CONSTRAINT, "set", words),
+            (pattern_processor.ENGINE_CONSTRAINT, "store", store),
+        ):
+            benchmarks[f"get_candidate_words[{shape},{engine},{source}]"] = partial(
+                pattern_processor.get_candidate_words,
+                locked,
+                floating,
+                excluded,
+                base_words,
+                WORD_LENGTH,
+                engine,
+            )
+
+    return benchmarks
+
+
+def run_benchmarks(
+    words: Set[str], name_filter: Optional[str] = None, repeat: int = 5
+) -> Dict[str, Any]:
+    """Run the benchmarks
+
+    Arguments:
+    words: dictionary words
+    name_filter: only run benchmarks with this in their name
+    repeat: number of timed runs for each benchmark
+
+    Return: results, with details of the machine and seconds per call for each benchmark
+    """
+    results: Dict[str, float] = {}
+    for name, function in build_benchmarks(words).items():
+        if name_filter and name_filter not in name:
+            continue
+        results[name] = time_call(function, repeat)
+        print(f"{name}: {results[name] * 1000:.3f} ms", file=sys.stderr)
+
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def find_regressions(
+    results: Dict[str, Any], baseline: Dict[str, Any], config: Dict[str, Any]
+) -> List[str]:
+    """Compare a run against a baseline
+
+    A benchmark regresses when it's slower than the baseline by more than its threshold, a
+    fraction of the baseline time. Benchmarks missing from either run are skipped.
+
+    Arguments:
+    results: results from run_benchmarks
+    baseline: earlier results to compare against
+    config: thresholds, with default_threshold and a thresholds dictionary of overrides.
+    Overrides apply to benchmarks whose name starts with the key
+
+    Return: description of each regression, empty if there are none
+    """
+    regressions = []
+    for name, seconds in sorted(results["results"].items()):
+        baseline_seconds = baseline["results"].get(name)
+        if baseline_seconds is None:
+            continue
+        threshold = config.get("default_threshold", 0.25)
+        for prefix, override in config.get("thresholds", {}).items():
+            if name.startswith(prefix):
+                threshold = override
+        if seconds > baseline_seconds * (1 + threshold):
+            regressions.append(
+                f"{name}: {seconds * 1000:.3f} ms against baseline {baseline_seconds * 1000:.3f} ms"
+                f" (+{seconds / baseline_seconds - 1:.0%}, threshold {threshold:.0%})"
+            )
+    return regressions
+
+
+def load_json(filename: str) -> Dict[str, Any]:
+    """Read a JSON file
+
+    Arguments:
+    filename: file to read
+
+    Return: the decoded contents
+    """
+    with open(filename, "r", encoding="utf8") as json_file:
+        return json.load(json_file)
+
+
+def save_json(filename: str, contents: Dict[str, Any]):
+    """Write a JSON file
+
+    Arguments:
+    filename: file to write
+    contents: data to be encoded
+    """
+    with open(filename, "w", encoding="utf8") as json_file:
+        json.dump(contents, json_file, indent=4, sort_keys=True)
+        json_file.write("\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark pattern_processor, comparing against a saved baseline"
+    )
+    parser.add_argument("-o", "--output", help="file to write results to as JSON")
+    parser.add_argument(
+        "-k", "--filter", help="only run benchmarks with this in the name"
+    )
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=5, help="timed runs for each benchmark"
+    )
+    parser.add_argument(
+        "--baseline", default=BASELINE_FILE, help="baseline to compare against"
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="save the results as the baseline instead of comparing",
+    )
+    args = parser.parse_args()
+
+    with open(WORDS_FILE, "r", encoding="utf8") as word_file:
+        dictionary_words = set(word_file.read().split())
+
+    run = run_benchmarks(dictionary_words, args.filter, args.repeat)
+    if args.output:
+        save_json(args.output, run)
+
+    if args.save_baseline:
+        save_json(args.baseline, run)
+        print(f"Saved baseline to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        found = find_regressions(run, load_json(args.baseline), load_json(CONFIG_FILE))
+        for regression in found:
+            print(f"REGRESSION {regression}")
+        if found:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+    else:
+        print(f"No baseline at {args.baseline}, save one with --save-baseline")
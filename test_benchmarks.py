@@ -0,0 +1,45 @@
+import unittest
+import benchmarks.pattern_processor as benchmarks
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def setUp(self):
+        self.baseline = {
+            "results": {"merge_patterns[a]": 0.010, "get_candidate_words[a]": 0.100}
+        }
+        self.config = {"default_threshold": 0.25, "thresholds": {"merge_patterns": 0.5}}
+
+    def test_no_regressions(self):
+        results = {
+            "results": {
+                "merge_patterns[a]": 0.014,
+                "get_candidate_words[a]": 0.120,
+                "remove_invalid_words[a]": 1.0,
+            }
+        }
+        self.assertListEqual(
+            benchmarks.find_regressions(results, self.baseline, self.config), []
+        )
+
+    def test_regressions(self):
+        results = {
+            "results": {"merge_patterns[a]": 0.016, "get_candidate_words[a]": 0.130}
+        }
+        regressions = benchmarks.find_regressions(results, self.baseline, self.config)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith("get_candidate_words[a]"))
+
+    def test_benchmarks_run(self):
+        words = {"apple", "ample", "maple", "plane", "tacit", "nasty", "speed", "cat"}
+        built = benchmarks.build_benchmarks(words)
+        self.assertIn("get_candidate_words[all_known,constraint,store]", built)
+        for function in built.values():
+            function()
+        self.assertEqual(
+            built["get_candidate_words[all_known,constraint,store]"](), {"nasty"}
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,11 @@
+import subprocess
+import sys
 import unittest
 import argparse
 import wordler as wordler
+import wordlertools.dictionary as dictionary
+import wordlertools.processing as processing
+from wordlertools.query_stats import QueryStats
 
 
 class TestParseArguments(unittest.TestCase):
@@ -51,5 +56,95 @@ class TestParseArguments(unittest.TestCase):
         self.assertIsNone(excluded_letters)
 
 
+class TestLoadWordStore(unittest.TestCase):
+
+    def test_load_buckets(self):
+        store = dictionary.load_word_store('./data/words_alpha.txt')
+        self.assertEqual(len(store), len(dictionary.load_words('./data/words_alpha.txt')))
+        self.assertIn('nasty', store.words_of_length(5))
+        self.assertTrue(all(len(word) == 5 for word in store.bucket(5)))
+
+    def test_load_dictionary(self):
+        loaded = dictionary.load_dictionary('./data/words_alpha.txt', 6)
+        self.assertEqual(loaded['words'], len(loaded['store']))
+        self.assertEqual(loaded['indexed_words'], len(loaded['store'].bucket(6)))
+        self.assertIsNotNone(loaded['store'].bucket(6)._index)
+
+    def test_read_word_lengths(self):
+        self.assertListEqual(dictionary.read_word_lengths({}), [5])
+        self.assertListEqual(dictionary.read_word_lengths({'length': ''}, 6), [6])
+        self.assertListEqual(dictionary.read_word_lengths({'length': '7,5,7'}), [5, 7])
+        with self.assertRaises(Exception):
+            dictionary.read_word_lengths({'length': '0,5'})
+        with self.assertRaises(ValueError):
+            dictionary.read_word_lengths({'length': 'five'})
+
+    def test_perform_processing(self):
+        self.assertSetEqual(processing.perform_processing('_a_t_', {'__n_s'}, 'erip'), {'nasty'})
+        self.assertSetEqual(wordler.perform_processing('_a_t_', {'__n_s'}, 'erip'), {'nasty'})
+        self.assertSetEqual(wordler.perform_processing('_a_t_s', None, 'erip', word_length=6),
+                            processing.perform_processing('_a_t_s', None, 'erip', word_length=6))
+        self.assertEqual(wordler.load_words('./data/words_alpha.txt'), dictionary.load_words('./data/words_alpha.txt'))
+
+    def test_perform_processing_limit(self):
+        candidate_words = processing.perform_processing('s____', None, 'ator', limit=2)
+        self.assertEqual(len(candidate_words), 2)
+        self.assertTrue(candidate_words <= processing.perform_processing('s____', None, 'ator'))
+
+    def test_perform_processing_stats(self):
+        processing.query_cache.clear()
+        stats = QueryStats()
+        candidate_words = processing.perform_processing('_a_t_', ['__n_s'], 'erip', 'permutation', stats=stats)
+        self.assertSetEqual(set(candidate_words), {'nasty'})
+        self.assertEqual(stats.stages[0].name, 'load')
+        self.assertIn('merge_patterns', [stage.name for stage in stats.stages])
+
+    def test_handle_daemon_request(self):
+        response = processing.handle_daemon_request({'command': 'words', 'l': '_a_t_', 'f': ['__n_s'], 'x': 'erip'})
+        self.assertDictEqual(response, {'words': ['nasty']})
+        response = processing.handle_daemon_request({'command': 'words', 'l': 's____', 'x': 'ator', 'limit': 2, 'stats': True})
+        self.assertEqual(len(response['words']), 2)
+        self.assertEqual(response['stats']['stages'][0]['name'], 'load')
+        response = processing.handle_daemon_request({'command': 'suggest', 'l': '_a_t_', 'f': ['__n_s'], 'x': 'erip', 'k': 1})
+        self.assertListEqual(response['suggestions'], [('nasty', 0.0)])
+        with self.assertRaises(Exception):
+            processing.handle_daemon_request({'command': 'unknown'})
+
+    def test_word_length(self):
+        six = processing.perform_processing('_a_t_s', None, 'erip', word_length=6)
+        self.assertTrue(six and all(len(word) == 6 for word in six))
+        by_length = processing.perform_processing_by_length('_a_t', {'__n_s'}, 'erip', [5, 6])
+        self.assertSetEqual(by_length[5], {'nasty'})
+        self.assertTrue(all(len(word) == 6 for word in by_length[6]))
+        response = processing.handle_daemon_request({'command': 'words', 'l': '_a_t', 'f': ['__n_s'], 'x': 'erip', 'w': [5, 6]})
+        self.assertListEqual(response['words_by_length'][5], ['nasty'])
+        self.assertListEqual(response['words_by_length'][6], sorted(by_length[6]))
+
+    def test_output_format(self):
+        for locked, lengths, expected in (('_a_t_', ['5'], "{'nasty'}"), ('_a_t', ['5', '6'], "5: {'nasty'}")):
+            output = subprocess.run([sys.executable, 'wordler.py', '--no-daemon', '-l', locked, '-f', '__n_s', '-x', 'erip', '-w', *lengths],
+                                    capture_output=True, check=True, text=True).stdout.splitlines()
+            self.assertEqual(output[0], expected)
+
+    def test_client_imports(self):
+        script = 'import sys, wordler; print(sorted(name for name in sys.modules if name.startswith("wordlertools") or name == "numpy"))'
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, check=True, text=True).stdout
+        self.assertEqual(output.strip(), "['wordlertools', 'wordlertools.daemon', 'wordlertools.options', 'wordlertools.query_stats']")
+
+    def test_perform_suggestion(self):
+        suggestions = processing.perform_suggestion('_a_t_', {'__n_s'}, 'erip', 3)
+        self.assertEqual(len(suggestions), 3)
+        self.assertEqual(suggestions[0], ('nasty', 0.0))
+
+    def test_perform_processing_cached(self):
+        processing.query_cache.clear()
+        first = processing.perform_processing('_a_t_', ['__n_s'], 'erip')
+        second = processing.perform_processing('_A_T_', {'__n_s'}, 'pire')
+        self.assertIs(first, second)
+        self.assertEqual(processing.query_cache.hits, 1)
+        self.assertIs(dictionary.get_word_store('./data/words_alpha.txt'),
+                      dictionary.get_word_store('./data/words_alpha.txt'))
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,146 @@
+import unittest
+import wordler_api as wordler_api
+
+
+class TestWordlerApi(unittest.TestCase):
+
+    def setUp(self):
+        self.client = wordler_api.app.test_client()
+
+    def test_wordler(self):
+        response = self.client.get('/wordler?l=_a_t_&f=__n_s&x=erip')
+        self.assertEqual(response.status_code, 200)
+        self.assertListEqual(response.get_json(), ['nasty'])
+
+    def test_limit(self):
+        response = self.client.get('/wordler?l=s____&x=ator&limit=2')
+        self.assertEqual(len(response.get_json()), 2)
+        response = self.client.get('/wordler?l=_a_t_&f=__n_s&x=erip&exists=1')
+        self.assertDictEqual(response.get_json(), {'exists': True})
+        response = self.client.get('/wordler?x=abcdefghijklmnopqrstuvwxy&exists=1')
+        self.assertDictEqual(response.get_json(), {'exists': False})
+
+    def test_server_timing(self):
+        wordler_api.query_cache.clear()
+        response = self.client.get('/wordler?l=_a_t_&f=__n_s&x=erip')
+        self.assertRegex(response.headers['Server-Timing'], r'^compile;dur=[\d.]+, scan;dur=[\d.]+, cache;desc="miss", total;dur=')
+        response = self.client.get('/wordler?l=_a_t_&f=__n_s&x=erip')
+        self.assertRegex(response.headers['Server-Timing'], r'^cache;desc="hit", total;dur=')
+        response = self.client.get('/wordler?x=erip&limit=2')
+        self.assertIn('scan;dur=', response.headers['Server-Timing'])
+
+    def test_dictionary_loaded_once(self):
+        store = wordler_api.word_store
+        self.client.get('/wordler?l=_a_t_&f=__n_s&x=erip')
+        self.client.get('/wordler?x=erip')
+        self.assertIs(wordler_api.word_store, store)
+        self.assertIsNotNone(store.bucket(wordler_api.WORD_LENGTH)._index)
+
+    def test_cached(self):
+        wordler_api.query_cache.clear()
+        self.client.get('/wordler?l=_a_t_&f=__n_s&x=erip')
+        response = self.client.get('/wordler?l=_a_t_&f=__n_s&x=pire')
+        self.assertListEqual(response.get_json(), ['nasty'])
+        self.assertEqual(self.client.get('/ready').get_json()['cache']['hits'], 1)
+
+    def test_frequency(self):
+        body = self.client.get('/wordler/frequency?l=_a_t_&f=__n_s&x=erip').get_json()
+        self.assertEqual(body['words'], 1)
+        self.assertDictEqual(body['positions'][0], {'n': 1})
+        self.assertDictEqual(body['containing'], {'n': 1, 'a': 1, 's': 1, 't': 1, 'y': 1})
+        body = self.client.get('/wordler/frequency?l=_a_t_&f=__n_s&x=erip&known=1').get_json()
+        self.assertDictEqual(body['overall'], {'y': 1})
+
+    def test_suggest(self):
+        response = self.client.get('/wordler/suggest?l=_a_t_&x=erip&k=3')
+        self.assertEqual(response.status_code, 200)
+        suggestions = response.get_json()
+        self.assertEqual(len(suggestions), 3)
+        self.assertGreaterEqual(suggestions[0]['entropy'], suggestions[2]['entropy'])
+        cached = self.client.get('/wordler/suggest?l=_A_T_&x=pire&k=3').get_json()
+        self.assertListEqual(cached, suggestions)
+
+    def test_suggest_limits(self):
+        self.assertEqual(self.client.get('/wordler/suggest?k=0').status_code, 500)
+        self.assertEqual(self.client.get(f'/wordler/suggest?k={wordler_api.MAX_SUGGESTIONS + 1}').status_code, 500)
+        self.assertEqual(self.client.post('/wordler/boards?k=100', json=[{'x': 'q'}]).status_code, 500)
+        response = self.client.get('/wordler/suggest?x=q&k=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()), 1)
+
+    def test_batch(self):
+        queries = [
+            {'l': '_a_t_', 'f': '__n_s', 'x': 'erip'},
+            {'l': '_a_t_', 'f': ['__n_s'], 'x': 'erip'},
+            {'x': 'abcdefghijklmnopqrstuvwxy'},
+        ]
+        response = self.client.post('/wordler/batch', json=queries)
+        self.assertEqual(response.status_code, 200)
+        self.assertListEqual(response.get_json(), [['nasty'], ['nasty'], []])
+        response = self.client.post('/wordler/batch', json={'queries': queries[:1]})
+        self.assertListEqual(response.get_json(), [['nasty']])
+        self.assertEqual(self.client.post('/wordler/batch', json={'l': '_a___'}).status_code, 500)
+
+    def test_batch_limits(self):
+        for invalid in ([[]], [{}, {}], ['_a___'], [{'l': '_a_t_'}, None]):
+            self.assertEqual(self.client.post('/wordler/batch', json=invalid).status_code, 400)
+        too_many = [{'x': 'q'}] * (wordler_api.MAX_BATCH_QUERIES + 1)
+        self.assertEqual(self.client.post('/wordler/batch', json=too_many).status_code, 400)
+        response = self.client.post('/wordler/batch', json=too_many[1:])
+        self.assertEqual(len(response.get_json()), wordler_api.MAX_BATCH_QUERIES)
+
+    def test_boards(self):
+        boards = [{'l': '_a_t_', 'f': '__n_s', 'x': 'erip'}, {'l': '_a_ty', 'x': 'erip'}]
+        response = self.client.post('/wordler/boards?k=3', json=boards)
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertListEqual(body['candidates'][0], ['nasty'])
+        self.assertIn('nasty', body['candidates'][1])
+        self.assertEqual(len(body['suggestions']), 3)
+        self.assertGreaterEqual(body['suggestions'][0]['entropy'], body['suggestions'][2]['entropy'])
+        response = self.client.post('/wordler/boards?candidates_only=1', json={'boards': boards})
+        self.assertTrue(all(suggestion['word'] in response.get_json()['candidates'][1] for suggestion in response.get_json()['suggestions']))
+        self.assertEqual(self.client.post('/wordler/boards', json={'l': '_a___'}).status_code, 500)
+
+    def test_session(self):
+        response = self.client.post('/session')
+        self.assertEqual(response.status_code, 201)
+        session_id = response.get_json()['session']
+        first = self.client.post(f'/session/{session_id}/guess?f=__n__&x=erip').get_json()
+        second = self.client.post(f'/session/{session_id}/guess?l=_a_t_&f=____s').get_json()
+        self.assertIn('nasty', first)
+        self.assertListEqual(second, ['nasty'])
+        self.assertEqual(self.client.delete(f'/session/{session_id}').status_code, 204)
+        self.assertEqual(self.client.post(f'/session/{session_id}/guess?x=a').status_code, 404)
+
+    def test_ready(self):
+        response = self.client.get('/ready')
+        body = response.get_json()
+        self.assertTrue(body['ready'])
+        self.assertEqual(body['words'], len(wordler_api.word_store))
+        self.assertEqual(body['indexed_words'], len(wordler_api.word_store.bucket(5)))
+        self.assertGreaterEqual(body['load_seconds'], 0)
+
+    def test_word_length(self):
+        response = self.client.get('/wordler?l=_a_t_s&x=erip&length=6')
+        self.assertTrue(all(len(word) == 6 for word in response.get_json()))
+        response = self.client.get('/wordler?l=_a_t&f=__n_s&x=erip&length=5,6')
+        body = response.get_json()
+        self.assertListEqual(sorted(body), ['5', '6'])
+        self.assertListEqual(body['5'], ['nasty'])
+        self.assertTrue(all(len(word) == 6 for word in body['6']))
+        self.assertEqual(self.client.get('/wordler?x=erip&length=5,6&limit=2').status_code, 500)
+        self.assertEqual(self.client.get('/wordler/suggest?x=erip&length=5,6').status_code, 500)
+        response = self.client.post('/session?length=6')
+        session_id = response.get_json()['session']
+        words = self.client.post(f'/session/{session_id}/guess?l=_a_t_s&x=erip').get_json()
+        self.assertTrue(words and all(len(word) == 6 for word in words))
+
+    def test_bad_parameters(self):
+        response = self.client.get('/wordler?l=_a_')
+        self.assertEqual(response.status_code, 500)
+        self.assertIn('error', response.get_json())
+
+
+if __name__ == '__main__':
+    unittest.main()
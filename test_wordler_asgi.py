@@ -0,0 +1,148 @@
+import asyncio
+import json
+import unittest
+from unittest import mock
+import wordler_asgi as wordler_asgi
+
+
+async def call_app(path, query_string=b'', method='GET'):
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query_string}
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    await wordler_asgi.app(scope, receive, send)
+    headers = dict(messages[0]['headers'])
+    return messages[0]['status'], headers, json.loads(messages[1]['body'] or b'null')
+
+
+async def read_response(reader):
+    status_line = await reader.readline()
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode('latin-1').strip()
+        if not line:
+            break
+        name, _, value = line.partition(':')
+        headers[name.lower()] = value.strip()
+    body = await reader.readexactly(int(headers['content-length']))
+    return int(status_line.split()[1]), headers, json.loads(body)
+
+
+class TestWordlerAsgi(unittest.TestCase):
+
+    def test_wordler(self):
+        wordler_asgi.query_cache.clear()
+        status, headers, body = asyncio.run(call_app('/wordler', b'l=_a_t_&f=__n_s&x=erip'))
+        self.assertEqual(status, 200)
+        self.assertListEqual(body, ['nasty'])
+        self.assertRegex(headers[b'server-timing'].decode(), r'^queue;dur=[\d.]+, compile;dur=[\d.]+, scan;dur=[\d.]+')
+        self.assertEqual(wordler_asgi.query_cache.misses, 1)
+        status, headers, body = asyncio.run(call_app('/wordler', b'l=_a_t_&f=__n_s&x=pire'))
+        self.assertListEqual(body, ['nasty'])
+        self.assertRegex(headers[b'server-timing'].decode(), r'^cache;desc="hit", total;dur=')
+
+    def test_limit(self):
+        _, _, body = asyncio.run(call_app('/wordler', b'l=s____&x=ator&limit=2'))
+        self.assertEqual(len(body), 2)
+        _, _, body = asyncio.run(call_app('/wordler', b'x=abcdefghijklmnopqrstuvwxy&exists=1'))
+        self.assertDictEqual(body, {'exists': False})
+
+    def test_errors(self):
+        status, _, body = asyncio.run(call_app('/wordler', b'l=_a_'))
+        self.assertEqual(status, 500)
+        self.assertIn('error', body)
+        self.assertEqual(asyncio.run(call_app('/unknown'))[0], 404)
+        self.assertEqual(asyncio.run(call_app('/wordler', method='POST'))[0], 405)
+
+    def test_word_length(self):
+        _, _, body = asyncio.run(call_app('/wordler', b'l=_a_t_s&x=erip&length=6'))
+        self.assertTrue(body and all(len(word) == 6 for word in body))
+        status, _, body = asyncio.run(call_app('/wordler', b'l=_a_t&f=__n_s&x=erip&length=5,6'))
+        self.assertEqual(status, 200)
+        self.assertListEqual(body['5'], ['nasty'])
+        self.assertTrue(all(len(word) == 6 for word in body['6']))
+        self.assertEqual(asyncio.run(call_app('/wordler', b'x=erip&length=0'))[0], 500)
+
+    def test_ready(self):
+        status, _, body = asyncio.run(call_app('/ready'))
+        self.assertEqual(status, 200)
+        self.assertEqual(body['indexed_words'], len(wordler_asgi.word_store.bucket(5)))
+        self.assertEqual(body['pending'], 0)
+
+    def test_pool_full(self):
+        wordler_asgi.query_cache.clear()
+        with mock.patch.object(wordler_asgi.pool, 'max_pending', 0):
+            status, headers, _ = asyncio.run(call_app('/wordler', b'x=erip'))
+        self.assertEqual(status, 503)
+        self.assertEqual(headers[b'retry-after'], b'1')
+
+    def test_keep_alive(self):
+        async def run():
+            server = await asyncio.start_server(wordler_asgi.handle_connection, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                responses = []
+                for query in ('l=_a_t_&f=__n_s&x=erip', 'x=abcdefghijklmnopqrstuvwxy&exists=1'):
+                    writer.write(f'GET /wordler?{query} HTTP/1.1\r\nhost: localhost\r\n\r\n'.encode())
+                    responses.append(await read_response(reader))
+                writer.write(b'GET /ready HTTP/1.1\r\nconnection: close\r\n\r\n')
+                responses.append(await read_response(reader))
+                closed = await reader.read()
+                writer.close()
+                return responses, closed
+
+        responses, closed = asyncio.run(run())
+        self.assertEqual(responses[0][1]['connection'], 'keep-alive')
+        self.assertListEqual(responses[0][2], ['nasty'])
+        self.assertDictEqual(responses[1][2], {'exists': False})
+        self.assertEqual(responses[2][1]['connection'], 'close')
+        self.assertEqual(closed, b'')
+
+    def test_body_too_large(self):
+        async def run():
+            server = await asyncio.start_server(wordler_asgi.handle_connection, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                writer.write(f'POST /wordler HTTP/1.1\r\ncontent-length: {wordler_asgi.MAX_BODY_BYTES + 1}\r\n\r\n'.encode())
+                status_line = await reader.readline()
+                rest = await reader.read()
+                writer.close()
+                return status_line, rest
+
+        status_line, rest = asyncio.run(run())
+        self.assertEqual(int(status_line.split()[1]), 413)
+        self.assertIn(b'connection: close', rest)
+
+    def test_concurrent_clients(self):
+        async def client(port, query):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(f'GET /wordler?{query} HTTP/1.1\r\n\r\n'.encode())
+            response = await read_response(reader)
+            writer.close()
+            return response
+
+        async def run(max_pending):
+            server = await asyncio.start_server(wordler_asgi.handle_connection, '127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                with mock.patch.object(wordler_asgi.pool, 'max_pending', max_pending):
+                    return await asyncio.gather(
+                        *(client(port, f'x=erip&limit={limit}') for limit in range(1, 21))
+                    )
+
+        responses = asyncio.run(run(20))
+        self.assertListEqual([len(body) for _, _, body in responses], list(range(1, 21)))
+        statuses = [status for status, _, _ in asyncio.run(run(5))]
+        self.assertGreaterEqual(statuses.count(200), 5)
+        self.assertIn(503, statuses)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,8 +4,33 @@
 """
 Wordler Tools test cases for base functionality
 """
+import collections
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
 import unittest
+from unittest import mock
 import wordlertools.pattern_processor as pattern_processor
+import wordlertools.constraints as constraints
+from wordlertools.word_index import WordIndex, bit_ids
+from wordlertools.word_store import WordStore
+import wordlertools.snapshot as snapshot
+import wordlertools.numpy_backend as numpy_backend
+import wordlertools.query_cache as query_cache
+import wordlertools.daemon as daemon
+import wordlertools.dawg as dawg
+from wordlertools.query_stats import QueryStats, run_stage
+import wordlertools.session as session
+import wordlertools.parallel as parallel
+from wordlertools.letter_frequency import LetterCounts
+import wordlertools.solver as solver
+import wordlertools.feedback_matrix as feedback_matrix
+import wordlertools.simulator as simulator
+import wordlertools.multi_board as multi_board
 
 
 class TestGetWordsSpecifiedLength(unittest.TestCase):
@@ -46,6 +71,62 @@ class TestGetWordsSpecifiedLength(unittest.TestCase):
         filtered_words = pattern_processor.get_words_specified_length(5, set())
         self.assertFalse(filtered_words)
 
+    def test_word_store(self):
+        store = WordStore(self.test_words)
+        filtered_words = pattern_processor.get_words_specified_length(5, store)
+        self.assertEqual(filtered_words, {"Fiver", "Alone", "Alive", "Irate"})
+        self.assertIs(filtered_words, pattern_processor.get_words_specified_length(5, store))
+        self.assertFalse(pattern_processor.get_words_specified_length(10, store))
+
+
+class TestWordStore(unittest.TestCase):
+
+    """
+    Validate that words are bucketed by length, and buckets are shared rather than copied
+    """
+
+    def setUp(self):
+        self.store = WordStore(["plane", "apple", "sun", "apple", "chicken", "maple"])
+
+    def test_buckets(self):
+        self.assertEqual(len(self.store), 5)
+        self.assertTupleEqual(self.store.lengths(), (3, 5, 7))
+        self.assertTupleEqual(self.store.bucket(5).words, ("apple", "maple", "plane"))
+        self.assertEqual(len(self.store.bucket(4)), 0)
+        self.assertListEqual(
+            list(self.store), ["sun", "apple", "maple", "plane", "chicken"]
+        )
+
+    def test_buckets_made_on_first_use(self):
+        store = WordStore(["plane", "apple", "sun", "chicken", "maple"])
+        self.assertDictEqual(store._buckets, {})
+        buckets = store.buckets([3, 5, 9])
+        self.assertTupleEqual(buckets[3].words, ("sun",))
+        self.assertEqual(len(buckets[9]), 0)
+        self.assertListEqual(sorted(store._buckets), [3, 5])
+        self.assertIs(store.bucket(5), buckets[5])
+        self.assertNotEqual(store._unbucketed, ())
+        store.bucket(7)
+        self.assertTupleEqual(store._unbucketed, ())
+
+    def test_contains(self):
+        self.assertIn("apple", self.store)
+        self.assertNotIn("apples", self.store)
+        self.assertNotIn(5, self.store)
+
+    def test_words_of_length_immutable(self):
+        words = self.store.words_of_length(5)
+        self.assertIsInstance(words, frozenset)
+        self.assertIs(words, self.store.words_of_length(5))
+
+    def test_query_scans_then_indexes(self):
+        bucket = self.store.bucket(5)
+        compiled = constraints.compile_constraints("", {"a____"}, "", 5)
+        self.assertSetEqual(bucket.query(compiled), {"maple", "plane"})
+        self.assertSetEqual(bucket.query(compiled), {"maple", "plane"})
+        self.assertIs(bucket.index, bucket.index)
+        self.assertEqual(bucket.masks["apple"], constraints.letter_mask("apple"))
+
 
 class TestRemoveInvalidWords(unittest.TestCase):
 
@@ -145,6 +226,19 @@ class TestRemoveInvalidWords(unittest.TestCase):
             self.candidate_words,
         )
 
+    def test_remove_no_candidates(self):
+        self.assertSetEqual(
+            pattern_processor.remove_invalid_words({"_o___"}, set()), set()
+        )
+
+    def test_pattern_compiled_once(self):
+        pattern_processor.compile_pattern.cache_clear()
+        for _ in range(3):
+            pattern_processor.remove_invalid_words(
+                {"w____", "_i___"}, self.candidate_words
+            )
+        self.assertEqual(pattern_processor.compile_pattern.cache_info().misses, 1)
+
 
 class TestIsWordPatternMatch(unittest.TestCase):
     """
@@ -219,6 +313,56 @@ class TestIsWordPatternMatch(unittest.TestCase):
             )
         )
 
+    def test_precomputed_word_mask(self):
+        mask = constraints.letter_mask("apple")
+        self.assertTrue(
+            pattern_processor.is_word_a_pattern_match("___l_", "zxc", "apple", mask)
+        )
+        self.assertFalse(
+            pattern_processor.is_word_a_pattern_match("___l_", "e", "apple", mask)
+        )
+
+
+class TestLetterMasks(unittest.TestCase):
+
+    """
+    Validate the encoding of words as 26 bit letter presence masks
+    """
+
+    def test_letter_mask(self):
+        self.assertEqual(constraints.letter_mask(""), 0)
+        self.assertEqual(constraints.letter_mask("a"), 1)
+        self.assertEqual(constraints.letter_mask("abba"), 0b11)
+        self.assertEqual(constraints.letter_mask("z"), 1 << 25)
+        self.assertEqual(constraints.letter_mask("a_"), 1)
+
+    def test_build_letter_masks(self):
+        self.assertDictEqual(
+            constraints.build_letter_masks({"cab", "bad"}),
+            {"cab": 0b111, "bad": 0b1011},
+        )
+
+    def test_split_excluded_letters(self):
+        self.assertEqual(pattern_processor.split_excluded_letters("ab"), (0b11, ""))
+        self.assertEqual(pattern_processor.split_excluded_letters("a_"), (1, "_"))
+
+    def test_get_words_from_pattern_with_masks(self):
+        words = {"apple", "ample", "maple", "lapel"}
+        masks = constraints.build_letter_masks(words)
+        self.assertSetEqual(
+            pattern_processor.get_words_from_pattern({"a____", "_a___"}, "m", words, masks),
+            {"apple", "lapel"},
+        )
+
+    def test_constraints_with_masks(self):
+        words = {"apple", "ample", "maple", "plane", "lapel"}
+        masks = constraints.build_letter_masks(words)
+        compiled = constraints.compile_constraints("", {"l____"}, "m", 5)
+        self.assertSetEqual(
+            constraints.filter_words(compiled, words, masks),
+            constraints.filter_words(compiled, words),
+        )
+
 
 class TestGenerateLetterPermutations(unittest.TestCase):
 
@@ -760,6 +904,58 @@ class TestCalcLetterFrequency(unittest.TestCase):
         )
 
 
+class TestLetterFrequency(unittest.TestCase):
+
+    """
+    Validate per position, overall and words containing letter counts
+    """
+
+    def setUp(self):
+        self.words = {"apple", "ample", "maple", "plane", "tacit"}
+        self.counts = LetterCounts(self.words, 5)
+
+    def test_base_tables(self):
+        frequency = self.counts.base
+        self.assertEqual(frequency.word_count, 5)
+        self.assertDictEqual(dict(frequency.positions[0]), {"a": 2, "m": 1, "p": 1, "t": 1})
+        self.assertEqual(frequency.overall["p"], 5)
+        self.assertEqual(frequency.containing["p"], 4)
+        self.assertEqual(frequency.containing["t"], 1)
+        self.assertEqual(frequency.overall["t"], 2)
+
+    def test_subsets_match_direct_counts(self):
+        for words in ({"apple"}, {"apple", "ample", "maple", "plane"}, set()):
+            self.assertEqual(self.counts.frequency(words), LetterCounts(words, 5).base)
+            if words:
+                self.assertEqual(
+                    self.counts.frequency(words).overall,
+                    pattern_processor.calc_letter_frequency(words, set(), ""),
+                )
+
+    def test_words_not_counted_up_front(self):
+        frequency = self.counts.frequency({"apple", "zebra"})
+        self.assertEqual(frequency.word_count, 2)
+        self.assertEqual(frequency.containing["z"], 1)
+
+    def test_without(self):
+        frequency = self.counts.base.without("_pl__")
+        self.assertNotIn("p", frequency.overall)
+        self.assertNotIn("l", frequency.containing)
+        self.assertEqual(frequency.overall["a"], 5)
+
+    def test_get_letter_frequency(self):
+        store = WordStore(self.words | {"cat"})
+        for base_words in (self.words, store):
+            frequency = pattern_processor.get_letter_frequency(
+                {"apple", "maple"}, base_words, 5, "e"
+            )
+            self.assertDictEqual(
+                dict(frequency.containing), {"a": 2, "p": 2, "l": 2, "m": 1}
+            )
+            self.assertDictEqual(dict(frequency.positions[4]), {})
+        self.assertIs(store.bucket(5).letter_counts, store.bucket(5).letter_counts)
+
+
 class TestCollectFloatingLetters(unittest.TestCase):
     """
     Validate the process to take all floating patterns and create a list of characters
@@ -874,6 +1070,830 @@ class TestReducePatterns(unittest.TestCase):
         self.assertDictEqual(reduced, {})
 
 
+class TestCompileConstraints(unittest.TestCase):
+
+    """
+    Validate that locked, floating and excluded patterns compile into constraints that
+    each word can be checked against once
+    """
+
+    def setUp(self):
+        self.test_words = {"apple", "ample", "maple", "plane", "lapel", "happy", "apply"}
+
+    def test_locked_and_excluded(self):
+        compiled = constraints.compile_constraints("a___e", set(), "m", 5)
+        self.assertEqual(compiled.allowed_letters[0], frozenset("a"))
+        self.assertNotIn("m", compiled.allowed_letters[1])
+        self.assertSetEqual(
+            constraints.filter_words(compiled, self.test_words), {"apple"}
+        )
+
+    def test_floating_required_outside_position(self):
+        compiled = constraints.compile_constraints("", {"l____"}, "", 5)
+        self.assertEqual(compiled.required_letters, (("l", 1, (1, 2, 3, 4)),))
+        self.assertSetEqual(
+            constraints.filter_words(compiled, self.test_words),
+            {"apple", "ample", "maple", "plane", "apply"},
+        )
+
+    def test_floating_repeated_letter(self):
+        compiled = constraints.compile_constraints("", {"p____"}, "", 5)
+        self.assertFalse(constraints.word_matches_constraints(compiled, "plane"))
+        compiled = constraints.compile_constraints("", {"pp___"}, "", 5)
+        self.assertEqual(compiled.required_letters, (("p", 2, (2, 3, 4)),))
+        self.assertFalse(constraints.word_matches_constraints(compiled, "lapel"))
+
+    def test_locked_only_one_left(self):
+        compiled = constraints.compile_constraints(
+            "a____", {"_a___", "__a__", "___a_", "____a"}, "", 5
+        )
+        self.assertEqual(compiled.required_letters, ())
+        self.assertTrue(constraints.word_matches_constraints(compiled, "apple"))
+
+    def test_multi_letter_floating_pattern(self):
+        compiled = constraints.compile_constraints("", {"_pp__"}, "", 5)
+        self.assertFalse(constraints.word_matches_constraints(compiled, "apple"))
+        self.assertTrue(constraints.word_matches_constraints(compiled, "puppy"))
+
+    def test_wrong_word_length(self):
+        compiled = constraints.compile_constraints("", set(), "", 5)
+        self.assertFalse(constraints.word_matches_constraints(compiled, "apples"))
+
+    def test_excluded_known_letter_limits_count(self):
+        compiled = constraints.compile_constraints("", {"_p___"}, "p", 5)
+        self.assertEqual(compiled.letter_counts, (("p", 1, 1),))
+        self.assertFalse(compiled.excluded_mask & constraints.letter_mask("p"))
+        self.assertSetEqual(
+            constraints.filter_words(compiled, self.test_words),
+            {"ample", "maple", "plane", "lapel"},
+        )
+        compiled = constraints.compile_constraints("_p___", set(), "p", 5)
+        self.assertNotIn("p", compiled.allowed_letters[2])
+        self.assertSetEqual(constraints.filter_words(compiled, self.test_words), set())
+        compiled = constraints.compile_constraints("a____", {"_pp__"}, "pa", 5)
+        self.assertEqual(compiled.letter_counts, (("a", 1, 1), ("p", 2, 2)))
+        self.assertSetEqual(constraints.filter_words(compiled, {"happy", "apple", "appal"}), set())
+
+    def test_invalid_pattern_length(self):
+        with self.assertRaises(Exception):
+            constraints.compile_constraints("a___", set(), "", 5)
+        with self.assertRaises(Exception):
+            constraints.compile_constraints("", {"a___"}, "", 5)
+        with self.assertRaises(Exception):
+            constraints.compile_constraints("", {"ab", "cd", "e_"}, "", 2)
+
+
+class TestQuery(unittest.TestCase):
+
+    """
+    Validate that a query is compiled once, compares by its constraints, and is accepted by
+    the query functions in place of the patterns
+    """
+
+    def setUp(self):
+        self.test_words = {"apple", "ample", "maple", "plane", "lapel", "happy", "apply"}
+
+    def test_compiled_fields(self):
+        query = constraints.Query("A____", {"_l___", ""}, "Z", 5)
+        self.assertEqual(query.locked_pattern, "a____")
+        self.assertEqual(query.floating_patterns, frozenset({"_l___"}))
+        self.assertEqual(
+            query.constraints, constraints.compile_constraints("a____", {"_l___"}, "z", 5)
+        )
+        self.assertTrue(query.matches("apple"))
+        self.assertFalse(query.matches("lapel"))
+        with self.assertRaises(AttributeError):
+            query.extra = True
+
+    def test_equal_and_hashable(self):
+        first = constraints.Query("", {"l____", "l____"}, "xy", 5)
+        second = constraints.Query("_____", {"L____"}, "yx", 5)
+        self.assertEqual(first, second)
+        self.assertEqual(len({first, second}), 1)
+        self.assertNotEqual(first, constraints.Query("", {"l____"}, "x", 5))
+
+    def test_invalid(self):
+        with self.assertRaises(Exception):
+            constraints.Query("a___", set(), "", 5)
+        query = constraints.Query("", set(), "", 5)
+        self.assertIs(constraints.as_query(query, None, None, 5), query)
+        with self.assertRaises(Exception):
+            constraints.as_query(query, None, None, 6)
+
+    def test_query_functions(self):
+        query = constraints.Query("a____", {"_l___"}, "", 5)
+        store = WordStore(self.test_words)
+        for engine in pattern_processor.ENGINES:
+            self.assertSetEqual(
+                pattern_processor.get_candidate_words(
+                    query, None, None, store, 5, engine
+                ),
+                {"apple", "ample", "apply"},
+            )
+        self.assertIsNotNone(query.permutation_patterns)
+        self.assertListEqual(
+            list(pattern_processor.iter_candidate_words(query, None, None, store, 5)),
+            ["ample", "apple", "apply"],
+        )
+        self.assertTrue(
+            pattern_processor.candidate_words_exist(query, None, None, store, 5)
+        )
+        self.assertListEqual(
+            pattern_processor.get_candidate_words_batch(
+                [query, ("a____", {"_l___"}, "")], store, 5
+            ),
+            [frozenset({"apple", "ample", "apply"})] * 2,
+        )
+        cache = query_cache.QueryCache()
+        query_cache.get_cached_candidate_words(cache, query, None, None, store, 5)
+        query_cache.get_cached_candidate_words(cache, "a____", {"_l___"}, "", store, 5)
+        self.assertEqual(cache.hits, 1)
+
+    def test_permutation_patterns_reused(self):
+        query = constraints.Query("a____", {"_l___"}, "", 5)
+        stats = QueryStats()
+        pattern_processor.get_candidate_words(
+            query, None, None, self.test_words, 5, pattern_processor.ENGINE_PERMUTATION, stats
+        )
+        self.assertIn("merge_patterns", [stage.name for stage in stats.stages])
+        stats = QueryStats()
+        pattern_processor.get_candidate_words(
+            query, None, None, self.test_words, 5, pattern_processor.ENGINE_PERMUTATION, stats
+        )
+        self.assertNotIn("merge_patterns", [stage.name for stage in stats.stages])
+
+
+class TestWordIndex(unittest.TestCase):
+
+    """
+    Validate that queries answered from the bitset index match checking each word in turn
+    """
+
+    def setUp(self):
+        self.test_words = {
+            "apple",
+            "ample",
+            "maple",
+            "plane",
+            "lapel",
+            "puppy",
+            "apply",
+            "chicken",
+        }
+        self.index = WordIndex(self.test_words, 5)
+
+    def test_only_words_of_length(self):
+        self.assertEqual(len(self.index), 7)
+        self.assertNotIn("chicken", set(self.index))
+
+    def test_query_matches_filter(self):
+        queries = [
+            ("a___e", set(), "m"),
+            ("", {"l____"}, ""),
+            ("", {"pp___"}, ""),
+            ("", {"_pp__"}, ""),
+            ("a____", {"_a___", "__a__", "___a_", "____a"}, ""),
+            ("", set(), "p"),
+        ]
+        for locked, floating, excluded in queries:
+            compiled = constraints.compile_constraints(locked, floating, excluded, 5)
+            self.assertSetEqual(
+                self.index.query(compiled),
+                constraints.filter_words(compiled, self.test_words),
+            )
+
+    def test_query_other_length(self):
+        compiled = constraints.compile_constraints("", set(), "", 7)
+        self.assertEqual(self.index.match_bits(compiled), 0)
+        self.assertSetEqual(self.index.query(compiled), set())
+
+    def test_bit_ids(self):
+        self.assertListEqual(list(bit_ids(0)), [])
+        self.assertListEqual(list(bit_ids(0b101001)), [0, 3, 5])
+
+
+class TestSnapshot(unittest.TestCase):
+
+    """
+    Validate that a word store written to a binary snapshot reads back the same when memory mapped
+    """
+
+    def setUp(self):
+        self.store = WordStore(["plane", "apple", "sun", "chicken", "maple", "ample"])
+        handle, self.snapshot_path = tempfile.mkstemp(suffix=snapshot.SNAPSHOT_SUFFIX)
+        os.close(handle)
+        snapshot.compile_snapshot(self.store, self.snapshot_path)
+
+    def tearDown(self):
+        os.remove(self.snapshot_path)
+
+    def test_round_trip(self):
+        loaded = snapshot.load_snapshot(self.snapshot_path)
+        self.assertEqual(len(loaded), len(self.store))
+        self.assertTupleEqual(loaded.lengths(), self.store.lengths())
+        self.assertListEqual(list(loaded), list(self.store))
+        self.assertIn("maple", loaded)
+        self.assertListEqual(
+            list(loaded.bucket(5).mask_array),
+            [constraints.letter_mask(word) for word in self.store.bucket(5).words],
+        )
+
+    def test_packed_words_sequence(self):
+        words = snapshot.load_snapshot(self.snapshot_path).bucket(5).words
+        self.assertEqual(words[0], "ample")
+        self.assertEqual(words[-1], "plane")
+        self.assertListEqual(words[1:3], ["apple", "maple"])
+        with self.assertRaises(IndexError):
+            _ = words[4]
+
+    def test_query(self):
+        loaded = snapshot.load_snapshot(self.snapshot_path)
+        for _ in range(2):
+            self.assertSetEqual(
+                pattern_processor.get_candidate_words("", {"a____"}, "m", loaded, 5),
+                {"plane"},
+            )
+
+    def test_not_snapshot(self):
+        with open(self.snapshot_path, "wb") as snapshot_file:
+            snapshot_file.write(b"apple\nmaple\n")
+        with self.assertRaises(Exception):
+            snapshot.load_snapshot(self.snapshot_path)
+
+    def test_snapshot_path(self):
+        self.assertEqual(
+            snapshot.snapshot_path_for("./data/words_alpha.txt"),
+            "./data/words_alpha.snapshot",
+        )
+
+
+@unittest.skipUnless(numpy_backend.is_available(), "numpy is not installed")
+class TestNumpyBucket(unittest.TestCase):
+
+    """
+    Validate that vectorised matching gives the same words as checking each word in turn
+    """
+
+    def setUp(self):
+        self.test_words = ["apple", "ample", "maple", "plane", "lapel", "puppy", "apply"]
+        self.bucket = numpy_backend.NumpyBucket(self.test_words + ["chicken"], 5)
+
+    def test_matrices(self):
+        self.assertEqual(len(self.bucket), 7)
+        self.assertEqual(self.bucket.letters.shape, (7, 5))
+        self.assertEqual(self.bucket.counts[0, 15], 2)
+
+    def test_query_matches_filter(self):
+        queries = [
+            ("a___e", set(), "m"),
+            ("", {"l____"}, ""),
+            ("", {"pp___"}, ""),
+            ("", {"_pp__"}, ""),
+            ("a____", {"_a___", "__a__", "___a_", "____a"}, ""),
+            ("", set(), "p"),
+        ]
+        for locked, floating, excluded in queries:
+            compiled = constraints.compile_constraints(locked, floating, excluded, 5)
+            self.assertSetEqual(
+                self.bucket.query(compiled),
+                constraints.filter_words(compiled, self.test_words),
+            )
+
+    def test_query_other_length(self):
+        compiled = constraints.compile_constraints("", set(), "", 6)
+        self.assertSetEqual(self.bucket.query(compiled), set())
+
+    def test_numpy_imported_lazily(self):
+        script = (
+            "import sys, wordlertools.pattern_processor as p, wordlertools.solver;"
+            "from wordlertools.word_store import WordStore;"
+            "p.get_candidate_words('a____', set(), '', WordStore(['apple']), 5);"
+            "print('numpy' in sys.modules)"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", script],
+            capture_output=True,
+            check=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        self.assertEqual(output.stdout.strip(), "False")
+
+
+class TestQueryCache(unittest.TestCase):
+
+    """
+    Validate that equivalent queries share a cache entry, and the cache stays within its bounds
+    """
+
+    def setUp(self):
+        self.store = WordStore(["apple", "ample", "maple", "plane", "lapel", "puppy"])
+        self.cache = query_cache.QueryCache(max_size=2)
+
+    def test_canonical_query(self):
+        self.assertEqual(
+            query_cache.canonical_query("_____", {"__l__", "a____"}, "zxz", 5, 1),
+            query_cache.canonical_query(None, ["A____", "__l__", "_____", ""], "xz", 5, 1),
+        )
+        self.assertNotEqual(
+            query_cache.canonical_query("", set(), "", 5, 1),
+            query_cache.canonical_query("", set(), "", 5, 2),
+        )
+
+    def test_lru_eviction(self):
+        self.cache.put("a", 1)
+        self.cache.put("b", 2)
+        self.assertEqual(self.cache.get("a"), 1)
+        self.cache.put("c", 3)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.stats()["hits"], 2)
+        self.assertEqual(self.cache.stats()["misses"], 1)
+
+    def test_cached_candidate_words(self):
+        first = query_cache.get_cached_candidate_words(
+            self.cache, "", {"a____", "__l__"}, "m", self.store, 5
+        )
+        second = query_cache.get_cached_candidate_words(
+            self.cache, "_____", ["__l__", "a____"], "mm", self.store, 5
+        )
+        self.assertSetEqual(first, {"plane", "lapel"})
+        self.assertIs(first, second)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_cached_per_engine(self):
+        first = query_cache.get_cached_candidate_words(
+            self.cache, "a____", None, "", self.store, 5
+        )
+        stats = QueryStats()
+        second = query_cache.get_cached_candidate_words(
+            self.cache, "a____", None, "", self.store, 5, "permutation", stats
+        )
+        self.assertSetEqual(first, second)
+        self.assertIsNot(first, second)
+        self.assertFalse(stats.cache_hit)
+        self.assertIn("merge_patterns", [stage.name for stage in stats.stages])
+        self.assertIs(
+            query_cache.find_cached_candidate_words(
+                self.cache, "A____", None, "", self.store, 5, "permutation"
+            ),
+            second,
+        )
+
+    def test_find_cached_candidate_words(self):
+        self.assertIsNone(
+            query_cache.find_cached_candidate_words(self.cache, "", {"a____"}, "", self.store, 5)
+        )
+        found = query_cache.get_cached_candidate_words(
+            self.cache, "", {"a____"}, "", self.store, 5
+        )
+        self.assertIs(
+            query_cache.find_cached_candidate_words(self.cache, "", ["A____"], "", self.store, 5),
+            found,
+        )
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_dictionary_version(self):
+        other_store = WordStore(["apple"])
+        self.assertNotEqual(
+            query_cache.dictionary_version(self.store),
+            query_cache.dictionary_version(other_store),
+        )
+        words = {"apple"}
+        self.assertEqual(
+            query_cache.dictionary_version(words), query_cache.dictionary_version(words)
+        )
+
+
+class TestGameSession(unittest.TestCase):
+
+    """
+    Validate that narrowing the previous candidates after each guess gives the same words as
+    querying the whole dictionary with every pattern so far
+    """
+
+    def setUp(self):
+        self.store = WordStore(
+            ["apple", "ample", "maple", "plane", "lapel", "puppy", "apply", "alpha", "aptly"]
+        )
+        self.game = session.GameSession(self.store, 5)
+
+    def test_narrows_previous_candidates(self):
+        self.assertSetEqual(
+            self.game.apply_guess("a____", set(), ""),
+            {"apple", "ample", "apply", "alpha", "aptly"},
+        )
+        self.game.base_words = None
+        self.assertSetEqual(
+            self.game.apply_guess("", {"_l___"}, "m"), {"apple", "apply", "aptly"}
+        )
+        self.assertSetEqual(self.game.apply_guess("_p___", set(), "t"), {"apple", "apply"})
+        self.assertSetEqual(self.game.apply_guess("____y", set(), ""), {"apply"})
+        self.assertEqual(self.game.locked_pattern, "ap__y")
+        self.assertEqual(self.game.excluded_letters, "mt")
+
+    def test_floating_then_locked_counted_once(self):
+        self.assertSetEqual(
+            self.game.apply_guess("", {"a____"}, ""), {"maple", "plane", "lapel"}
+        )
+        self.assertSetEqual(self.game.apply_guess("__a__", set(), ""), {"plane"})
+        self.assertEqual(self.game.locked_pattern, "__a__")
+        self.assertSetEqual(self.game.floating_patterns, set())
+
+    def test_rescans_when_not_narrowing(self):
+        self.game.apply_guess("a____", {"_a___", "__a__", "___a_"}, "")
+        self.assertSetEqual(self.game.candidates, {"alpha"})
+        self.assertSetEqual(
+            self.game.apply_guess("", {"____a"}, ""),
+            pattern_processor.get_candidate_words(
+                "a____", {"_a___", "__a__", "___a_", "____a"}, "", self.store, 5
+            ),
+        )
+
+    def test_locked_conflict(self):
+        self.game.apply_guess("a____", set(), "")
+        with self.assertRaises(Exception):
+            self.game.apply_guess("m____", set(), "")
+
+    def test_is_narrowing(self):
+        previous = constraints.compile_constraints("", {"l____"}, "", 5)
+        self.assertTrue(
+            session.is_narrowing(
+                previous, constraints.compile_constraints("", {"l____", "_l___"}, "x", 5)
+            )
+        )
+        self.assertFalse(
+            session.is_narrowing(previous, constraints.compile_constraints("", set(), "", 5))
+        )
+
+    def test_session_store(self):
+        store = session.SessionStore(ttl_seconds=60, max_sessions=2)
+        first = store.create(self.store, 5)
+        second = store.create(self.store, 5)
+        self.assertIsNotNone(store.get(first))
+        store.create(self.store, 5)
+        self.assertIsNone(store.get(second))
+        self.assertIsNotNone(store.get(first))
+        self.assertTrue(store.delete(first))
+        self.assertFalse(store.delete(first))
+
+    def test_session_store_expiry(self):
+        store = session.SessionStore(ttl_seconds=0)
+        session_id = store.create(self.store, 5)
+        self.assertIsNone(store.get(session_id))
+        self.assertEqual(len(store), 0)
+
+
+class TestParallel(unittest.TestCase):
+
+    """
+    Validate that sharding words or queries across worker processes gives the same words as
+    matching in a single process
+    """
+
+    def setUp(self):
+        self.store = WordStore(
+            ["apple", "ample", "maple", "plane", "lapel", "puppy", "apply", "alpha", "aptly"]
+        )
+        self.queries = [
+            ("a____", set(), ""),
+            ("", {"_l___"}, "m"),
+            (None, None, "p"),
+            ("", {"pp___"}, ""),
+        ]
+
+    def test_split_ranges(self):
+        self.assertListEqual(parallel.split_ranges(5, 2), [(0, 3), (3, 5)])
+        self.assertListEqual(parallel.split_ranges(2, 4), [(0, 1), (1, 2)])
+        self.assertListEqual(parallel.split_ranges(0, 4), [(0, 0)])
+
+    def test_sharded_query(self):
+        with parallel.ParallelMatcher(self.store, 5, workers=2, min_shard_words=1) as matcher:
+            self.assertTrue(matcher.sharded)
+            for locked, floating, excluded in self.queries:
+                self.assertSetEqual(
+                    matcher.get_candidate_words(locked, floating, excluded),
+                    pattern_processor.get_candidate_words(
+                        locked, floating, excluded, self.store, 5
+                    ),
+                )
+                query = constraints.Query(locked, floating, excluded, 5)
+                self.assertSetEqual(
+                    matcher.get_candidate_words(query, None, None),
+                    matcher.get_candidate_words(locked, floating, excluded),
+                )
+
+    def test_query_batch(self):
+        queries = [constraints.Query(*patterns, 5) for patterns in self.queries]
+        with parallel.ParallelMatcher(
+            self.store, 5, workers=2, min_batch_queries=1
+        ) as matcher:
+            self.assertListEqual(
+                matcher.get_candidate_words_batch(queries * 2),
+                pattern_processor.get_candidate_words_batch(
+                    self.queries * 2, self.store, 5
+                ),
+            )
+
+    def test_batch(self):
+        with parallel.ParallelMatcher(
+            set(self.store), 5, workers=2, min_batch_queries=1
+        ) as matcher:
+            self.assertListEqual(
+                matcher.get_candidate_words_batch(self.queries * 3),
+                pattern_processor.get_candidate_words_batch(
+                    self.queries * 3, self.store, 5
+                ),
+            )
+            self.assertListEqual(matcher.get_candidate_words_batch([]), [])
+
+    def test_small_queries_in_process(self):
+        with parallel.ParallelMatcher(self.store, 5, workers=2) as matcher:
+            self.assertFalse(matcher.sharded)
+            self.assertSetEqual(
+                matcher.get_candidate_words(*self.queries[1]),
+                pattern_processor.get_candidate_words(*self.queries[1], self.store, 5),
+            )
+        matcher = parallel.ParallelMatcher(self.store, 5, workers=1, min_batch_queries=1)
+        self.assertListEqual(
+            matcher.get_candidate_words_batch(self.queries),
+            pattern_processor.get_candidate_words_batch(self.queries, self.store, 5),
+        )
+        matcher.close()
+
+
+class TestSolver(unittest.TestCase):
+
+    """
+    Validate feedback codes and the ranking of guesses by expected information
+    """
+
+    def setUp(self):
+        self.words = ["apple", "ample", "maple", "plane", "tacit", "speed", "eerie", "geese"]
+
+    def feedback(self, guess, answer):
+        code = solver.feedback_code(guess, answer)
+        return "".join("-yg"[code // 3**i % 3] for i in range(len(guess)))
+
+    def test_feedback_code(self):
+        self.assertEqual(self.feedback("apple", "apple"), "ggggg")
+        self.assertEqual(self.feedback("maple", "ample"), "yyggg")
+        self.assertEqual(self.feedback("tacit", "speed"), "-----")
+        self.assertEqual(self.feedback("geese", "eerie"), "-gy-g")
+        self.assertEqual(self.feedback("eerie", "geese"), "yg--g")
+        self.assertEqual(self.feedback("speed", "abide"), "--y-y")
+
+    def test_partition_entropy(self):
+        self.assertEqual(solver.partition_entropy([1, 1, 1, 1]), 2.0)
+        self.assertEqual(solver.partition_entropy([4]), 0.0)
+        self.assertEqual(solver.partition_entropy([]), 0.0)
+
+    @unittest.skipUnless(numpy_backend.is_available(), "numpy is not installed")
+    def test_numpy_matches_feedback_code(self):
+        guesses = numpy_backend.NumpyBucket(self.words, 5)
+        codes = solver.feedback_codes(guesses.letters, guesses)
+        for i, guess in enumerate(self.words):
+            for j, answer in enumerate(self.words):
+                self.assertEqual(codes[i, j], solver.feedback_code(guess, answer))
+        self.assertListEqual(
+            solver.score_guesses(self.words, self.words[:5], 5),
+            [
+                solver.partition_entropy(
+                    collections.Counter(
+                        solver.feedback_code(guess, answer) for answer in self.words[:5]
+                    ).values()
+                )
+                for guess in self.words
+            ],
+        )
+
+    def test_rank_guesses(self):
+        ranked = solver.rank_guesses(self.words, ["apple", "ample", "maple"], 5, 2)
+        self.assertEqual(len(ranked), 2)
+        self.assertEqual(ranked[0][1], math.log2(3))
+        self.assertIn(ranked[0][0], {"apple", "ample", "maple"})
+        self.assertListEqual(solver.rank_guesses(self.words, ["plane"], 5, 1), [("plane", 0.0)])
+
+    def test_max_answers(self):
+        self.assertListEqual(solver.sample_answers(self.words, 3), ["apple", "maple", "speed"])
+        self.assertListEqual(solver.sample_answers(self.words, None), self.words)
+        for guess, score in solver.rank_guesses(self.words, self.words, 5, 3, max_answers=3):
+            self.assertEqual(
+                score, solver.score_guesses([guess], ["ample", "eerie", "plane"], 5)[0]
+            )
+
+    def test_suggest_guesses(self):
+        store = WordStore(self.words + ["cat"])
+        candidates = {"apple", "ample", "maple", "speed"}
+        for base_words in (set(self.words), store):
+            suggestions = solver.suggest_guesses("_____", {"p____"}, "", base_words, 5, 3)
+            self.assertEqual(len(suggestions), 3)
+            self.assertEqual(suggestions, solver.rank_guesses(self.words, candidates, 5, 3))
+        self.assertTrue(
+            all(
+                guess in candidates
+                for guess, _ in solver.suggest_guesses(
+                    "", {"p____"}, "", store, 5, 5, candidates_only=True
+                )
+            )
+        )
+
+
+class TestFeedbackMatrix(unittest.TestCase):
+
+    """
+    Validate building and memory mapping the feedback matrix
+    """
+
+    def setUp(self):
+        self.words = ["apple", "ample", "maple", "plane", "tacit", "speed", "eerie", "geese"]
+        self.directory = tempfile.TemporaryDirectory()
+        self.matrix_path = os.path.join(self.directory.name, "words.feedback")
+        feedback_matrix.compile_feedback_matrix(
+            self.words + ["cat"], 5, self.matrix_path, chunk_size=3
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_lookup(self):
+        matrix = feedback_matrix.load_feedback_matrix(self.matrix_path)
+        self.assertEqual(len(matrix), len(self.words))
+        self.assertNotIn("cat", matrix)
+        for guess in self.words:
+            for answer in self.words:
+                self.assertEqual(
+                    matrix.code(guess, answer), solver.feedback_code(guess, answer)
+                )
+
+    def test_built_without_numpy(self):
+        with mock.patch.object(feedback_matrix, "is_available", return_value=False):
+            feedback_matrix.compile_feedback_matrix(self.words, 5, self.matrix_path)
+        matrix = feedback_matrix.load_feedback_matrix(self.matrix_path)
+        self.assertEqual(matrix.code("geese", "eerie"), solver.feedback_code("geese", "eerie"))
+
+    @unittest.skipUnless(numpy_backend.is_available(), "numpy is not installed")
+    def test_array_and_ranking(self):
+        matrix = feedback_matrix.load_feedback_matrix(self.matrix_path)
+        self.assertEqual(matrix.array.shape, (len(self.words), len(self.words)))
+        self.assertEqual(
+            matrix.array[matrix.word_ids["speed"], matrix.word_ids["eerie"]],
+            solver.feedback_code("speed", "eerie"),
+        )
+        answers = ["apple", "ample", "maple", "speed"]
+        self.assertListEqual(
+            solver.rank_guesses(self.words, answers, 5, 3, feedback_matrix=matrix),
+            solver.rank_guesses(self.words, answers, 5, 3),
+        )
+        self.assertListEqual(
+            solver.rank_guesses(self.words + ["zebra"], answers, 5, 3, matrix),
+            solver.rank_guesses(self.words + ["zebra"], answers, 5, 3),
+        )
+
+    def test_not_a_matrix(self):
+        with open(self.matrix_path, "wb") as matrix_file:
+            matrix_file.write(b"not a feedback matrix at all")
+        with self.assertRaises(Exception):
+            feedback_matrix.load_feedback_matrix(self.matrix_path)
+
+
+class TestSimulator(unittest.TestCase):
+
+    """
+    Validate turning feedback into patterns, and playing whole games
+    """
+
+    def setUp(self):
+        self.words = [
+            "apple", "ample", "maple", "plane", "tacit", "speed", "eerie", "geese",
+            "abide", "nasty", "tasty", "pasty", "hasty", "salty", "sissy", "llama",
+        ]
+        self.store = WordStore(self.words)
+
+    def test_feedback_to_patterns(self):
+        history = [("speed", solver.feedback_code("speed", "abide"))]
+        self.assertTupleEqual(
+            simulator.feedback_to_patterns(history, 5),
+            ("_____", {"__e__", "___e_", "____d"}, "eps"),
+        )
+        history = [("tasty", solver.feedback_code("tasty", "nasty"))]
+        self.assertTupleEqual(
+            simulator.feedback_to_patterns(history, 5), ("_asty", set(), "t")
+        )
+        history = [("geese", solver.feedback_code("geese", "eerie"))]
+        self.assertTupleEqual(
+            simulator.feedback_to_patterns(history, 5),
+            ("_e__e", {"__e__"}, "gs"),
+        )
+
+    def test_answer_never_lost(self):
+        for answer in self.words:
+            for guesses in self.words:
+                history = [(guesses, solver.feedback_code(guesses, answer))]
+                locked, floating, excluded = simulator.feedback_to_patterns(history, 5)
+                self.assertIn(
+                    answer,
+                    pattern_processor.get_candidate_words(
+                        locked, floating, excluded, self.store, 5
+                    ),
+                )
+
+    def test_play_game(self):
+        self.assertEqual(
+            simulator.play_game("abide", self.store, 5, simulator.first_candidate), 1
+        )
+        self.assertGreater(
+            simulator.play_game("tasty", self.store, 5, simulator.first_candidate), 1
+        )
+        self.assertIsNone(
+            simulator.play_game("tasty", self.store, 5, simulator.first_candidate, 1)
+        )
+
+    def test_simulate(self):
+        result = simulator.simulate(self.words, self.store, 5, workers=1)
+        self.assertEqual(result.games, len(self.words))
+        self.assertEqual(result.failures, 0)
+        self.assertEqual(sum(result.guess_counts.values()), len(self.words))
+        self.assertEqual(
+            result.average_guesses, result.total_guesses / len(self.words)
+        )
+        self.assertGreater(result.games_per_second, 0)
+
+        parallel_result = simulator.simulate(self.words, self.store, 5, workers=2)
+        self.assertEqual(parallel_result.guess_counts, result.guess_counts)
+
+    def test_entropy_strategy(self):
+        strategy = simulator.EntropyStrategy(5, self.words)
+        result = simulator.simulate(self.words, self.store, 5, strategy, workers=1)
+        self.assertEqual(result.failures, 0)
+        self.assertIsNotNone(strategy.opening)
+
+
+class TestMultiBoard(unittest.TestCase):
+
+    """
+    Validate finding candidates for several boards at once, and ranking guesses across them
+    """
+
+    def setUp(self):
+        self.words = [
+            "apple", "ample", "maple", "plane", "tacit", "speed", "eerie", "geese",
+            "abide", "nasty", "tasty", "pasty", "hasty", "salty", "sissy", "llama",
+        ]
+        self.store = WordStore(self.words)
+        self.boards = [
+            simulator.feedback_to_patterns([("tasty", solver.feedback_code("tasty", answer))], 5)
+            for answer in ("nasty", "apple", "geese", "hasty")
+        ]
+
+    def test_board_candidates(self):
+        stats = QueryStats()
+        candidates = multi_board.get_board_candidates(self.boards, self.store, 5, stats=stats)
+        self.assertListEqual(
+            candidates,
+            [pattern_processor.get_candidate_words(*board, self.store, 5) for board in self.boards],
+        )
+        self.assertListEqual([stage.name for stage in stats.stages], ["board_candidates"])
+        self.assertListEqual(multi_board.get_board_candidates([], self.store, 5), [])
+
+    def test_rank_board_guesses(self):
+        answers = [{"nasty", "pasty", "hasty"}, {"apple", "ample", "maple"}, {"geese"}]
+        ranked = multi_board.rank_board_guesses(self.words, answers, 5, 3)
+        self.assertEqual(len(ranked), 3)
+        for guess, total in ranked:
+            self.assertAlmostEqual(
+                total,
+                sum(
+                    solver.score_guesses([guess], sorted(board), 5)[0]
+                    for board in answers
+                    if len(board) > 1
+                ),
+            )
+        self.assertGreaterEqual(ranked[0][1], ranked[2][1])
+        self.assertListEqual(
+            multi_board.rank_board_guesses(self.words, [{"apple"}, {"geese"}], 5, 2),
+            [("apple", 0.0), ("geese", 0.0)],
+        )
+
+    def test_suggest_board_guesses(self):
+        candidates, suggestions = multi_board.suggest_board_guesses(
+            self.boards, self.store, 5, 3
+        )
+        self.assertListEqual(
+            candidates, multi_board.get_board_candidates(self.boards, self.store, 5)
+        )
+        self.assertListEqual(
+            suggestions, multi_board.rank_board_guesses(self.words, candidates, 5, 3)
+        )
+        _, suggestions = multi_board.suggest_board_guesses(
+            self.boards, self.store, 5, 5, candidates_only=True
+        )
+        self.assertTrue(
+            all(any(guess in board for board in candidates) for guess, _ in suggestions)
+        )
+
+
 class TestGetCandidateWords(unittest.TestCase):
 
     """
@@ -900,6 +1920,391 @@ class TestGetCandidateWords(unittest.TestCase):
         )
         self.assertFalse("blood" in possible_words)
 
+    def test_engines_match(self):
+        queries = [
+            ("_a_t_", {"__n_s"}, "erip"),
+            ("", {"__o__"}, ""),
+            ("s____", {"_s___", "___e_"}, "ator"),
+            ("a____", {"_a___", "__a__", "___a_", "____a"}, ""),
+            ("", {"_a_e_"}, "st"),
+        ]
+        for locked, floating, excluded in queries:
+            self.assertSetEqual(
+                pattern_processor.get_candidate_words(
+                    locked, floating, excluded, self.valid_words, 5
+                ),
+                pattern_processor.get_candidate_words(
+                    locked,
+                    floating,
+                    excluded,
+                    self.valid_words,
+                    5,
+                    engine=pattern_processor.ENGINE_PERMUTATION,
+                ),
+            )
+
+    def test_word_index(self):
+        index = WordIndex(self.valid_words, 5)
+        self.assertSetEqual(
+            pattern_processor.get_candidate_words("_a_t_", {"__n_s"}, "erip", index, 5),
+            {"nasty"},
+        )
+        self.assertSetEqual(
+            pattern_processor.get_candidate_words(
+                "s____", {"_s___", "___e_"}, "ator", index, 5
+            ),
+            pattern_processor.get_candidate_words(
+                "s____", {"_s___", "___e_"}, "ator", self.valid_words, 5
+            ),
+        )
+
+    def test_word_store(self):
+        store = WordStore(self.valid_words)
+        for engine in (
+            pattern_processor.ENGINE_CONSTRAINT,
+            pattern_processor.ENGINE_PERMUTATION,
+        ):
+            self.assertSetEqual(
+                pattern_processor.get_candidate_words(
+                    "_a_t_", {"__n_s"}, "erip", store, 5, engine=engine
+                ),
+                {"nasty"},
+            )
+
+    @unittest.skipUnless(numpy_backend.is_available(), "numpy is not installed")
+    def test_numpy_engine(self):
+        store = WordStore(self.valid_words)
+        for base_words in (self.valid_words, store):
+            self.assertSetEqual(
+                pattern_processor.get_candidate_words(
+                    "s____",
+                    {"_s___", "___e_"},
+                    "ator",
+                    base_words,
+                    5,
+                    engine=pattern_processor.ENGINE_NUMPY,
+                ),
+                pattern_processor.get_candidate_words(
+                    "s____", {"_s___", "___e_"}, "ator", self.valid_words, 5
+                ),
+            )
+
+    def test_batch(self):
+        queries = [
+            ("_a_t_", {"__n_s"}, "erip"),
+            ("s____", {"_s___", "___e_"}, "ator"),
+            (None, None, "aeiou"),
+            ("_A_T_", {"__n_s"}, "erip"),
+        ]
+        expected = [
+            pattern_processor.get_candidate_words(locked, floating, excluded, self.valid_words, 5)
+            for locked, floating, excluded in queries
+        ]
+        store = WordStore(self.valid_words)
+        for base_words in (self.valid_words, store):
+            batch_words = pattern_processor.get_candidate_words_batch(
+                queries, base_words, 5
+            )
+            self.assertListEqual(batch_words, expected)
+            self.assertIs(batch_words[0], batch_words[3])
+        self.assertListEqual(
+            pattern_processor.get_candidate_words_batch(
+                queries[:2], store, 5, engine=pattern_processor.ENGINE_PERMUTATION
+            ),
+            expected[:2],
+        )
+        self.assertListEqual(pattern_processor.get_candidate_words_batch([], store, 5), [])
+
+    def test_iter_candidate_words(self):
+        expected = pattern_processor.get_candidate_words(
+            "s____", {"_s___", "___e_"}, "ator", self.valid_words, 5
+        )
+        store = WordStore(self.valid_words)
+        index = WordIndex(self.valid_words, 5)
+        for base_words in (self.valid_words, store, store, index):
+            self.assertSetEqual(
+                set(
+                    pattern_processor.iter_candidate_words(
+                        "s____", {"_s___", "___e_"}, "ator", base_words, 5
+                    )
+                ),
+                expected,
+            )
+        _ = store.bucket(5).index
+        for base_words in (store, index):
+            limited = list(
+                pattern_processor.iter_candidate_words(
+                    "s____", {"_s___", "___e_"}, "ator", base_words, 5, limit=3
+                )
+            )
+            self.assertListEqual(limited, sorted(expected)[:3])
+
+    def test_candidate_words_exist(self):
+        store = WordStore(self.valid_words)
+        for base_words in (self.valid_words, store):
+            self.assertTrue(
+                pattern_processor.candidate_words_exist(
+                    "_a_t_", {"__n_s"}, "erip", base_words, 5
+                )
+            )
+            self.assertFalse(
+                pattern_processor.candidate_words_exist(
+                    None, None, "abcdefghijklmnopqrstuvwxy", base_words, 5
+                )
+            )
+
+    def test_letter_count_limits(self):
+        words = {"speed", "spend", "spelt", "sweep", "steep", "spree"}
+        store = WordStore(words)
+        expected = {"spend", "spelt"}
+        for base_words in (words, store, dawg.build_dawg(words)):
+            for engine in pattern_processor.ENGINES:
+                self.assertSetEqual(
+                    pattern_processor.get_candidate_words(
+                        "s_e__", set(), "e", base_words, 5, engine
+                    ),
+                    expected,
+                )
+        self.assertSetEqual(store.bucket(5).index.query(constraints.compile_constraints("s_e__", set(), "e", 5)), expected)
+
+    def test_by_length(self):
+        words = {"nab", "cab", "nasal", "nasty", "canal", "banana", "bandit", "damson"}
+        expected = {3: {"nab"}, 5: {"nasal", "nasty"}, 6: {"damson"}}
+        for base_words in (words, WordStore(words)):
+            for engine in pattern_processor.ENGINES:
+                self.assertDictEqual(
+                    pattern_processor.get_candidate_words_by_length(
+                        "_a", {"__n"}, "erip", base_words, [6, 3, 5], engine
+                    ),
+                    expected,
+                )
+        with self.assertRaises(Exception):
+            pattern_processor.get_candidate_words_by_length(
+                "_a___", None, "", words, [4, 5]
+            )
+
+        cache = query_cache.QueryCache()
+        store = WordStore(words)
+        stats = QueryStats()
+        query_cache.get_cached_candidate_words(cache, "_a___", {"__n__"}, "erip", store, 5)
+        found = query_cache.get_cached_candidate_words_by_length(
+            cache, "_a", {"__n"}, "erip", store, [3, 5, 6], stats=stats
+        )
+        self.assertDictEqual(found, expected)
+        self.assertEqual(cache.hits, 1)
+        self.assertFalse(stats.cache_hit)
+        self.assertEqual(stats.stages[0].name, "split_lengths")
+
+    def test_unknown_engine(self):
+        with self.assertRaises(Exception):
+            pattern_processor.get_candidate_words(
+                "_a_t_", {"__n_s"}, "erip", self.valid_words, 5, engine="unknown"
+            )
+
+    def test_query_stats(self):
+        stats = QueryStats()
+        words = pattern_processor.get_candidate_words(
+            "_a_t_", {"__n_s"}, "erip", self.valid_words, 5,
+            pattern_processor.ENGINE_PERMUTATION, stats
+        )
+        self.assertSetEqual(words, {"nasty"})
+        self.assertListEqual(
+            [stage.name for stage in stats.stages],
+            ["compile", "length_filter", "permutations", "merge_patterns", "scan", "remove_invalid_words"],
+        )
+        self.assertEqual(stats.stages[2].input_size, 4)
+        self.assertEqual(stats.stages[2].output_size, 120)
+        self.assertEqual(stats.stages[3].input_size, 120)
+        self.assertEqual(stats.stages[-1].output_size, 1)
+
+        stats = QueryStats()
+        pattern_processor.get_candidate_words(
+            "_a_t_", {"__n_s"}, "erip", WordStore(self.valid_words), 5, stats=stats
+        )
+        self.assertListEqual([stage.name for stage in stats.stages], ["compile", "scan"])
+        self.assertEqual(stats.stages[1].output_size, 1)
+
+
+class TestQueryStats(unittest.TestCase):
+
+    """
+    Test recording and formatting the time taken by each stage of a query
+    """
+
+    def test_run_stage(self):
+        self.assertEqual(run_stage(None, "sort", 3, sorted, "cab"), ["a", "b", "c"])
+        stats = QueryStats()
+        self.assertEqual(run_stage(stats, "sort", 3, sorted, "cab"), ["a", "b", "c"])
+        ((name, seconds, input_size, output_size),) = stats.stages
+        self.assertEqual((name, input_size, output_size), ("sort", 3, 3))
+        self.assertGreaterEqual(seconds, 0)
+        self.assertEqual(stats.total_seconds, seconds)
+
+    def test_server_timing(self):
+        stats = QueryStats()
+        stats.run("compile", None, str, "x")
+        stats.cache_hit = False
+        header = stats.server_timing(0.002)
+        self.assertRegex(header, r'^compile;dur=\d+\.\d{3}, cache;desc="miss", total;dur=2\.000$')
+        self.assertIsNone(stats.as_dict()["stages"][0]["output_size"])
+        self.assertIn("compile", stats.format())
+
+
+
+class TestDawg(unittest.TestCase):
+
+    """
+    Test the minimised word graph, packed in memory and memory mapped from a file
+    """
+
+    def setUp(self):
+        self.words = ["tap", "taps", "top", "tops", "apple", "ample", "maple", "apply", "speed"]
+        self.graph = dawg.build_dawg(self.words)
+
+    def test_contains(self):
+        self.assertEqual(len(self.graph), len(self.words))
+        for word in self.words:
+            self.assertIn(word, self.graph)
+        for word in ("ta", "tapss", "", "appl", 5):
+            self.assertNotIn(word, self.graph)
+        self.assertListEqual(list(self.graph), sorted(self.words, key=lambda word: (len(word), word)))
+
+    def test_minimised(self):
+        # suffixes are shared: 'ps' after ta/to, 'ple' after ap/am/ma
+        self.assertLess(len(self.graph.node_masks), sum(len(word) for word in self.words) // 2)
+        self.assertTupleEqual(self.graph.lengths(), (3, 4, 5))
+        self.assertListEqual(list(self.graph.words_of_length(4)), ["taps", "tops"])
+        self.assertListEqual(list(self.graph.words_of_length(6)), [])
+
+    def test_query(self):
+        queries = [
+            ("_p___", set(), ""),
+            ("", {"_p___"}, "y"),
+            ("a____", {"pp___"}, ""),
+            ("", {"__e__"}, "s"),
+            ("", set(), "aeiou"),
+        ]
+        for query in queries:
+            constraints_for_query = constraints.compile_constraints(*query, 5)
+            self.assertSetEqual(
+                self.graph.query(constraints_for_query),
+                constraints.filter_words(constraints_for_query, self.words),
+            )
+
+    def test_matches_dictionary(self):
+        with open("./data/words_alpha.txt", "r", encoding="utf8") as word_file:
+            words = {word for word in word_file.read().split() if len(word) in (4, 5)}
+        graph = dawg.build_dawg(words)
+        queries = [
+            ("_a_t_", {"__n_s"}, "erip"),
+            ("", {"__o__"}, ""),
+            ("s____", {"_s___", "___e_"}, "ator"),
+            ("a____", {"_a___", "__a__", "___a_", "____a"}, ""),
+            ("", {"pp___"}, ""),
+        ]
+        for query in queries:
+            self.assertSetEqual(
+                pattern_processor.get_candidate_words(*query, graph, 5),
+                pattern_processor.get_candidate_words(*query, words, 5),
+            )
+        self.assertSetEqual(
+            pattern_processor.get_words_specified_length(4, graph),
+            {word for word in words if len(word) == 4},
+        )
+
+    def test_compile_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = dawg.dawg_path_for(os.path.join(directory, "words.txt"))
+            dawg.compile_dawg(self.words, path)
+            loaded = dawg.load_dawg(path)
+            self.assertListEqual(list(loaded), list(self.graph))
+            self.assertEqual(loaded.nbytes, self.graph.nbytes)
+            self.assertSetEqual(
+                set(pattern_processor.iter_candidate_words("", {"_p___"}, "y", loaded, 5)),
+                {"ample", "maple"},
+            )
+
+    def test_word_too_long(self):
+        with self.assertRaises(Exception):
+            dawg.build_dawg(["a" * (dawg.MAX_WORD_LENGTH + 1)])
+
+
+@unittest.skipUnless(daemon.is_supported(), "Unix sockets are not available")
+class TestDaemon(unittest.TestCase):
+
+    """
+    Test answering requests over a Unix socket, and falling back when no daemon is running
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.directory.name, "wordler.sock")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def start_daemon(self, handler):
+        thread = threading.Thread(target=daemon.serve, args=(handler, self.socket_path))
+        thread.start()
+        for _ in range(500):
+            if daemon.send_request({"command": "ping"}, self.socket_path) is not None:
+                break
+            threading.Event().wait(0.01)
+        return thread
+
+    def test_no_daemon(self):
+        self.assertIsNone(daemon.send_request({"command": "ping"}, self.socket_path))
+
+    def test_requests(self):
+        def handler(request):
+            if request["command"] == "upper":
+                return request["word"].upper()
+            raise Exception(f"Unknown command '{request['command']}'")
+
+        thread = self.start_daemon(handler)
+        self.assertEqual(daemon.send_request({"command": "ping"}, self.socket_path), "pong")
+        self.assertEqual(
+            daemon.send_request({"command": "upper", "word": "nasty"}, self.socket_path),
+            "NASTY",
+        )
+        with self.assertRaises(Exception):
+            daemon.send_request({"command": "unknown"}, self.socket_path)
+        with self.assertRaises(Exception):
+            daemon.serve(handler, self.socket_path)
+
+        daemon.send_request({"command": "stop"}, self.socket_path)
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(os.path.exists(self.socket_path))
+
+    def test_unanswered_request(self):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+            listener.bind(self.socket_path)
+            listener.listen(1)
+
+            def answer_truncated():
+                connection, _ = listener.accept()
+                with connection:
+                    connection.recv(1024)
+                    connection.sendall(b'{"ok": tr')
+
+            thread = threading.Thread(target=answer_truncated)
+            thread.start()
+            self.assertIsNone(daemon.send_request({"command": "ping"}, self.socket_path))
+            thread.join(5)
+
+            self.assertIsNone(
+                daemon.send_request({"command": "ping"}, self.socket_path, timeout=0.1)
+            )
+
+    def test_stale_socket_replaced(self):
+        with open(self.socket_path, "w", encoding="utf8"):
+            pass
+        thread = self.start_daemon(lambda request: None)
+        self.assertEqual(daemon.send_request({"command": "ping"}, self.socket_path), "pong")
+        daemon.send_request({"command": "stop"}, self.socket_path)
+        thread.join(5)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -2,51 +2,53 @@
 Command line invocation of wordler processing
 """
 import argparse
-from typing import Set
-import wordlertools.pattern_processor as pattern_processor
+import sys
+from typing import Optional, Set
+import wordlertools.daemon as daemon
+from wordlertools.options import DEFAULT_WORD_LENGTH, ENGINE_CONSTRAINT, ENGINES
+from wordlertools.query_stats import QueryStats
 
 
 def load_words(filename: str) -> Set[str]:
-    """Load words from file
-
-    File format should be one word per line
+    """Load words from file, with wordlertools.dictionary only imported when called
 
     Arguments:
-    filename: the file containing words to load
+    filename: the file containing words to load, one word per line
 
-    Return: list of words
+    Return: set of words
     """
-    with open(filename, "r", encoding="utf8") as word_file:
-        valid_words = set(word_file.read().split())
+    import wordlertools.dictionary  # pylint: disable=import-outside-toplevel
 
-    return valid_words
+    return wordlertools.dictionary.load_words(filename)
 
 
 def perform_processing(
-    locked_pattern: str, floating_patterns: Set[str], excluded_letters: str
+    locked_pattern: str,
+    floating_patterns: Set[str],
+    excluded_letters: str,
+    engine: str = ENGINE_CONSTRAINT,
+    limit: Optional[int] = None,
+    stats: Optional[QueryStats] = None,
+    word_length: int = DEFAULT_WORD_LENGTH,
 ) -> Set[str]:
     """
     Main entry point to start processing of words that match the restrictions given
 
-    Arguments:
-    locked_pattern: string with pattern of letters, locked into the right positions (green)
-    floating_patterns: set of strings, covering patterns with letters known to be in word,
-    but not in those positions (yellow)
-    excluded_letters: string containing letters known to not be in solution
+    The dictionary and matching code in wordlertools.processing are only imported when this
+    is called, so forwarding a query to the daemon stays quick. See
+    processing.perform_processing for the arguments.
 
     Returns: set of candidate words that contains the answer
     """
-    # Init and output behaviour
-    words_file = "./data/words_alpha.txt"
-    word_length = 5
+    import wordlertools.processing  # pylint: disable=import-outside-toplevel
 
-    words_from_file = load_words(words_file)
-
-    return pattern_processor.get_candidate_words(
+    return wordlertools.processing.perform_processing(
         locked_pattern,
         floating_patterns,
         excluded_letters,
-        words_from_file,
+        engine,
+        limit,
+        stats,
         word_length,
     )
 
@@ -95,8 +97,75 @@ if __name__ == "__main__":
     parser.add_argument(
         "-x", "--excluded_letters", help="string of letters not in the word"
     )
+    parser.add_argument(
+        "-e",
+        "--engine",
+        choices=ENGINES,
+        default=ENGINE_CONSTRAINT,
+        help="how words are matched against the patterns",
+    )
+    parser.add_argument(
+        "-w",
+        "--word_length",
+        type=int,
+        nargs="+",
+        default=[DEFAULT_WORD_LENGTH],
+        metavar="N",
+        help="length of the word, or several lengths to find words of each",
+    )
+    parser.add_argument(
+        "-n", "--limit", type=int, help="maximum number of words to show"
+    )
+    parser.add_argument(
+        "-s",
+        "--suggest",
+        type=int,
+        metavar="K",
+        help="show the K guesses expected to narrow down the words the most",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="show the time taken by each stage of the query",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="keep the dictionary loaded and answer queries from other runs until stopped",
+    )
+    parser.add_argument(
+        "--stop-daemon", action="store_true", help="stop the running daemon"
+    )
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="answer in this process, even if a daemon is running",
+    )
+    parser.add_argument(
+        "--socket",
+        default=daemon.default_socket_path(),
+        help="Unix socket the daemon listens on",
+    )
     args = parser.parse_args()
 
+    if any(length < 1 for length in args.word_length):
+        parser.error("word lengths must be at least 1")
+    if len(args.word_length) > 1 and (args.limit is not None or args.suggest):
+        parser.error("--limit and --suggest need a single word length")
+
+    if args.daemon:
+        import wordlertools.processing as processing  # pylint: disable=import-outside-toplevel
+
+        processing.warm_up(args.word_length)
+        print(f"Listening on {args.socket}")
+        daemon.serve(processing.handle_daemon_request, args.socket)
+        sys.exit(0)
+
+    if args.stop_daemon:
+        if daemon.send_request({"command": "stop"}, args.socket) is None:
+            print(f"No daemon listening on {args.socket}")
+        sys.exit(0)
+
     (
         param_locked_pattern,
         param_floating_patterns,
@@ -114,9 +183,81 @@ if __name__ == "__main__":
             "You must specify one valid parameter of locked, floating or excluded"
         )
 
-    candidate_words = perform_processing(
-        param_locked_pattern, param_floating_patterns, param_excluded_letters
-    )
+    query_stats = QueryStats() if args.stats else None
+
+    # forward the query to the daemon if one is running, otherwise answer it here
+    daemon_response = None
+    if not args.no_daemon:
+        daemon_response = daemon.send_request(
+            {
+                "command": "suggest" if args.suggest else "words",
+                "l": param_locked_pattern,
+                "f": param_floating_patterns,
+                "x": param_excluded_letters,
+                "w": args.word_length,
+                "engine": args.engine,
+                "limit": args.limit,
+                "k": args.suggest,
+                "stats": args.stats,
+            },
+            args.socket,
+        )
+        if daemon_response is not None and "stats" in daemon_response:
+            query_stats = QueryStats.from_dict(daemon_response["stats"])
+
+    if daemon_response is None:
+        # the dictionary and matching code are only loaded when answering in this process
+        import wordlertools.processing as processing  # pylint: disable=import-outside-toplevel
+
+    if args.suggest:
+        if daemon_response is not None:
+            suggestions = daemon_response["suggestions"]
+        else:
+            suggestions = processing.perform_suggestion(
+                param_locked_pattern,
+                param_floating_patterns,
+                param_excluded_letters,
+                args.suggest,
+                query_stats,
+                args.word_length[0],
+            )
+        for guess, entropy in suggestions:
+            print(f"{guess} {entropy:.3f}")
+    elif len(args.word_length) > 1:
+        if daemon_response is not None:
+            words_by_length = {
+                int(length): set(words)
+                for length, words in daemon_response["words_by_length"].items()
+            }
+        else:
+            words_by_length = processing.perform_processing_by_length(
+                param_locked_pattern,
+                param_floating_patterns,
+                param_excluded_letters,
+                args.word_length,
+                args.engine,
+                query_stats,
+            )
+
+        if SHOW_POSSIBLE_WORDS:
+            for length, words in words_by_length.items():
+                print(f"{length}: {set(words)}")
+    else:
+        if daemon_response is not None:
+            candidate_words = set(daemon_response["words"])
+        else:
+            candidate_words = processing.perform_processing(
+                param_locked_pattern,
+                param_floating_patterns,
+                param_excluded_letters,
+                args.engine,
+                args.limit,
+                query_stats,
+                args.word_length[0],
+            )
+
+        if SHOW_POSSIBLE_WORDS:
+            print(set(candidate_words))
 
-    if SHOW_POSSIBLE_WORDS:
-        print(candidate_words)
+    if query_stats is not None:
+        print(query_stats.format(), file=sys.stderr)
@@ -1,27 +1,63 @@
-from typing import Set
+import os
+import time
+from typing import Any, Dict, Iterable, Set, Tuple, Union
 from flask import Flask, request, jsonify
 
 import wordlertools.pattern_processor as pattern_processor
 
+from wordlertools.dictionary import (
+    get_feedback_matrix,
+    load_dictionary,
+    read_word_lengths,
+)
+
+from wordlertools.multi_board import suggest_board_guesses
+from wordlertools.query_cache import (
+    QueryCache,
+    canonical_query,
+    get_cached_candidate_words,
+    get_cached_candidate_words_by_length,
+)
+from wordlertools.query_stats import QueryStats
+from wordlertools.session import SessionStore
+from wordlertools.solver import suggest_guesses
+from wordlertools.word_store import WordStore
+
+WORDS_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "words_alpha.txt"
+)
+WORD_LENGTH = 5
+# bound the work done scoring guesses for one request
+MAX_SUGGESTIONS = 50
+MAX_BATCH_QUERIES = 100
+MAX_SCORED_CANDIDATES = 1000
+
+
 app = Flask(__name__)
+dictionary = load_dictionary(WORDS_FILE, WORD_LENGTH)
+word_store: WordStore = dictionary["store"]
+query_cache = QueryCache()
+sessions = SessionStore()
+feedback_matrix = get_feedback_matrix(WORDS_FILE)
 
 
-def create_floating_patterns(input_string: str) -> Set[str]:
+def create_floating_patterns(input_string: Union[str, Iterable[str]]) -> Set[str]:
     if input_string is None:
         return set()
+    if not isinstance(input_string, str):
+        return set(input_string)
     return set(input_string.split(","))
 
 
-@app.route("/")
-def hello_world():
-    return "Hello, World!"
-
+def read_query_parameters(param_dict: Dict[str, Any]) -> Tuple[str, Set[str], str]:
+    """Read locked pattern, floating patterns and excluded letters from request parameters
 
-@app.route("/wordler", methods=["GET"])
-def do_wordler():
-    args = request.args
-    param_dict = args.to_dict()
+    Arguments:
+    param_dict: request parameters, with optional keys l, f and x. Floating patterns can be
+    a comma separated string or a list
 
+    Returns: tuple of locked pattern, set of floating patterns and excluded letters
+    """
     locked_pattern = ""
     floating_patterns = set()
     excluded_letters = ""
@@ -35,6 +71,71 @@ def do_wordler():
     if "x" in param_dict:
         excluded_letters = param_dict["x"]
 
+    return locked_pattern, floating_patterns, excluded_letters
+
+
+def read_word_length(param_dict: Dict[str, Any]) -> int:
+    """Read the word length from request parameters, for requests taking a single length
+
+    Arguments:
+    param_dict: request parameters, with an optional length
+
+    Returns: the word length, WORD_LENGTH if none was given
+
+    Exception: if more than one length is given, or the length isn't valid
+    """
+    lengths = read_word_lengths(param_dict, WORD_LENGTH)
+    if len(lengths) > 1:
+        raise Exception("Only one word length can be given")
+    return lengths[0]
+
+
+def read_top_k(param_dict: Dict[str, Any]) -> int:
+    """Read the number of suggestions asked for from request parameters
+
+    Arguments:
+    param_dict: request parameters, with an optional k
+
+    Returns: number of suggestions, 5 if none was given
+
+    Exception: if k isn't between 1 and MAX_SUGGESTIONS
+    """
+    top_k = int(param_dict.get("k", 5))
+    if not 1 <= top_k <= MAX_SUGGESTIONS:
+        raise Exception(f"k must be between 1 and {MAX_SUGGESTIONS}")
+    return top_k
+
+
+@app.route("/")
+def hello_world():
+    return "Hello, World!"
+
+
+@app.route("/ready")
+def ready():
+    return jsonify(
+        {
+            "ready": True,
+            "load_seconds": dictionary["load_seconds"],
+            "index_seconds": dictionary["index_seconds"],
+            "words": dictionary["words"],
+            "indexed_words": dictionary["indexed_words"],
+            "cache": query_cache.stats(),
+            "feedback_matrix": feedback_matrix is not None,
+        }
+    )
+
+
+@app.route("/wordler", methods=["GET"])
+def do_wordler():
+    start = time.perf_counter()
+    args = request.args
+    param_dict = args.to_dict()
+
+    locked_pattern, floating_patterns, excluded_letters = read_query_parameters(
+        param_dict
+    )
+
     if (
         locked_pattern is None
         and floating_patterns is None
@@ -42,15 +143,238 @@ def do_wordler():
     ):
         return "No processing required. All parameters empty."
 
-    words_file = "./data/words_alpha.txt"
-    word_length = 5
-    candidate_words = pattern_processor.get_candidate_words(
-        locked_pattern, floating_patterns, excluded_letters, words_file, word_length
+    stats = QueryStats()
+    word_lengths = read_word_lengths(param_dict, WORD_LENGTH)
+    word_length = word_lengths[0]
+
+    if len(word_lengths) > 1:
+        if "exists" in param_dict or "limit" in param_dict:
+            raise Exception("exists and limit need a single word length")
+        words_by_length = get_cached_candidate_words_by_length(
+            query_cache,
+            locked_pattern,
+            floating_patterns,
+            excluded_letters,
+            word_store,
+            word_lengths,
+            stats=stats,
+        )
+        response = jsonify(
+            {str(length): list(words) for length, words in words_by_length.items()}
+        )
+    elif "exists" in param_dict:
+        response = jsonify(
+            {
+                "exists": stats.run(
+                    "scan",
+                    None,
+                    pattern_processor.candidate_words_exist,
+                    locked_pattern,
+                    floating_patterns,
+                    excluded_letters,
+                    word_store,
+                    word_length,
+                )
+            }
+        )
+    elif "limit" in param_dict:
+        response = jsonify(
+            stats.run(
+                "scan",
+                None,
+                lambda: list(
+                    pattern_processor.iter_candidate_words(
+                        locked_pattern,
+                        floating_patterns,
+                        excluded_letters,
+                        word_store,
+                        word_length,
+                        int(param_dict["limit"]),
+                    )
+                ),
+            )
+        )
+    else:
+        candidate_words = get_cached_candidate_words(
+            query_cache,
+            locked_pattern,
+            floating_patterns,
+            excluded_letters,
+            word_store,
+            word_length,
+            stats=stats,
+        )
+        response = jsonify(list(candidate_words))
+
+    response.headers["Server-Timing"] = stats.server_timing(time.perf_counter() - start)
+    return response
+
+
+@app.route("/wordler/frequency", methods=["GET"])
+def do_wordler_frequency():
+    param_dict = request.args.to_dict()
+    locked_pattern, floating_patterns, excluded_letters = read_query_parameters(
+        param_dict
+    )
+    word_length = read_word_length(param_dict)
+
+    candidate_words = get_cached_candidate_words(
+        query_cache,
+        locked_pattern,
+        floating_patterns,
+        excluded_letters,
+        word_store,
+        word_length,
+    )
+
+    known_letters = ""
+    if "known" in param_dict:
+        known_letters = (locked_pattern + "".join(floating_patterns)).replace("_", "")
+
+    frequency = pattern_processor.get_letter_frequency(
+        candidate_words, word_store, word_length, known_letters.lower()
+    )
+    return jsonify(
+        {
+            "words": frequency.word_count,
+            "positions": frequency.positions,
+            "overall": frequency.overall,
+            "containing": frequency.containing,
+        }
+    )
+
+
+@app.route("/wordler/suggest", methods=["GET"])
+def do_wordler_suggest():
+    param_dict = request.args.to_dict()
+    locked_pattern, floating_patterns, excluded_letters = read_query_parameters(
+        param_dict
+    )
+    word_length = read_word_length(param_dict)
+    top_k = read_top_k(param_dict)
+    candidates_only = "candidates_only" in param_dict
+
+    # suggestions are costly to score, so are cached alongside candidate words
+    key = (
+        "suggest",
+        top_k,
+        candidates_only,
+        canonical_query(
+            locked_pattern,
+            floating_patterns,
+            excluded_letters,
+            word_length,
+            word_store.version,
+        ),
+    )
+    suggestions = query_cache.get(key)
+    if suggestions is None:
+        suggestions = suggest_guesses(
+            locked_pattern,
+            floating_patterns,
+            excluded_letters,
+            word_store,
+            word_length,
+            top_k,
+            candidates_only,
+            feedback_matrix,
+            max_answers=MAX_SCORED_CANDIDATES,
+        )
+        query_cache.put(key, suggestions)
+
+    return jsonify(
+        [{"word": guess, "entropy": entropy} for guess, entropy in suggestions]
+    )
+
+
+@app.route("/wordler/batch", methods=["POST"])
+def do_wordler_batch():
+    queries = request.get_json()
+    if isinstance(queries, dict):
+        queries = queries.get("queries")
+    if not isinstance(queries, list):
+        raise Exception("Expected a JSON list of queries")
+    if len(queries) > MAX_BATCH_QUERIES:
+        return (
+            jsonify({"error": f"At most {MAX_BATCH_QUERIES} queries can be batched"}),
+            400,
+        )
+    if not all(
+        isinstance(query, dict) and query.keys() & {"l", "f", "x"} for query in queries
+    ):
+        return (
+            jsonify({"error": "Each query must be a JSON object with l, f or x"}),
+            400,
+        )
+
+    batch_words = pattern_processor.get_candidate_words_batch(
+        [read_query_parameters(query) for query in queries],
+        word_store,
+        read_word_length(request.args.to_dict()),
+    )
+
+    return jsonify([list(candidate_words) for candidate_words in batch_words])
+
+
+@app.route("/wordler/boards", methods=["POST"])
+def do_wordler_boards():
+    boards = request.get_json()
+    if isinstance(boards, dict):
+        boards = boards.get("boards")
+    if not isinstance(boards, list):
+        raise Exception("Expected a JSON list of boards")
+
+    param_dict = request.args.to_dict()
+    board_words, suggestions = suggest_board_guesses(
+        [read_query_parameters(board) for board in boards],
+        word_store,
+        read_word_length(param_dict),
+        read_top_k(param_dict),
+        "candidates_only" in param_dict,
+        feedback_matrix,
+        max_answers=MAX_SCORED_CANDIDATES,
+    )
+
+    return jsonify(
+        {
+            "candidates": [sorted(candidate_words) for candidate_words in board_words],
+            "suggestions": [
+                {"word": guess, "entropy": entropy} for guess, entropy in suggestions
+            ],
+        }
+    )
+
+
+@app.route("/session", methods=["POST"])
+def create_session():
+    word_length = read_word_length(request.values.to_dict())
+    session_id = sessions.create(word_store, word_length)
+    return jsonify({"session": session_id, "ttl_seconds": sessions.ttl_seconds}), 201
+
+
+@app.route("/session/<session_id>/guess", methods=["POST"])
+def session_guess(session_id: str):
+    session = sessions.get(session_id)
+    if session is None:
+        return jsonify({"error": f"Unknown session {session_id}"}), 404
+
+    locked_pattern, floating_patterns, excluded_letters = read_query_parameters(
+        request.values.to_dict()
+    )
+    candidate_words = session.apply_guess(
+        locked_pattern, floating_patterns, excluded_letters
     )
 
     return jsonify(list(candidate_words))
 
 
+@app.route("/session/<session_id>", methods=["DELETE"])
+def end_session(session_id: str):
+    if not sessions.delete(session_id):
+        return jsonify({"error": f"Unknown session {session_id}"}), 404
+    return "", 204
+
+
 @app.errorhandler(Exception)
 def basic_error(error):
     return jsonify({"error": "Bad parameters " + str(error)}), 500
@@ -0,0 +1,434 @@
+"""
+Asyncio server for the wordler API, answering /wordler and /ready as wordler_api.py does
+
+Matching runs on a bounded pool of worker threads so the event loop keeps accepting and reading
+connections while words are filtered. Once the pool has as many requests queued as it's allowed,
+further requests are turned away with 503 straight away, rather than waiting behind a queue
+that keeps growing, so the latency of the requests that are accepted stays predictable.
+
+Matching is pure Python, so the worker threads take turns on one core under the GIL. More
+workers let a quick query run alongside a slow one rather than behind it, but don't add
+throughput. To use more cores, run one server process for each, as with
+`uvicorn wordler_asgi:app --workers 4`, each loading its own dictionary and cache.
+
+`app` is an ASGI application, so can be run by any ASGI server, e.g. `uvicorn wordler_asgi:app`.
+Running this file starts a small HTTP/1.1 server with keep-alive built on asyncio streams, which
+needs nothing beyond the standard library.
+"""
+import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Set, Tuple
+from urllib.parse import parse_qs, unquote
+import wordlertools.pattern_processor as pattern_processor
+from wordlertools.dictionary import load_dictionary, read_word_lengths
+from wordlertools.query_cache import (
+    QueryCache,
+    find_cached_candidate_words,
+    get_cached_candidate_words,
+    get_cached_candidate_words_by_length,
+)
+from wordlertools.query_stats import QueryStats, StageStats
+from wordlertools.word_store import WordStore
+
+WORDS_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "words_alpha.txt"
+)
+WORD_LENGTH = 5
+DEFAULT_WORKERS = min(4, os.cpu_count() or 1)
+DEFAULT_QUEUED_PER_WORKER = 16
+KEEP_ALIVE_SECONDS = 15.0
+MAX_HEADERS = 100
+MAX_BODY_BYTES = 64 * 1024
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class WorkerPool:
+    """Pool of worker threads with a limit on the requests waiting for or running on it
+
+    Only used from the event loop thread, so the count of pending requests needs no lock.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="wordler"
+        )
+
+    def is_full(self) -> bool:
+        """Check if another request can be taken
+
+        Return: True if as many requests as allowed are already pending, otherwise False
+        """
+        return self.pending >= self.max_pending
+
+    async def run(self, function: Callable[..., Any], *args: Any) -> Any:
+        """Run a function on a worker thread, without blocking the event loop
+
+        Arguments:
+        function: function to run
+        args: arguments for the function
+
+        Return: the result of the function
+        """
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, function, *args
+            )
+        finally:
+            self.pending -= 1
+
+    def shutdown(self):
+        """Stop the worker threads once the requests already taken are done"""
+        self._executor.shutdown(wait=True)
+
+
+dictionary = load_dictionary(WORDS_FILE, WORD_LENGTH)
+word_store: WordStore = dictionary["store"]
+query_cache = QueryCache()
+pool = WorkerPool(DEFAULT_WORKERS, DEFAULT_WORKERS * DEFAULT_QUEUED_PER_WORKER)
+
+
+def read_query_parameters(query_string: bytes) -> Dict[str, str]:
+    """Decode the query string of a request, taking the first value of each parameter
+
+    Arguments:
+    query_string: raw query string, without the leading '?'
+
+    Returns: dictionary of parameter name against value
+    """
+    query = parse_qs(query_string.decode("latin-1"), keep_blank_values=True)
+    return {name: values[0] for name, values in query.items()}
+
+
+def read_patterns(param_dict: Dict[str, str]) -> Tuple[str, Set[str], str]:
+    """Read locked pattern, floating patterns and excluded letters from request parameters
+
+    Arguments:
+    param_dict: request parameters, with optional keys l, f and x. Floating patterns are
+    comma separated
+
+    Returns: tuple of locked pattern, set of floating patterns and excluded letters
+    """
+    floating_patterns = set()
+    if "f" in param_dict:
+        floating_patterns = set(param_dict["f"].split(","))
+    return param_dict.get("l", ""), floating_patterns, param_dict.get("x", "")
+
+
+def find_words(param_dict: Dict[str, str], stats: QueryStats, submitted: float) -> Any:
+    """Answer a /wordler request, run on a worker thread
+
+    Arguments:
+    param_dict: request parameters
+    stats: stats to record each stage in, including the time spent waiting for a worker
+    submitted: perf_counter time the request was handed to the pool
+
+    Returns: the JSON body, as a list of words, a dictionary of length against words when
+    more than one length is asked for, or a dictionary for exists
+    """
+    stats.stages.append(
+        StageStats("queue", time.perf_counter() - submitted, pool.pending, None)
+    )
+    locked_pattern, floating_patterns, excluded_letters = read_patterns(param_dict)
+    word_lengths = read_word_lengths(param_dict, WORD_LENGTH)
+    word_length = word_lengths[0]
+
+    if len(word_lengths) > 1:
+        if "exists" in param_dict or "limit" in param_dict:
+            raise Exception("exists and limit need a single word length")
+        words_by_length = get_cached_candidate_words_by_length(
+            query_cache,
+            locked_pattern,
+            floating_patterns,
+            excluded_letters,
+            word_store,
+            word_lengths,
+            stats=stats,
+        )
+        return {str(length): sorted(words) for length, words in words_by_length.items()}
+
+    if "exists" in param_dict:
+        return {
+            "exists": stats.run(
+                "scan",
+                None,
+                pattern_processor.candidate_words_exist,
+                locked_pattern,
+                floating_patterns,
+                excluded_letters,
+                word_store,
+                word_length,
+            )
+        }
+
+    if "limit" in param_dict:
+        return stats.run(
+            "scan",
+            None,
+            lambda: list(
+                pattern_processor.iter_candidate_words(
+                    locked_pattern,
+                    floating_patterns,
+                    excluded_letters,
+                    word_store,
+                    word_length,
+                    int(param_dict["limit"]),
+                )
+            ),
+        )
+
+    return sorted(
+        get_cached_candidate_words(
+            query_cache,
+            locked_pattern,
+            floating_patterns,
+            excluded_letters,
+            word_store,
+            word_length,
+            stats=stats,
+        )
+    )
+
+
+async def handle_wordler(param_dict: Dict[str, str]) -> Tuple[int, Any, QueryStats]:
+    """Answer a /wordler request, from the cache on the event loop if possible, otherwise on
+    the worker pool
+
+    Arguments:
+    param_dict: request parameters
+
+    Returns: tuple of HTTP status, JSON body and stats for the request
+    """
+    stats = QueryStats()
+    single_length = "," not in param_dict.get("length", "")
+    if single_length and "exists" not in param_dict and "limit" not in param_dict:
+        candidate_words = find_cached_candidate_words(
+            query_cache,
+            *read_patterns(param_dict),
+            word_store,
+            read_word_lengths(param_dict, WORD_LENGTH)[0],
+        )
+        if candidate_words is not None:
+            stats.cache_hit = True
+            return 200, sorted(candidate_words), stats
+
+    if pool.is_full():
+        pool.rejected += 1
+        return 503, {"error": "Too many requests queued, try again"}, stats
+
+    body = await pool.run(find_words, param_dict, stats, time.perf_counter())
+    return 200, body, stats
+
+
+def ready() -> Dict[str, Any]:
+    """Details of the dictionary, cache and worker pool for readiness checks
+
+    Returns: JSON body for /ready
+    """
+    return {
+        "ready": True,
+        "load_seconds": dictionary["load_seconds"],
+        "index_seconds": dictionary["index_seconds"],
+        "words": dictionary["words"],
+        "indexed_words": dictionary["indexed_words"],
+        "cache": query_cache.stats(),
+        "workers": pool.workers,
+        "pending": pool.pending,
+        "rejected": pool.rejected,
+    }
+
+
+async def app(scope: Scope, receive: Receive, send: Send):
+    """ASGI application
+
+    Arguments:
+    scope: details of the connection
+    receive: awaits the next event from the client
+    send: sends an event to the client
+    """
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                pool.shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    if scope["type"] != "http":
+        return
+
+    start = time.perf_counter()
+    headers: List[Tuple[bytes, bytes]] = [(b"content-type", b"application/json")]
+    try:
+        param_dict = read_query_parameters(scope.get("query_string", b""))
+        if scope["method"] not in ("GET", "HEAD"):
+            status, body = 405, {"error": f"Method {scope['method']} not allowed"}
+        elif scope["path"] == "/wordler":
+            status, body, stats = await handle_wordler(param_dict)
+            server_timing = stats.server_timing(time.perf_counter() - start)
+            headers.append((b"server-timing", server_timing.encode("latin-1")))
+        elif scope["path"] == "/ready":
+            status, body = 200, ready()
+        else:
+            status, body = 404, {"error": f"Unknown path {scope['path']}"}
+    except Exception as error:  # pylint: disable=broad-except
+        status, body = 500, {"error": "Bad parameters " + str(error)}
+
+    if status == 503:
+        headers.append((b"retry-after", b"1"))
+    encoded = json.dumps(body).encode("utf8")
+    headers.append((b"content-length", str(len(encoded)).encode("latin-1")))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send(
+        {
+            "type": "http.response.body",
+            "body": encoded if scope["method"] != "HEAD" else b"",
+        }
+    )
+
+
+async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Serve HTTP/1.1 requests on one connection, keeping it open between requests until the
+    client closes it, asks for it to be closed, or is idle for KEEP_ALIVE_SECONDS
+
+    Arguments:
+    reader: stream to read requests from
+    writer: stream to write responses to
+    """
+    try:
+        while True:
+            request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_SECONDS)
+            if not request_line.strip():
+                break
+            method, target, version = request_line.decode("latin-1").split()
+
+            request_headers: Dict[str, str] = {}
+            for _ in range(MAX_HEADERS):
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                request_headers[name.strip().lower()] = value.strip()
+            content_length = int(request_headers.get("content-length", 0))
+            if content_length > MAX_BODY_BYTES:
+                # the body isn't read, so the connection can't be used for another request
+                writer.write(
+                    b"HTTP/1.1 413 Content Too Large\r\n"
+                    b"content-length: 0\r\nconnection: close\r\n\r\n"
+                )
+                await writer.drain()
+                break
+            body = await reader.readexactly(content_length)
+
+            path, _, query_string = target.partition("?")
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": version.partition("/")[2],
+                "method": method.upper(),
+                "scheme": "http",
+                "path": unquote(path),
+                "raw_path": path.encode("latin-1"),
+                "query_string": query_string.encode("latin-1"),
+                "headers": [
+                    (name.encode("latin-1"), value.encode("latin-1"))
+                    for name, value in request_headers.items()
+                ],
+            }
+            response: Dict[str, Any] = {"status": 500, "headers": [], "body": b""}
+
+            async def receive() -> Dict[str, Any]:
+                return {"type": "http.request", "body": body, "more_body": False}
+
+            async def send(message: Dict[str, Any]):
+                if message["type"] == "http.response.start":
+                    response["status"] = message["status"]
+                    response["headers"] = message.get("headers", [])
+                else:
+                    response["body"] += message.get("body", b"")
+
+            await app(scope, receive, send)
+
+            connection = request_headers.get("connection", "").lower()
+            keep_alive = (
+                connection == "keep-alive"
+                if version == "HTTP/1.0"
+                else connection != "close"
+            )
+            lines = [
+                f"HTTP/1.1 {response['status']} {HTTPStatus(response['status']).phrase}"
+            ]
+            lines.extend(
+                f"{name.decode('latin-1')}: {value.decode('latin-1')}"
+                for name, value in response["headers"]
+            )
+            lines.append(f"connection: {'keep-alive' if keep_alive else 'close'}")
+            writer.write(
+                ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + response["body"]
+            )
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+        pass
+    except ValueError:
+        writer.write(b"HTTP/1.1 400 Bad Request\r\nconnection: close\r\n\r\n")
+    finally:
+        writer.close()
+
+
+async def serve(host: str, port: int, backlog: int = 1024):
+    """Serve the API until cancelled
+
+    Arguments:
+    host: address to listen on
+    port: port to listen on
+    backlog: connections the operating system queues before they're accepted
+    """
+    server = await asyncio.start_server(handle_connection, host, port, backlog=backlog)
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the wordler API with asyncio")
+    parser.add_argument("--host", default="0.0.0.0", help="address to listen on")
+    parser.add_argument("--port", type=int, default=5000, help="port to listen on")
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="worker threads matching words, sharing one core",
+    )
+    parser.add_argument(
+        "--max-pending",
+        type=int,
+        help="requests queued or running before further requests get 503",
+    )
+    args = parser.parse_args()
+
+    pool = WorkerPool(
+        args.workers, args.max_pending or args.workers * DEFAULT_QUEUED_PER_WORKER
+    )
+    print(f"Listening on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pool.shutdown()
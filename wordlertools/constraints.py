@@ -0,0 +1,428 @@
+"""
+Compiles locked, floating and excluded patterns into a single set of constraints, so that each
+candidate word can be checked exactly once instead of once per generated permutation
+"""
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyz"
+LETTER_BITS = {letter: 1 << i for i, letter in enumerate(ALPHABET)}
+
+
+class WordConstraints(NamedTuple):
+    """Compiled form of a locked pattern, floating patterns and excluded letters
+
+    word_length: length of the words the constraints apply to
+    allowed_letters: for each position, the set of letters that can appear there
+    required_letters: tuples of (letter, minimum count, positions that count towards it) for
+    letters known to be in the word, but not yet locked into place
+    rejected_patterns: floating patterns with more than one letter, as tuples of
+    (position, letter). A word matching every letter of one of these is rejected
+    excluded_mask: letter mask of letters that can't appear in any position
+    required_mask: letter mask of letters that must appear somewhere in the word
+    letter_counts: tuples of (letter, minimum count, maximum count) across the whole word, for
+    letters with a limit on the number of copies
+    """
+
+    word_length: int
+    allowed_letters: Tuple[FrozenSet[str], ...]
+    required_letters: Tuple[Tuple[str, int, Tuple[int, ...]], ...]
+    rejected_patterns: Tuple[Tuple[Tuple[int, str], ...], ...]
+    excluded_mask: int
+    required_mask: int
+    letter_counts: Tuple[Tuple[str, int, int], ...] = ()
+
+
+def letter_mask(letters: str) -> int:
+    """Encode the letters present in a string as a 26 bit mask, one bit per letter a-z
+
+    Characters outside a-z don't contribute to the mask.
+
+    Arguments:
+    letters: word or string of letters to encode
+
+    Return: integer with the bit for each letter present set
+    """
+    mask = 0
+    for letter in set(letters):
+        mask |= LETTER_BITS.get(letter, 0)
+    return mask
+
+
+def build_letter_masks(words: Iterable[str]) -> Dict[str, int]:
+    """Encode every word in a list as a letter mask, so it only has to be done once
+
+    Arguments:
+    words: words to be encoded
+
+    Return: dictionary of word against its letter mask
+    """
+    return {word: letter_mask(word) for word in words}
+
+
+def compile_constraints(
+    locked_pattern: Optional[str],
+    floating_patterns: Optional[Iterable[str]],
+    excluded_letters: Optional[str],
+    word_length: int,
+) -> WordConstraints:
+    """Build the constraints a word must meet from the patterns given for a query
+
+    Letters in floating patterns are required in the word the maximum number of times they appear
+    in any one pattern, on top of any locked instances. As with the permutation based processing,
+    if a locked letter has been excluded from every other position by the floating patterns, the
+    locked instance is assumed to be the only one.
+
+    An excluded letter that is also locked or floating isn't excluded from the word, but
+    limited to the copies already known, as when a guess with a repeated letter marks one copy
+    green or yellow and the other grey. The word must then hold exactly as many copies as the
+    locked and floating patterns require.
+
+    Arguments:
+    locked_pattern: string, known to be the right position in word e.g. '_p_l_' for apple
+    floating_patterns: set of strings with letters known to be in word, but not in that position
+    excluded_letters: string containing letters not in word
+    word_length: length of word to be matched
+
+    Return: compiled constraints for the query
+
+    Exception: if the locked or floating patterns don't match the word length, or more floating
+    letters are required than the word can hold
+    """
+    locked_pattern = (locked_pattern or "").lower()
+    excluded = set((excluded_letters or "").lower())
+    floaters = [
+        pattern.lower()
+        for pattern in (floating_patterns or ())
+        if pattern and pattern.replace("_", "")
+    ]
+
+    if locked_pattern and len(locked_pattern) != word_length:
+        raise Exception(
+            f"Locked letters provided '{locked_pattern}' ({len(locked_pattern)}) do not match the required pattern length of {word_length}"
+        )
+
+    for floater in floaters:
+        if len(floater) != word_length:
+            raise Exception(
+                f"Floating pattern length is not valid: {floater} ({len(floater)}) is different to expected length {word_length}"
+            )
+
+    locked = [
+        locked_pattern[i] if locked_pattern and locked_pattern[i] != "_" else None
+        for i in range(word_length)
+    ]
+    known = set(filter(None, locked)).union(*floaters) - {"_"}
+    limited = excluded & known
+    excluded -= limited
+    open_letters = frozenset(ALPHABET) - excluded
+    allowed: List[Set[str]] = [
+        {letter} - excluded if letter else set(open_letters) for letter in locked
+    ]
+    forbidden: List[Set[str]] = [set() for _ in range(word_length)]
+    rejected_patterns = []
+
+    for floater in floaters:
+        placed = tuple(
+            (i, character) for i, character in enumerate(floater) if character != "_"
+        )
+        for i, character in placed:
+            forbidden[i].add(character)
+        if len(placed) == 1:
+            allowed[placed[0][0]].discard(placed[0][1])
+        else:
+            for i, character in placed:
+                if locked[i] == character:
+                    allowed[i].clear()
+            rejected_patterns.append(placed)
+
+    required_letters = []
+    required_mask = letter_mask("".join(filter(None, locked)))
+    required_counts = _floating_letter_counts(floaters, locked)
+    if sum(required_counts.values()) > word_length:
+        raise Exception(
+            f"Floating patterns need {sum(required_counts.values())} letters, more than word length {word_length}"
+        )
+
+    for letter, count in sorted(required_counts.items()):
+        positions = tuple(
+            i
+            for i in range(word_length)
+            if locked[i] is None and letter not in forbidden[i]
+        )
+        required_letters.append((letter, count, positions))
+        required_mask |= LETTER_BITS.get(letter, 0)
+
+    letter_counts = []
+    for letter in sorted(limited):
+        exact = locked.count(letter) + required_counts.get(letter, 0)
+        if letter not in required_counts:
+            # every copy is locked, so the letter can't appear in any other position
+            for i, letters in enumerate(allowed):
+                if locked[i] != letter:
+                    letters.discard(letter)
+        letter_counts.append((letter, exact, exact))
+
+    allowed_anywhere = letter_mask("".join("".join(letters) for letters in allowed))
+
+    return WordConstraints(
+        word_length,
+        tuple(frozenset(letters) for letters in allowed),
+        tuple(required_letters),
+        tuple(rejected_patterns),
+        letter_mask(ALPHABET) & ~allowed_anywhere,
+        required_mask,
+        tuple(letter_counts),
+    )
+
+
+def _floating_letter_counts(
+    floaters: List[str], locked: List[Optional[str]]
+) -> Dict[str, int]:
+    """Count how many instances of each floating letter must be found outside locked positions
+
+    Arguments:
+    floaters: floating patterns, already validated against the word length
+    locked: locked letter for each position, or None where not locked
+
+    Return: dictionary of letter against the number of times it must be placed
+    """
+    counts: Dict[str, int] = {}
+    for floater in floaters:
+        for letter in set(floater.replace("_", "")):
+            counts[letter] = max(counts.get(letter, 0), floater.count(letter))
+
+    # a locked letter floated into every other position can't appear anywhere else
+    for letter in set(filter(None, locked)):
+        if letter not in counts:
+            continue
+        covered = {i for i, character in enumerate(locked) if character == letter}
+        for floater in floaters:
+            covered.update(i for i, character in enumerate(floater) if character == letter)
+        if len(covered) == len(locked):
+            del counts[letter]
+
+    return counts
+
+
+def known_letters_to_patterns(
+    locked: Sequence[str],
+    least: Dict[str, int],
+    not_at: Dict[str, Set[int]],
+    greyed: Set[str],
+    word_length: int,
+) -> Tuple[str, Set[str], str]:
+    """Build patterns for get_candidate_words from what's known about each letter after any
+    number of guesses
+
+    Copies of a letter still needed beyond those locked become floating patterns, one for each
+    position the letter is known not to be in, plus one with several copies of the letter when
+    more than one is needed. Floating letters are counted on top of locked ones, so once every
+    copy needed is locked the positions a letter isn't in are left out rather than asking for
+    an extra copy. A greyed letter that is also known to be in the word is limited to exactly
+    the copies the patterns require, as long as the patterns require every copy known.
+
+    Arguments:
+    locked: letter locked into each position, '_' where nothing is locked
+    least: for each letter known to be in the word, the most copies marked in any one guess
+    not_at: for each letter, the positions it's known not to be in
+    greyed: letters marked as not in the word in any guess
+    word_length: length of the words
+
+    Return: tuple of locked pattern, set of floating patterns and excluded letters
+    """
+    floating_patterns = set()
+    limited = set()
+    for letter, count in least.items():
+        extra = count - list(locked).count(letter)
+        positions = sorted(i for i in not_at.get(letter, ()) if locked[i] != letter)
+        if extra <= 0:
+            limited.add(letter)
+            continue
+        if not positions:
+            continue
+        if len(positions) >= extra:
+            limited.add(letter)
+        for i in positions:
+            floating_patterns.add("_" * i + letter + "_" * (word_length - i - 1))
+        if extra > 1:
+            pattern = ["_"] * word_length
+            for i in positions[:extra]:
+                pattern[i] = letter
+            floating_patterns.add("".join(pattern))
+
+    excluded = "".join(sorted(greyed - (set(least) - limited)))
+    return "".join(locked), floating_patterns, excluded
+
+
+class Query:
+    """Locked pattern, floating patterns and excluded letters for one word length, validated
+    and compiled once, so the query can be run any number of times by any engine without
+    parsing the patterns again
+
+    Queries are equal, and hash the same, when they compile to the same constraints, so can be
+    used as cache keys however the patterns were written.
+
+    locked_pattern: lower case locked pattern, empty if there isn't one
+    floating_patterns: lower case floating patterns, without empty patterns
+    excluded_letters: lower case excluded letters
+    word_length: length of the words the query applies to
+    constraints: the compiled constraints
+    letter_counts: tuples of (letter, minimum count, maximum count) across the whole word, for
+    letters with a limit on the number of copies
+    permutation_patterns: patterns generated by the permutation engine, filled in the first
+    time the query is run with it
+    """
+
+    __slots__ = (
+        "locked_pattern",
+        "floating_patterns",
+        "excluded_letters",
+        "word_length",
+        "constraints",
+        "letter_counts",
+        "permutation_patterns",
+    )
+
+    def __init__(
+        self,
+        locked_pattern: Optional[str],
+        floating_patterns: Optional[Iterable[str]],
+        excluded_letters: Optional[str],
+        word_length: int,
+    ):
+        self.locked_pattern = (locked_pattern or "").lower()
+        self.floating_patterns = frozenset(
+            pattern.lower() for pattern in (floating_patterns or ()) if pattern
+        )
+        self.excluded_letters = (excluded_letters or "").lower()
+        self.word_length = word_length
+        self.constraints = compile_constraints(
+            self.locked_pattern,
+            self.floating_patterns,
+            self.excluded_letters,
+            word_length,
+        )
+        self.letter_counts = self.constraints.letter_counts
+        self.permutation_patterns: Optional[FrozenSet[str]] = None
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Query):
+            return NotImplemented
+        return self.constraints == other.constraints
+
+    def __hash__(self) -> int:
+        return hash(self.constraints)
+
+    def __repr__(self) -> str:
+        return (
+            f"Query({self.locked_pattern!r}, {sorted(self.floating_patterns)!r}, "
+            f"{self.excluded_letters!r}, {self.word_length})"
+        )
+
+    def matches(self, word: str) -> bool:
+        """Check a single word against the query
+
+        Arguments:
+        word: the word to be validated
+
+        Return: True if word is a match, otherwise False
+        """
+        return word_matches_constraints(self.constraints, word)
+
+
+def as_query(
+    locked_pattern: Union[str, Query, None],
+    floating_patterns: Optional[Iterable[str]],
+    excluded_letters: Optional[str],
+    word_length: int,
+) -> Query:
+    """Get the query for patterns, or the query itself if one has already been built
+
+    Arguments:
+    locked_pattern: locked pattern, or a Query, in which case the floating patterns and
+    excluded letters are ignored
+    floating_patterns: set of strings with letters known to be in word, but not in that position
+    excluded_letters: string containing letters not in word
+    word_length: length of word to be matched
+
+    Return: query for the patterns
+
+    Exception: if the patterns aren't valid, or a query built for a different word length
+    is given
+    """
+    if isinstance(locked_pattern, Query):
+        if locked_pattern.word_length != word_length:
+            raise Exception(
+                f"Query is for word length {locked_pattern.word_length}, not {word_length}"
+            )
+        return locked_pattern
+    return Query(locked_pattern, floating_patterns, excluded_letters, word_length)
+
+
+def word_matches_constraints(
+    constraints: WordConstraints, word: str, word_mask: Optional[int] = None
+) -> bool:
+    """Check a single word against compiled constraints
+
+    Arguments:
+    constraints: constraints compiled for the query
+    word: the word to be validated
+    word_mask: precomputed letter mask for the word. If given, words with excluded letters
+    or missing required letters are rejected without checking each position
+
+    Return: True if word is a match, otherwise False
+    """
+    if len(word) != constraints.word_length:
+        return False
+    if word_mask is not None and (
+        word_mask & constraints.excluded_mask
+        or word_mask & constraints.required_mask != constraints.required_mask
+    ):
+        return False
+    for letter, allowed in zip(word, constraints.allowed_letters):
+        if letter not in allowed:
+            return False
+    for letter, count, positions in constraints.required_letters:
+        if sum(1 for i in positions if word[i] == letter) < count:
+            return False
+    for pattern in constraints.rejected_patterns:
+        if all(word[i] == letter for i, letter in pattern):
+            return False
+    for letter, minimum, maximum in constraints.letter_counts:
+        if not minimum <= word.count(letter) <= maximum:
+            return False
+    return True
+
+
+def filter_words(
+    constraints: WordConstraints,
+    words: Iterable[str],
+    word_masks: Optional[Dict[str, int]] = None,
+) -> Set[str]:
+    """Return the words meeting the constraints, checking each word once
+
+    Arguments:
+    constraints: constraints compiled for the query
+    words: words to be filtered
+    word_masks: precomputed letter masks for the words, from build_letter_masks
+
+    Return: set of words that match
+    """
+    if word_masks is None:
+        return {word for word in words if word_matches_constraints(constraints, word)}
+    return {
+        word
+        for word in words
+        if word_matches_constraints(constraints, word, word_masks[word])
+    }
@@ -0,0 +1,148 @@
+"""
+Background process holding the dictionary and indexes in memory, answering queries over a local
+Unix socket so repeated command line queries don't each load everything again
+
+Each request is one line of JSON with a 'command', answered with one line of JSON holding 'ok'
+and either the 'result' or an 'error'. The 'ping' and 'stop' commands are answered here, and any
+other command is passed to the handler the daemon was started with.
+"""
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Optional
+
+DEFAULT_TIMEOUT = 30.0
+MAX_REQUEST_BYTES = 1 << 20
+
+Handler = Callable[[Dict[str, Any]], Any]
+
+
+def default_socket_path() -> str:
+    """Get the socket the daemon listens on, unless another is given
+
+    Return: path from the WORDLER_SOCKET environment variable if set, otherwise a socket in the
+    temporary directory for the current user
+    """
+    if os.environ.get("WORDLER_SOCKET"):
+        return os.environ["WORDLER_SOCKET"]
+    user = os.getuid() if hasattr(os, "getuid") else "user"
+    return os.path.join(tempfile.gettempdir(), f"wordler-{user}.sock")
+
+
+def is_supported() -> bool:
+    """Check if Unix sockets are available on this platform
+
+    Return: True if the daemon can run, otherwise False
+    """
+    return hasattr(socket, "AF_UNIX")
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Answer each line of JSON on a connection with a line of JSON"""
+
+    def handle(self):
+        for line in iter(lambda: self.rfile.readline(MAX_REQUEST_BYTES), b""):
+            stopping = False
+            try:
+                request = json.loads(line)
+                command = request.get("command")
+                if command == "ping":
+                    result: Any = "pong"
+                elif command == "stop":
+                    result = "stopping"
+                    stopping = True
+                else:
+                    result = self.server.query_handler(request)
+                response = {"ok": True, "result": result}
+            except Exception as error:  # pylint: disable=broad-except
+                response = {"ok": False, "error": str(error)}
+            self.wfile.write(json.dumps(response).encode("utf8") + b"\n")
+            self.wfile.flush()
+            if stopping:
+                # shutdown waits for serve_forever to return, so can't run on its thread
+                threading.Thread(target=self.server.shutdown).start()
+                return
+
+
+class _DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server, answering each connection on its own thread"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, query_handler: Handler):
+        self.query_handler = query_handler
+        super().__init__(socket_path, _RequestHandler)
+
+
+def serve(query_handler: Handler, socket_path: Optional[str] = None):
+    """Answer queries on a Unix socket until a 'stop' command, or the process is interrupted
+
+    A socket file left behind by a daemon that didn't shut down cleanly is replaced, but an
+    error is raised if another daemon is still answering on it.
+
+    Arguments:
+    query_handler: answers every command other than 'ping' and 'stop', given the decoded
+    request and returning a result that can be encoded as JSON. Exceptions raised are sent
+    back as errors
+    socket_path: socket to listen on, defaulting to default_socket_path()
+    """
+    if not is_supported():
+        raise Exception("Unix sockets are not available on this platform")
+    socket_path = socket_path or default_socket_path()
+
+    if os.path.exists(socket_path):
+        if send_request({"command": "ping"}, socket_path) is not None:
+            raise Exception(f"A daemon is already listening on '{socket_path}'")
+        os.unlink(socket_path)
+
+    server = _DaemonServer(socket_path, query_handler)
+    try:
+        os.chmod(socket_path, 0o600)
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+def send_request(
+    request: Dict[str, Any],
+    socket_path: Optional[str] = None,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> Optional[Any]:
+    """Send a request to the daemon, if one is running
+
+    Arguments:
+    request: request with a 'command', and any parameters the command takes
+    socket_path: socket the daemon listens on, defaulting to default_socket_path()
+    timeout: seconds to wait for the answer
+
+    Return: the result from the daemon, or None if no daemon is listening, or it can't be
+    reached or doesn't answer in time, so the caller can answer the request itself
+
+    Exception: if the daemon reports an error for the request
+    """
+    if not is_supported():
+        return None
+    socket_path = socket_path or default_socket_path()
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(timeout)
+            client.connect(socket_path)
+            client.sendall(json.dumps(request).encode("utf8") + b"\n")
+            with client.makefile("rb") as answer:
+                line = answer.readline()
+    except OSError:
+        return None
+
+    try:
+        response = json.loads(line)
+    except ValueError:
+        return None
+    if not response["ok"]:
+        raise Exception(response["error"])
+    return response["result"]
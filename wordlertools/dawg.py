@@ -0,0 +1,412 @@
+"""
+Dictionary held as a minimised DAWG (directed acyclic word graph), where words sharing a prefix
+share the path for it and words sharing a suffix share the nodes for it. The graph is packed into
+flat arrays, so it takes a small fraction of the memory of a set of strings, and can be written
+to a file once and then opened with mmap, sharing its pages between processes.
+
+Each node records which suffix lengths can be reached from it, so a query for words of one
+length only walks branches holding words of that length. Queries also only follow edges for
+letters allowed in that position, cutting off locked and excluded letters as early as possible.
+"""
+from array import array
+import argparse
+from itertools import count
+import mmap
+import os
+import struct
+import sys
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+from wordlertools.constraints import WordConstraints
+
+MAGIC = b"WORDAWG1"
+HEADER = struct.Struct("<8sIII4x")
+DAWG_SUFFIX = ".dawg"
+
+# suffix lengths are held as bits of a 64 bit mask
+MAX_WORD_LENGTH = 63
+
+_dawg_versions = count(1)
+
+
+class Dawg:
+    """Read only minimised DAWG over a set of words
+
+    Nodes are numbered from the root at 0. The edges leaving node n are those from
+    node_edges[n] up to node_edges[n + 1], sorted by letter, with the letter of each edge in
+    labels and the node it leads to in targets. Bit k of node_masks[n] is set when a word ends
+    k letters below node n, so bit 0 marks the end of a word.
+    """
+
+    def __init__(
+        self,
+        node_edges: Sequence[int],
+        node_masks: Sequence[int],
+        labels: Sequence[int],
+        targets: Sequence[int],
+        word_count: int,
+    ):
+        self.node_edges = node_edges
+        self.node_masks = node_masks
+        self.labels = labels
+        self.targets = targets
+        self.word_count = word_count
+        self.version = ("dawg", next(_dawg_versions))
+
+    def __len__(self) -> int:
+        return self.word_count
+
+    def __iter__(self) -> Iterator[str]:
+        for length in self.lengths():
+            yield from self.words_of_length(length)
+
+    def __contains__(self, word: object) -> bool:
+        if not isinstance(word, str):
+            return False
+        node = 0
+        for letter in word.encode("ascii", "replace"):
+            node = self._child(node, letter)
+            if node is None:
+                return False
+        return bool(self.node_masks[node] & 1)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes taken by the packed arrays"""
+        return sum(
+            len(values) * values.itemsize
+            for values in (self.node_edges, self.node_masks, self.labels, self.targets)
+        )
+
+    def lengths(self) -> Tuple[int, ...]:
+        """Get the word lengths held
+
+        Return: sorted tuple of the lengths of the words
+        """
+        mask = self.node_masks[0] if self.node_masks else 0
+        return tuple(
+            length for length in range(mask.bit_length()) if mask >> length & 1
+        )
+
+    def words_of_length(self, length: int) -> Iterator[str]:
+        """Yield the words of one length, in sorted order
+
+        Arguments:
+        length: length of words to return
+
+        Return: iterator over the words
+        """
+        return self._walk(length, None, (), (), ())
+
+    def query(self, constraints: WordConstraints) -> Set[str]:
+        """Find the words meeting compiled constraints
+
+        Arguments:
+        constraints: constraints compiled for the query
+
+        Return: set of words that match
+        """
+        return set(self.iter_query(constraints))
+
+    def iter_query(self, constraints: WordConstraints) -> Iterator[str]:
+        """Yield the words meeting compiled constraints one at a time, in sorted order
+
+        Arguments:
+        constraints: constraints compiled for the query
+
+        Return: iterator over words that match
+        """
+        allowed = [
+            frozenset(letter.encode("ascii")[0] for letter in letters)
+            for letters in constraints.allowed_letters
+        ]
+        return self._walk(
+            constraints.word_length,
+            allowed,
+            constraints.required_letters,
+            constraints.rejected_patterns,
+            constraints.letter_counts,
+        )
+
+    def _child(self, node: int, letter: int) -> Optional[int]:
+        """Follow the edge for a letter from a node
+
+        Arguments:
+        node: node to start from
+        letter: byte value of the letter
+
+        Return: node the edge leads to, or None if there's no edge for the letter
+        """
+        for edge in range(self.node_edges[node], self.node_edges[node + 1]):
+            if self.labels[edge] == letter:
+                return self.targets[edge]
+        return None
+
+    def _walk(
+        self,
+        word_length: int,
+        allowed: Optional[List[frozenset]],
+        required_letters: Tuple[Tuple[str, int, Tuple[int, ...]], ...],
+        rejected_patterns: Tuple[Tuple[Tuple[int, str], ...], ...],
+        letter_counts: Tuple[Tuple[str, int, int], ...],
+    ) -> Iterator[str]:
+        """Depth first walk of the paths spelling words of one length
+
+        An edge is only followed if its letter is allowed in that position, a word of the
+        right length ends somewhere below it, every required letter can still be placed
+        as many times as needed in the positions left, and the letter hasn't already been used
+        as many times as it can be.
+
+        Arguments:
+        word_length: length of words to find
+        allowed: for each position, byte values of the letters allowed there, or None to
+        allow any letter
+        required_letters: (letter, minimum count, positions counting towards it) from
+        WordConstraints
+        rejected_patterns: patterns from WordConstraints, any word matching one is skipped
+        letter_counts: (letter, minimum count, maximum count) from WordConstraints. Only the
+        maximum is checked, as the allowed and required letters already place the minimum
+
+        Return: iterator over the words found, in sorted order
+        """
+        if not 0 < word_length <= MAX_WORD_LENGTH or not self.node_masks:
+            return
+        if not self.node_masks[0] >> word_length & 1:
+            return
+
+        node_edges = self.node_edges
+        node_masks = self.node_masks
+        labels = self.labels
+        targets = self.targets
+
+        required = [
+            (
+                letter.encode("ascii")[0],
+                frozenset(positions),
+                # number of positions from each depth onwards that count towards the letter
+                [
+                    sum(1 for i in positions if i >= depth)
+                    for depth in range(word_length + 1)
+                ],
+            )
+            for letter, _, positions in required_letters
+        ]
+        needed = tuple(minimum for _, minimum, _ in required_letters)
+        limits = {
+            letter.encode("ascii")[0]: maximum for letter, _, maximum in letter_counts
+        }
+
+        # (node, depth, prefix, copies of each required letter still needed)
+        stack = [(0, 0, "", needed)]
+        while stack:
+            node, depth, prefix, needed = stack.pop()
+            if depth == word_length:
+                if all(
+                    any(prefix[i] != letter for i, letter in pattern)
+                    for pattern in rejected_patterns
+                ):
+                    yield prefix
+                continue
+
+            letters = allowed[depth] if allowed is not None else None
+            length_bit = word_length - depth - 1
+            children = []
+            for edge in range(node_edges[node], node_edges[node + 1]):
+                letter = labels[edge]
+                if letters is not None and letter not in letters:
+                    continue
+                target = targets[edge]
+                if not node_masks[target] >> length_bit & 1:
+                    continue
+                if letter in limits and prefix.count(chr(letter)) >= limits[letter]:
+                    continue
+                if required:
+                    still_needed = tuple(
+                        remaining - (letter == code and depth in positions)
+                        for remaining, (code, positions, _) in zip(needed, required)
+                    )
+                    if any(
+                        remaining > positions_left[depth + 1]
+                        for remaining, (_, _, positions_left) in zip(
+                            still_needed, required
+                        )
+                    ):
+                        continue
+                else:
+                    still_needed = needed
+                children.append((target, depth + 1, prefix + chr(letter), still_needed))
+            # pushed in reverse so the first letter is walked first
+            stack.extend(reversed(children))
+
+
+def build_dawg(words: Iterable[str]) -> Dawg:
+    """Build a minimised DAWG from words
+
+    Words are added in sorted order. Once a word has been added, the nodes for the part of
+    the previous word it doesn't share can't change again, so each is merged with an
+    identical node already built if there is one, keeping the graph minimal as it grows.
+
+    Arguments:
+    words: words to hold, in any order. Only ASCII words up to MAX_WORD_LENGTH letters long
+    are supported
+
+    Return: the packed graph
+
+    Exception: if a word is too long, or isn't ASCII
+    """
+    # node being built: [final, {letter: child}]
+    nodes: List[Optional[list]] = [[False, {}]]
+    register: Dict[tuple, int] = {}
+    unchecked: List[Tuple[int, int, int]] = []
+    previous = b""
+    word_count = 0
+
+    def minimise(down_to: int):
+        while len(unchecked) > down_to:
+            parent, letter, child = unchecked.pop()
+            final, edges = nodes[child]
+            signature = (final, tuple(edges.items()))
+            if signature in register:
+                nodes[parent][1][letter] = register[signature]
+                nodes[child] = None
+            else:
+                register[signature] = child
+
+    for word in sorted(set(words)):
+        if len(word) > MAX_WORD_LENGTH:
+            raise Exception(
+                f"'{word}' is longer than the maximum word length of {MAX_WORD_LENGTH}"
+            )
+        encoded = word.encode("ascii")
+        common = 0
+        for old, new in zip(previous, encoded):
+            if old != new:
+                break
+            common += 1
+        minimise(common)
+
+        node = unchecked[-1][2] if unchecked else 0
+        for letter in encoded[common:]:
+            nodes.append([False, {}])
+            child = len(nodes) - 1
+            nodes[node][1][letter] = child
+            unchecked.append((node, letter, child))
+            node = child
+        nodes[node][0] = True
+        previous = encoded
+        word_count += 1
+    minimise(0)
+
+    # registered nodes come after all of their children, so masks are built in that order
+    built = list(register.values())
+    masks: Dict[int, int] = {}
+    for node in built + [0]:
+        final, edges = nodes[node]
+        mask = int(final)
+        for child in edges.values():
+            mask |= masks[child] << 1
+        masks[node] = mask
+
+    # number the root first, then parents ahead of their children
+    ids = {node: i for i, node in enumerate([0] + built[::-1])}
+    node_edges = array("I", [0])
+    node_masks = array("Q")
+    labels = array("B")
+    targets = array("I")
+    for node in ids:
+        _, edges = nodes[node]
+        for letter in sorted(edges):
+            labels.append(letter)
+            targets.append(ids[edges[letter]])
+        node_edges.append(len(labels))
+        node_masks.append(masks[node])
+
+    return Dawg(node_edges, node_masks, labels, targets, word_count)
+
+
+def dawg_path_for(filename: str) -> str:
+    """Get the path of the DAWG compiled from a text word list
+
+    Arguments:
+    filename: the text file containing words
+
+    Return: path for the DAWG, next to the text file
+    """
+    return os.path.splitext(filename)[0] + DAWG_SUFFIX
+
+
+def compile_dawg(words: Iterable[str], dawg_path: str):
+    """Build a DAWG from words and write it out
+
+    The file holds a header with the node, edge and word counts, padded to 8 bytes, then the
+    arrays, each as
+    little endian values: 64 bit node masks, 32 bit first edge of each node, 32 bit edge
+    targets and 8 bit edge letters.
+
+    Arguments:
+    words: words to hold
+    dawg_path: file to write the DAWG to
+    """
+    dawg = build_dawg(words)
+    with open(dawg_path, "wb") as dawg_file:
+        dawg_file.write(
+            HEADER.pack(MAGIC, len(dawg.node_masks), len(dawg.labels), len(dawg))
+        )
+        for values in (dawg.node_masks, dawg.node_edges, dawg.targets, dawg.labels):
+            if sys.byteorder != "little":
+                values = array(values.typecode, values)
+                values.byteswap()
+            dawg_file.write(values.tobytes())
+
+
+def load_dawg(dawg_path: str) -> Dawg:
+    """Open a DAWG file without copying its arrays out of the file
+
+    Arguments:
+    dawg_path: file written by compile_dawg
+
+    Return: DAWG backed by the memory mapped file
+
+    Exception: if the file isn't a DAWG
+    """
+    with open(dawg_path, "rb") as dawg_file:
+        buffer = mmap.mmap(dawg_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, node_count, edge_count, word_count = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise Exception(f"'{dawg_path}' is not a DAWG")
+
+    view = memoryview(buffer)
+    offset = HEADER.size
+    arrays = []
+    for typecode, length in (
+        ("Q", node_count),
+        ("I", node_count + 1),
+        ("I", edge_count),
+        ("B", edge_count),
+    ):
+        size = struct.calcsize(typecode) * length
+        values: Sequence[int] = view[offset : offset + size].cast(typecode)
+        if sys.byteorder != "little":
+            values = array(typecode, values.tobytes())
+            values.byteswap()
+        arrays.append(values)
+        offset += size
+
+    node_masks, node_edges, targets, labels = arrays
+    return Dawg(node_edges, node_masks, labels, targets, word_count)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compile a text word list into a minimised DAWG"
+    )
+    parser.add_argument(
+        "filename", nargs="?", default="./data/words_alpha.txt", help="word list"
+    )
+    parser.add_argument("-o", "--output", help="DAWG file to write")
+    args = parser.parse_args()
+
+    output = args.output or dawg_path_for(args.filename)
+    with open(args.filename, "r", encoding="utf8") as word_file:
+        compile_dawg(word_file.read().split(), output)
+    print(f"Wrote {output}")
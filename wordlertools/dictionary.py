@@ -0,0 +1,130 @@
+"""
+Loads word lists, and the feedback matrices built from them, once for the life of the process
+"""
+import time
+from typing import Any, Dict, List, Mapping, Optional, Set
+from wordlertools.feedback_matrix import (
+    FeedbackMatrix,
+    feedback_matrix_path_for,
+    load_feedback_matrix,
+)
+from wordlertools.options import DEFAULT_WORD_LENGTH
+from wordlertools.snapshot import is_snapshot_current, load_snapshot, snapshot_path_for
+from wordlertools.word_store import WordStore
+
+loaded_word_stores: Dict[str, WordStore] = {}
+loaded_feedback_matrices: Dict[str, Optional[FeedbackMatrix]] = {}
+
+
+def load_words(filename: str) -> Set[str]:
+    """Load words from file
+
+    File format should be one word per line
+
+    Arguments:
+    filename: the file containing words to load
+
+    Return: list of words
+    """
+    with open(filename, "r", encoding="utf8") as word_file:
+        valid_words = set(word_file.read().split())
+
+    return valid_words
+
+
+def load_word_store(filename: str) -> WordStore:
+    """Load words from file into a store, bucketed by word length
+
+    If a snapshot has been compiled from the file with `python3 -m wordlertools.snapshot`, and
+    is up to date, it's memory mapped instead of parsing the text file.
+
+    Arguments:
+    filename: the file containing words to load, one word per line
+
+    Return: store of words
+    """
+    snapshot_path = snapshot_path_for(filename)
+    if is_snapshot_current(filename, snapshot_path):
+        return load_snapshot(snapshot_path)
+
+    with open(filename, "r", encoding="utf8") as word_file:
+        return WordStore(word_file.read().split())
+
+
+def load_dictionary(filename: str, word_length: int) -> Dict[str, Any]:
+    """Load the dictionary once for the whole process, indexing the word length being solved for
+    and counting its letters
+
+    The store is never modified after loading, so it's shared by every request and thread.
+
+    Arguments:
+    filename: the file containing words to load
+    word_length: length of words to build the index for up front
+
+    Returns: dictionary with the word store, and details of the load for readiness checks
+    """
+    start = time.perf_counter()
+    store = load_word_store(filename)
+    load_seconds = time.perf_counter() - start
+    _ = store.bucket(word_length).index
+    _ = store.bucket(word_length).letter_counts
+    return {
+        "store": store,
+        "load_seconds": load_seconds,
+        "index_seconds": time.perf_counter() - start - load_seconds,
+        "words": len(store),
+        "indexed_words": len(store.bucket(word_length)),
+    }
+
+
+def read_word_lengths(
+    param_dict: Mapping[str, Any], default_length: int = DEFAULT_WORD_LENGTH
+) -> List[int]:
+    """Read the word lengths asked for from request parameters
+
+    Arguments:
+    param_dict: request parameters, with an optional comma separated list of lengths as length
+    default_length: the word length if none are given
+
+    Returns: sorted list of word lengths, just default_length if none were given
+
+    Exception: if a length isn't a whole number of at least 1
+    """
+    if not param_dict.get("length"):
+        return [default_length]
+    lengths = sorted({int(length) for length in str(param_dict["length"]).split(",")})
+    if lengths[0] < 1:
+        raise Exception("Word lengths must be at least 1")
+    return lengths
+
+
+def get_word_store(filename: str) -> WordStore:
+    """Get the store for a words file, loading it the first time it's asked for
+
+    Arguments:
+    filename: the file containing words to load, one word per line
+
+    Return: store of words
+    """
+    if filename not in loaded_word_stores:
+        loaded_word_stores[filename] = load_word_store(filename)
+    return loaded_word_stores[filename]
+
+
+def get_feedback_matrix(filename: str) -> Optional[FeedbackMatrix]:
+    """Get the feedback matrix built from a words file with `python3 -m
+    wordlertools.feedback_matrix`, opening it the first time it's asked for
+
+    Arguments:
+    filename: the file containing words the matrix was built from
+
+    Return: the matrix, or None if it hasn't been built or is older than the words file
+    """
+    if filename not in loaded_feedback_matrices:
+        matrix_path = feedback_matrix_path_for(filename)
+        loaded_feedback_matrices[filename] = (
+            load_feedback_matrix(matrix_path)
+            if is_snapshot_current(filename, matrix_path)
+            else None
+        )
+    return loaded_feedback_matrices[filename]
@@ -0,0 +1,186 @@
+"""
+Feedback for every guess against every answer of one word length, computed once by a build
+step and then opened with mmap. Lookups read a single code in place, and worker processes
+opening the same file share its pages rather than each holding a copy.
+"""
+import argparse
+import mmap
+import os
+import struct
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Sequence
+from wordlertools.numpy_backend import NumpyBucket, is_available, load_numpy
+from wordlertools.snapshot import PackedWords
+from wordlertools.solver import code_dtype, code_size, feedback_code, feedback_codes
+from wordlertools.word_store import WordStore
+
+if TYPE_CHECKING:
+    import numpy as np
+
+MAGIC = b"WORDLFB1"
+HEADER = struct.Struct("<8sIIIQ")
+FEEDBACK_SUFFIX = ".feedback"
+
+
+class FeedbackMatrix:
+    """Memory mapped matrix of feedback codes, one row per guess and one column per answer,
+    over the same words in both directions
+    """
+
+    def __init__(
+        self, buffer: mmap.mmap, word_length: int, word_count: int, matrix_offset: int
+    ):
+        self._buffer = buffer
+        self.word_length = word_length
+        self.code_size = code_size(word_length)
+        self.matrix_offset = matrix_offset
+        self.words: Sequence[str] = PackedWords(
+            buffer, HEADER.size, word_length, word_count
+        )
+        self.word_ids: Dict[str, int] = {word: i for i, word in enumerate(self.words)}
+        self._array: Optional["np.ndarray"] = None
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __contains__(self, word: object) -> bool:
+        return word in self.word_ids
+
+    def covers(self, words: Iterable[str]) -> bool:
+        """Check every word has a row and column in the matrix
+
+        Arguments:
+        words: words to look for
+
+        Return: True if every word is in the matrix, otherwise False
+        """
+        return self.word_ids.keys() >= set(words)
+
+    def code(self, guess: str, answer: str) -> int:
+        """Look up the feedback for a guess if the word is the answer
+
+        Arguments:
+        guess: word guessed
+        answer: word being guessed
+
+        Return: feedback encoded as base 3 digits, as from solver.feedback_code
+        """
+        start = (
+            self.matrix_offset
+            + (self.word_ids[guess] * len(self.words) + self.word_ids[answer])
+            * self.code_size
+        )
+        return int.from_bytes(self._buffer[start : start + self.code_size], "little")
+
+    @property
+    def array(self) -> "np.ndarray":
+        """The matrix as a read only numpy array over the mapped file, without copying it"""
+        if self._array is None:
+            if not is_available():
+                raise Exception(
+                    "numpy must be installed to read the matrix as an array"
+                )
+            self._array = (
+                load_numpy()
+                .frombuffer(
+                    self._buffer,
+                    dtype=code_dtype(self.word_length),
+                    count=len(self.words) ** 2,
+                    offset=self.matrix_offset,
+                )
+                .reshape(len(self.words), len(self.words))
+            )
+        return self._array
+
+
+def feedback_matrix_path_for(filename: str) -> str:
+    """Get the path of the feedback matrix built from a text word list
+
+    Arguments:
+    filename: the text file containing words
+
+    Return: path for the matrix, next to the text file
+    """
+    return os.path.splitext(filename)[0] + FEEDBACK_SUFFIX
+
+
+def compile_feedback_matrix(
+    words: Sequence[str], word_length: int, matrix_path: str, chunk_size: int = 256
+):
+    """Compute the feedback for every pair of words and write it out as a matrix
+
+    The file holds a header, the words packed at a fixed width, then one little endian code
+    per (guess, answer) pair, a row at a time. Rows are computed and written a chunk of
+    guesses at a time, so the whole matrix is never held in memory.
+
+    Arguments:
+    words: words of one length, used as both guesses and answers
+    word_length: length of the words
+    matrix_path: file to write the matrix to
+    chunk_size: number of guesses to compute feedback for at once
+    """
+    words = [word for word in words if len(word) == word_length]
+    size = code_size(word_length)
+    packed = "".join(words).encode("ascii")
+
+    with open(matrix_path, "wb") as matrix_file:
+        matrix_file.write(
+            HEADER.pack(MAGIC, word_length, len(words), size, HEADER.size + len(packed))
+        )
+        matrix_file.write(packed)
+
+        if not is_available():
+            for guess in words:
+                matrix_file.write(
+                    b"".join(
+                        feedback_code(guess, answer).to_bytes(size, "little")
+                        for answer in words
+                    )
+                )
+            return
+
+        answers = NumpyBucket(words, word_length)
+        for start in range(0, len(words), chunk_size):
+            codes = feedback_codes(answers.letters[start : start + chunk_size], answers)
+            matrix_file.write(codes.tobytes())
+
+
+def load_feedback_matrix(matrix_path: str) -> FeedbackMatrix:
+    """Open a feedback matrix without reading it into memory
+
+    Arguments:
+    matrix_path: file written by compile_feedback_matrix
+
+    Return: matrix backed by the memory mapped file
+
+    Exception: if the file isn't a feedback matrix
+    """
+    with open(matrix_path, "rb") as matrix_file:
+        buffer = mmap.mmap(matrix_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, word_length, word_count, size, matrix_offset = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC or size != code_size(word_length):
+        raise Exception(f"'{matrix_path}' is not a feedback matrix")
+
+    return FeedbackMatrix(buffer, word_length, word_count, matrix_offset)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build the feedback for every pair of words of one length"
+    )
+    parser.add_argument(
+        "filename", nargs="?", default="./data/words_alpha.txt", help="word list"
+    )
+    parser.add_argument("-o", "--output", help="matrix file to write")
+    parser.add_argument(
+        "-w", "--word_length", type=int, default=5, help="length of words"
+    )
+    args = parser.parse_args()
+
+    output = args.output or feedback_matrix_path_for(args.filename)
+    with open(args.filename, "r", encoding="utf8") as word_file:
+        store = WordStore(word_file.read().split())
+    compile_feedback_matrix(
+        store.bucket(args.word_length).words, args.word_length, output
+    )
+    print(f"Wrote {output}")
@@ -0,0 +1,155 @@
+"""
+Letter frequency tables for a set of candidate words, by position, overall and by the number
+of words containing each letter
+
+Each word is given a count vector, packed into a single integer with a fixed width field for
+every (position, letter) pair and for every letter the word contains. Fields are wide enough
+that adding vectors never carries from one field into the next, so the tables for any set of
+words come from summing their vectors rather than walking through their letters.
+"""
+from collections import Counter
+from typing import Dict, Iterable, NamedTuple, Tuple
+from wordlertools.constraints import ALPHABET
+
+LETTER_CODES = {letter: code for code, letter in enumerate(ALPHABET)}
+
+
+class LetterFrequency(NamedTuple):
+    """Letter counts over a set of words. Only letters a-z are counted.
+
+    word_count: number of words counted
+    positions: for each position, the number of words with each letter in that position
+    overall: number of times each letter appears, counting repeats within a word
+    containing: number of words each letter appears in at least once
+    """
+
+    word_count: int
+    positions: Tuple[Counter, ...]
+    overall: Counter
+    containing: Counter
+
+    def without(self, letters: Iterable[str]) -> "LetterFrequency":
+        """Drop letters from every table, such as letters already known to be in the word
+
+        Arguments:
+        letters: letters to drop. Anything that isn't a letter, like '_', is ignored
+
+        Return: copy of the tables without the letters
+        """
+        drop = set(letters)
+
+        def keep(counts: Counter) -> Counter:
+            return Counter(
+                {
+                    letter: count
+                    for letter, count in counts.items()
+                    if letter not in drop
+                }
+            )
+
+        return LetterFrequency(
+            self.word_count,
+            tuple(keep(column) for column in self.positions),
+            keep(self.overall),
+            keep(self.containing),
+        )
+
+
+class LetterCounts:
+    """Packed count vector for each word of one length, with the tables for all of the words
+    worked out once up front
+    """
+
+    def __init__(self, words: Iterable[str], word_length: int):
+        words = [word for word in words if len(word) == word_length]
+        self.word_length = word_length
+        self.width = max(1, len(words).bit_length())
+        self.vectors: Dict[str, int] = {word: self.vector(word) for word in words}
+        self.base_total = sum(self.vectors.values())
+        self.base = self.unpack(self.base_total, len(self.vectors))
+
+    def vector(self, word: str) -> int:
+        """Build the packed count vector for a word
+
+        Arguments:
+        word: word to be counted, of the same length as the other words
+
+        Return: integer with a count of 1 in the field for each of the word's (position,
+        letter) pairs and each letter it contains
+        """
+        vector = 0
+        for i, letter in enumerate(word):
+            code = LETTER_CODES.get(letter)
+            if code is not None:
+                vector |= 1 << (i * len(ALPHABET) + code) * self.width
+        contains_offset = self.word_length * len(ALPHABET)
+        for letter in set(word):
+            code = LETTER_CODES.get(letter)
+            if code is not None:
+                vector |= 1 << (contains_offset + code) * self.width
+        return vector
+
+    def unpack(self, total: int, word_count: int) -> LetterFrequency:
+        """Split a sum of count vectors back out into tables
+
+        Arguments:
+        total: sum of the vectors for a set of words
+        word_count: number of words summed
+
+        Return: letter frequency tables for the words
+        """
+        field_mask = (1 << self.width) - 1
+        fields = [
+            total >> field * self.width & field_mask
+            for field in range((self.word_length + 1) * len(ALPHABET))
+        ]
+
+        positions = []
+        overall: Counter = Counter()
+        for i in range(self.word_length):
+            column = Counter()
+            for code, letter in enumerate(ALPHABET):
+                count = fields[i * len(ALPHABET) + code]
+                if count:
+                    column[letter] = count
+            positions.append(column)
+            overall.update(column)
+
+        contains_offset = self.word_length * len(ALPHABET)
+        containing = Counter(
+            {
+                letter: fields[contains_offset + code]
+                for code, letter in enumerate(ALPHABET)
+                if fields[contains_offset + code]
+            }
+        )
+        return LetterFrequency(word_count, tuple(positions), overall, containing)
+
+    def frequency(self, words: Iterable[str]) -> LetterFrequency:
+        """Get the tables for a set of words
+
+        When the words are most of those counted up front, the vectors of the words left out
+        are taken away from the full total instead, so at most half of the vectors are summed.
+
+        Arguments:
+        words: words to be counted, normally a subset of those counted up front. If any
+        weren't, vectors are built for the words given instead
+
+        Return: letter frequency tables for the words
+        """
+        if not isinstance(words, (set, frozenset)):
+            words = set(words)
+        if not self.vectors.keys() >= words:
+            # fields are only wide enough for the words counted up front
+            return LetterCounts(words, self.word_length).base
+
+        if len(words) == len(self.vectors):
+            total = self.base_total
+        elif len(words) * 2 > len(self.vectors):
+            total = self.base_total - sum(
+                vector for word, vector in self.vectors.items() if word not in words
+            )
+        else:
+            total = sum(map(self.vectors.__getitem__, words))
+
+        return self.unpack(total, len(words))
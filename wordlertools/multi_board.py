@@ -0,0 +1,173 @@
+"""
+Solves several boards at once, as in variants where every guess is played on 4, 8 or 16 boards
+together, each with its own answer. The candidates for every board come from one shared index
+over the words of the right length, and guesses are ranked by the total information they're
+expected to give across all of the boards still being solved.
+"""
+import heapq
+from typing import (
+    Any,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+from wordlertools.constraints import Query
+import wordlertools.pattern_processor as pattern_processor
+from wordlertools.numpy_backend import is_available
+from wordlertools.query_stats import QueryStats, run_stage
+from wordlertools.solver import sample_answers, score_guesses
+from wordlertools.word_store import WordBucket, WordStore
+
+# patterns for one board, as a Query or a tuple of (locked, floating, excluded)
+Board = Union[Query, Tuple[Optional[str], Optional[Set[str]], Optional[str]]]
+
+
+def get_board_candidates(
+    boards: Sequence[Board],
+    base_words: Any,
+    word_length: int,
+    engine: str = pattern_processor.ENGINE_CONSTRAINT,
+    stats: Optional[QueryStats] = None,
+) -> List[FrozenSet[str]]:
+    """Get the candidate words for every board in one call
+
+    The words of the required length are indexed once and shared by every board, each board
+    is then a handful of bitset operations on that index, and boards with the same patterns
+    share a single result.
+
+    Arguments:
+    boards: patterns for each board
+    base_words: set of words loaded in from source, a WordStore or a WordIndex
+    word_length: length of the answers
+    engine: which of pattern_processor.ENGINES to match words with
+    stats: if given, the time taken to find the candidates is recorded here
+
+    Return: set of candidate words for each board, in the same order as the boards
+    """
+    return run_stage(
+        stats,
+        "board_candidates",
+        len(boards),
+        pattern_processor.get_candidate_words_batch,
+        boards,
+        base_words,
+        word_length,
+        engine,
+    )
+
+
+def rank_board_guesses(
+    guesses: Union[Iterable[str], WordBucket],
+    board_answers: Sequence[Iterable[str]],
+    word_length: int,
+    top_k: int = 5,
+    feedback_matrix: Any = None,
+    max_answers: Optional[int] = None,
+) -> List[Tuple[str, float]]:
+    """Rank guesses by the total entropy of the feedback they get across every board
+
+    Each board gets its own feedback from the guess, so the information from each is added up.
+    Boards with one candidate or none left give no information, so aren't scored. Where guesses
+    score the same, those that could be the answer on any board come first, then alphabetically.
+
+    Arguments:
+    guesses: words that can be guessed, or a bucket from a WordStore to reuse the letter
+    matrices it holds
+    board_answers: words that could still be the answer, for each board
+    word_length: length of the words
+    top_k: number of guesses to return
+    feedback_matrix: precomputed FeedbackMatrix to look feedback up in
+    max_answers: if given, score against at most this many of the answers on each board
+
+    Return: list of (guess, total entropy in bits), best first
+    """
+    guess_matrix = None
+    if isinstance(guesses, WordBucket):
+        if is_available():
+            guess_matrix = guesses.numpy
+        guesses = guesses.words
+    else:
+        guesses = sorted(set(word for word in guesses if len(word) == word_length))
+
+    answer_sets = [set(answers) for answers in board_answers]
+    any_answer = set().union(*answer_sets)
+    totals = [0.0] * len(guesses)
+    for answers in answer_sets:
+        if len(answers) < 2:
+            continue
+        scores = score_guesses(
+            guesses,
+            sample_answers(sorted(answers), max_answers),
+            word_length,
+            guess_matrix,
+            feedback_matrix,
+        )
+        totals = [total + score for total, score in zip(totals, scores)]
+
+    ranked = heapq.nsmallest(
+        top_k,
+        zip(guesses, totals),
+        key=lambda scored: (
+            -round(scored[1], 9),
+            scored[0] not in any_answer,
+            scored[0],
+        ),
+    )
+    return [(guess, score) for guess, score in ranked]
+
+
+def suggest_board_guesses(
+    boards: Sequence[Board],
+    base_words: Any,
+    word_length: int,
+    top_k: int = 5,
+    candidates_only: bool = False,
+    feedback_matrix: Any = None,
+    stats: Optional[QueryStats] = None,
+    max_answers: Optional[int] = None,
+) -> Tuple[List[FrozenSet[str]], List[Tuple[str, float]]]:
+    """Find the candidates for every board, and suggest the next guesses, as the words expected
+    to narrow down the candidates the most across all of the boards
+
+    Boards already solved should be left out, so they don't count towards the candidates
+    a guess can be chosen from.
+
+    Arguments:
+    boards: patterns for each board still being solved
+    base_words: set of words loaded in from source, a WordStore or a WordIndex
+    word_length: length of the answers
+    top_k: number of guesses to return
+    candidates_only: only suggest words that could be the answer on at least one board
+    feedback_matrix: precomputed FeedbackMatrix to look feedback up in
+    stats: if given, the time taken to find the candidates and rank the guesses is recorded here
+    max_answers: if given, score guesses against at most this many of the candidates on each
+    board
+
+    Return: tuple of the candidate words for each board, in the same order as the boards, and
+    the list of (guess, total entropy in bits), best first
+    """
+    board_answers = get_board_candidates(boards, base_words, word_length, stats=stats)
+    if candidates_only:
+        guesses: Union[Iterable[str], WordBucket] = frozenset().union(*board_answers)
+    elif isinstance(base_words, WordStore):
+        guesses = base_words.bucket(word_length)
+    else:
+        guesses = base_words
+    suggestions = run_stage(
+        stats,
+        "rank_guesses",
+        sum(len(answers) for answers in board_answers),
+        rank_board_guesses,
+        guesses,
+        board_answers,
+        word_length,
+        top_k,
+        feedback_matrix,
+        max_answers,
+    )
+    return board_answers, suggestions
@@ -0,0 +1,129 @@
+"""
+Optional NumPy backend, evaluating compiled constraints as vectorised boolean masks over a
+matrix of letters for each word of a length. Requires numpy to be installed.
+
+numpy is only imported the first time a matrix is built, as importing it takes longer than
+loading a dictionary snapshot, and most queries never use it.
+"""
+from importlib.util import find_spec
+from typing import TYPE_CHECKING, Any, Optional, Sequence, Set
+from wordlertools.constraints import ALPHABET, WordConstraints
+
+if TYPE_CHECKING:
+    import numpy as np
+
+_available: Optional[bool] = None
+_numpy: Any = None
+
+# letters a-z map to columns 0-25, anything else to a column that no constraint allows
+OTHER_LETTER = len(ALPHABET)
+
+
+def is_available() -> bool:
+    """Check if numpy can be used
+
+    Return: True if numpy is installed, otherwise False
+    """
+    global _available  # pylint: disable=global-statement
+    if _available is None:
+        _available = find_spec("numpy") is not None
+    return _available
+
+
+def load_numpy() -> Any:
+    """Import numpy, the first time it's needed
+
+    Return: the numpy module
+
+    Exception: if numpy isn't installed
+    """
+    global _numpy  # pylint: disable=global-statement
+    if _numpy is None:
+        if not is_available():
+            raise Exception("numpy must be installed to use the numpy backend")
+        import numpy  # pylint: disable=import-outside-toplevel
+
+        _numpy = numpy
+    return _numpy
+
+
+class NumpyBucket:
+    """Words of one length held as an N x L matrix of letter codes, plus an N x 26 matrix
+    counting each letter in each word
+    """
+
+    def __init__(self, words: Sequence[str], word_length: int):
+        np = load_numpy()
+        self.word_length = word_length
+        self.words = tuple(word for word in words if len(word) == word_length)
+
+        codes = np.full(256, OTHER_LETTER, dtype=np.uint8)
+        codes[np.frombuffer(ALPHABET.encode("ascii"), dtype=np.uint8)] = np.arange(
+            len(ALPHABET), dtype=np.uint8
+        )
+        encoded = np.frombuffer(
+            "".join(self.words).encode("ascii", "replace"), dtype=np.uint8
+        )
+        self.letters = codes[encoded].reshape(len(self.words), word_length)
+
+        self.counts = np.zeros((len(self.words), OTHER_LETTER + 1), dtype=np.uint8)
+        rows = np.arange(len(self.words))
+        for i in range(word_length):
+            np.add.at(self.counts, (rows, self.letters[:, i]), 1)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def match_mask(self, constraints: WordConstraints) -> "np.ndarray":
+        """Evaluate constraints against every word at once
+
+        Arguments:
+        constraints: constraints compiled for the query
+
+        Return: boolean array, True for each word that matches
+        """
+        np = load_numpy()
+        if constraints.word_length != self.word_length:
+            return np.zeros(len(self.words), dtype=bool)
+
+        matches = np.ones(len(self.words), dtype=bool)
+
+        excluded = [
+            i for i in range(len(ALPHABET)) if constraints.excluded_mask >> i & 1
+        ]
+        if excluded:
+            matches &= ~self.counts[:, excluded].any(axis=1)
+
+        for i, allowed in enumerate(constraints.allowed_letters):
+            allowed_codes = np.zeros(OTHER_LETTER + 1, dtype=bool)
+            allowed_codes[[ALPHABET.index(letter) for letter in allowed]] = True
+            matches &= allowed_codes[self.letters[:, i]]
+
+        for letter, count, positions in constraints.required_letters:
+            code = ALPHABET.index(letter)
+            matches &= self.counts[:, code] >= count
+            placed = (self.letters[:, list(positions)] == code).sum(axis=1)
+            matches &= placed >= count
+
+        for pattern in constraints.rejected_patterns:
+            rejected = np.ones(len(self.words), dtype=bool)
+            for i, letter in pattern:
+                rejected &= self.letters[:, i] == ALPHABET.index(letter)
+            matches &= ~rejected
+
+        for letter, minimum, maximum in constraints.letter_counts:
+            counts = self.counts[:, ALPHABET.index(letter)]
+            matches &= (counts >= minimum) & (counts <= maximum)
+
+        return matches
+
+    def query(self, constraints: WordConstraints) -> Set[str]:
+        """Get the words that match the constraints
+
+        Arguments:
+        constraints: constraints compiled for the query
+
+        Return: set of words that match
+        """
+        np = load_numpy()
+        return {self.words[i] for i in np.flatnonzero(self.match_mask(constraints))}
@@ -0,0 +1,12 @@
+"""
+Defaults and engine names shared by the command line and the processing it runs, kept apart
+from the processing so the command line can offer them without loading the matching code
+"""
+
+DEFAULT_WORD_LENGTH = 5
+WORDS_FILE = "./data/words_alpha.txt"
+
+ENGINE_CONSTRAINT = "constraint"
+ENGINE_PERMUTATION = "permutation"
+ENGINE_NUMPY = "numpy"
+ENGINES = (ENGINE_CONSTRAINT, ENGINE_PERMUTATION, ENGINE_NUMPY)
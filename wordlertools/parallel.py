@@ -0,0 +1,235 @@
+"""
+Spreads matching across a pool of worker processes, either by splitting the words of a length
+into shards or by splitting a batch of queries. Indexes are built once in the parent and handed
+to each worker when it starts, shared copy on write where processes are forked, so tasks only
+carry the query.
+
+A query against the index takes well under a millisecond for a whole length bucket, less than
+sending a task to a worker and its words back, so queries and batches too small to gain from
+the workers are matched in process instead.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+import wordlertools.pattern_processor as pattern_processor
+from wordlertools.constraints import Query, WordConstraints, as_query
+from wordlertools.word_index import WordIndex
+from wordlertools.word_store import WordStore
+
+# patterns for one query, as a Query or a tuple of (locked, floating, excluded)
+Patterns = Union[Query, Tuple[Optional[str], Optional[Set[str]], Optional[str]]]
+
+# fewest words in each shard for a single query to be split between workers
+MIN_SHARD_WORDS = 100000
+# fewest queries in a batch for it to be split between workers
+MIN_BATCH_QUERIES = 256
+
+# set in each worker process by _init_worker
+_worker_word_length = 0
+_worker_index: Optional[WordIndex] = None
+_worker_shards: Dict[Tuple[int, int], WordIndex] = {}
+
+
+def _init_worker(
+    index: WordIndex, shards: Dict[Tuple[int, int], WordIndex], word_length: int
+):
+    """Hold the indexes for the life of a worker process
+
+    Arguments:
+    index: index over every word of the length being matched
+    shards: index over each shard of the words, by (start, end) range
+    word_length: length of the words
+    """
+    global _worker_word_length, _worker_index, _worker_shards
+    _worker_word_length = word_length
+    _worker_index = index
+    _worker_shards = shards
+
+
+def _match_shard(constraints: WordConstraints, start: int, end: int) -> Set[str]:
+    """Match one shard of the words with its index
+
+    Arguments:
+    constraints: constraints compiled for the query
+    start: id of the first word in the shard
+    end: id after the last word in the shard
+
+    Return: set of matching words in the shard
+    """
+    return _worker_shards[(start, end)].query(constraints)
+
+
+def _match_batch(queries: List[Patterns]) -> List[FrozenSet[str]]:
+    """Match a chunk of a batch of queries against the index over every word
+
+    Arguments:
+    queries: tuples of (locked pattern, floating patterns, excluded letters)
+
+    Return: list with the set of matching words for each query, in the same order
+    """
+    return pattern_processor.get_candidate_words_batch(
+        queries, _worker_index, _worker_word_length
+    )
+
+
+def split_ranges(count: int, parts: int) -> List[Tuple[int, int]]:
+    """Split a number of items into contiguous ranges of near equal size
+
+    Arguments:
+    count: number of items
+    parts: maximum number of ranges
+
+    Return: list of (start, end) ranges covering every item in order
+    """
+    parts = max(1, min(parts, count))
+    size, extra = divmod(count, parts)
+    ranges = []
+    start = 0
+    for part in range(parts):
+        end = start + size + (1 if part < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+
+class ParallelMatcher:
+    """Pool of worker processes matching against the words of one length
+
+    Single queries are only split into shards when every worker gets at least
+    min_shard_words, and batches only shared out with at least min_batch_queries, otherwise
+    they're matched in process with the index. No processes are started with one worker.
+
+    Use as a context manager, or call close, to shut the workers down.
+    """
+
+    def __init__(
+        self,
+        base_words: Any,
+        word_length: int,
+        workers: Optional[int] = None,
+        min_shard_words: int = MIN_SHARD_WORDS,
+        min_batch_queries: int = MIN_BATCH_QUERIES,
+    ):
+        if isinstance(base_words, WordStore):
+            bucket = base_words.bucket(word_length)
+            words: Sequence[str] = tuple(bucket.words)
+            self.index = bucket.index
+        else:
+            words = tuple(
+                sorted(
+                    pattern_processor.get_words_specified_length(
+                        word_length, base_words
+                    )
+                )
+            )
+            self.index = WordIndex(words, word_length)
+        self.word_length = word_length
+        self.workers = workers or os.cpu_count() or 1
+        self.word_count = len(words)
+        self.min_batch_queries = min_batch_queries
+
+        self.shards = split_ranges(self.word_count, self.workers)
+        shard_indexes: Dict[Tuple[int, int], WordIndex] = {}
+        if self.workers > 1 and self.word_count >= min_shard_words * self.workers:
+            shard_indexes = {
+                (start, end): WordIndex(words[start:end], word_length)
+                for start, end in self.shards
+            }
+        self.sharded = bool(shard_indexes)
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        if self.workers > 1:
+            start_methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context(
+                "fork" if "fork" in start_methods else None
+            )
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(self.index, shard_indexes, word_length),
+            )
+
+    def __enter__(self) -> "ParallelMatcher":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Shut down the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown()
+
+    def get_candidate_words(
+        self,
+        locked_pattern: Union[str, Query, None],
+        floating_patterns: Optional[Iterable[str]],
+        excluded_letters: Optional[str],
+    ) -> Set[str]:
+        """Match one query, with each worker checking a shard of the words when there are
+        enough words to be worth splitting
+
+        Arguments:
+        locked_pattern: string, known to be the right position in word, or a Query, in which
+        case the other patterns are ignored
+        floating_patterns: set of strings with letters known to be in word, but not in that
+        position
+        excluded_letters: string containing letters not in word
+
+        Return: set of matching words
+        """
+        constraints = as_query(
+            locked_pattern, floating_patterns, excluded_letters, self.word_length
+        ).constraints
+        if not self.sharded or self._executor is None:
+            return self.index.query(constraints)
+        futures = [
+            self._executor.submit(_match_shard, constraints, start, end)
+            for start, end in self.shards
+        ]
+        candidate_words: Set[str] = set()
+        for future in futures:
+            candidate_words.update(future.result())
+        return candidate_words
+
+    def get_candidate_words_batch(
+        self, queries: Iterable[Patterns], chunks_per_worker: int = 4
+    ) -> List[FrozenSet[str]]:
+        """Match a batch of queries, split into chunks that are shared out between workers
+        when the batch is large enough
+
+        Arguments:
+        queries: Query objects, or tuples of (locked pattern, floating patterns, excluded letters)
+        chunks_per_worker: number of chunks for each worker, to even out uneven chunks
+
+        Return: list with the set of matching words for each query, in the same order
+        """
+        queries = list(queries)
+        if self._executor is None or len(queries) < self.min_batch_queries:
+            return pattern_processor.get_candidate_words_batch(
+                queries, self.index, self.word_length
+            )
+        futures = [
+            self._executor.submit(_match_batch, queries[start:end])
+            for start, end in split_ranges(
+                len(queries), self.workers * chunks_per_worker
+            )
+            if end > start
+        ]
+        batch_words: List[FrozenSet[str]] = []
+        for future in futures:
+            batch_words.extend(future.result())
+        return batch_words
@@ -2,68 +2,474 @@
 Provides utilities and processing for matching and mapping of patterns and words in word puzzles
 """
 import collections
-from itertools import permutations
+import functools
+from itertools import islice, permutations
 import re
-from typing import Dict, List, Set, Optional
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Set,
+    Optional,
+    Tuple,
+    Union,
+)
+from wordlertools.constraints import (
+    ALPHABET,
+    Query,
+    as_query,
+    build_letter_masks,
+    filter_words,
+    letter_mask,
+    word_matches_constraints,
+)
+from wordlertools.dawg import Dawg
+from wordlertools.letter_frequency import LetterCounts, LetterFrequency
+from wordlertools.numpy_backend import NumpyBucket
+from wordlertools.options import (  # pylint: disable=unused-import
+    ENGINE_CONSTRAINT,
+    ENGINE_NUMPY,
+    ENGINE_PERMUTATION,
+    ENGINES,
+)
+from wordlertools.query_stats import QueryStats, run_stage
+from wordlertools.word_index import WordIndex
+from wordlertools.word_store import WordStore
 
 
 def get_candidate_words(
-    locked_pattern: str,
-    floating_patterns: Set[str],
-    excluded_letters: str,
-    base_words: str,
+    locked_pattern: Union[str, Query, None],
+    floating_patterns: Optional[Set[str]],
+    excluded_letters: Optional[str],
+    base_words: Union[Set[str], WordIndex, WordStore, Dawg],
     word_length: int,
+    engine: str = ENGINE_CONSTRAINT,
+    stats: Optional[QueryStats] = None,
 ) -> Set[str]:
     """Get potential words based on letters in the right position, letters known to be in
     word but not in that position, and letters known to not be present in word. These are matched
     against a dictionary, filtering for words of that length
 
     Arguments:
-    locked_pattern: string, known to be the right position in word e.g. '_p_l__' for apples
+    locked_pattern: string, known to be the right position in word e.g. '_p_l__' for apples, or
+    a Query already built for the patterns, in which case floating_patterns and
+    excluded_letters are ignored
     floating_patterns: list of strings with patterns of letters known to be in word, but not
     in that position e.g. {'s_____', '__e___'}
     excluded_letters: string containing letters not in word e.g. 'zwrhb' for apples
-    base_words: set of words loaded in from source, that possible answers will be chosen from
+    base_words: set of words loaded in from source, that possible answers will be chosen from.
+    A WordStore only looks at the bucket for the word length, a WordIndex answers the query
+    with bitset operations, and a Dawg only walks the branches the patterns allow
+    engine: ENGINE_CONSTRAINT to check each word once against compiled constraints,
+    ENGINE_PERMUTATION to match against every generated letter permutation, or ENGINE_NUMPY
+    to evaluate the compiled constraints over every word at once with numpy
+    stats: if given, the time taken by each stage of the query, and the number of items going
+    in and out of it, are recorded here
 
     Returns: a set of strings, containing the words from dictionary that match the possible patterns
     """
+    if engine not in ENGINES:
+        raise Exception(f"Unknown engine '{engine}'")
+
+    query = run_stage(
+        stats,
+        "compile",
+        None,
+        as_query,
+        locked_pattern,
+        floating_patterns,
+        excluded_letters,
+        word_length,
+    )
 
-    if locked_pattern is None:
-        locked_pattern = ""
+    if engine == ENGINE_NUMPY:
+        if isinstance(base_words, WordStore):
+            matrix = base_words.bucket(word_length).numpy
+        else:
+            matrix = NumpyBucket(
+                list(get_words_specified_length(word_length, base_words)), word_length
+            )
+        return run_stage(stats, "scan", len(matrix), matrix.query, query.constraints)
+
+    if engine == ENGINE_CONSTRAINT and isinstance(
+        base_words, (WordIndex, WordStore, Dawg)
+    ):
+        if isinstance(base_words, WordStore):
+            bucket = base_words.bucket(word_length)
+            return run_stage(
+                stats, "scan", len(bucket), bucket.query, query.constraints
+            )
+        return run_stage(
+            stats, "scan", len(base_words), base_words.query, query.constraints
+        )
 
-    if floating_patterns is None:
-        floating_patterns = set()
+    # Initialise set of words that candidates will be chosen from
+    sized_words = run_stage(
+        stats,
+        "length_filter",
+        len(base_words),
+        get_words_specified_length,
+        word_length,
+        base_words,
+    )
 
-    if excluded_letters is None:
-        excluded_letters = ""
+    if engine == ENGINE_CONSTRAINT:
+        return run_stage(
+            stats,
+            "scan",
+            len(sized_words),
+            filter_words,
+            query.constraints,
+            sized_words,
+        )
 
-    # Initialise set of words that candidates will be chosen from
-    sized_words = get_words_specified_length(word_length, base_words)
+    # the patterns only depend on the query, so are generated the first time it's run
+    if query.permutation_patterns is None:
+        query.permutation_patterns = frozenset(get_permutation_patterns(query, stats))
+
+    # excluded letters that are also locked or floating only limit the number of copies
+    limited = {letter for letter, _, _ in query.letter_counts}
+    excluded_letters = "".join(
+        letter for letter in query.excluded_letters if letter not in limited
+    )
+
+    # get candidate words matching the reduced set of patterns
+    word_masks = None
+    if isinstance(base_words, WordStore):
+        word_masks = base_words.bucket(word_length).masks
+    candidate_words = run_stage(
+        stats,
+        "scan",
+        len(sized_words),
+        get_words_from_pattern,
+        query.permutation_patterns,
+        excluded_letters,
+        sized_words,
+        word_masks,
+    )
+
+    # remove words that are invalid in relation to the known floating patterns
+    filtered_words = run_stage(
+        stats,
+        "remove_invalid_words",
+        len(candidate_words),
+        remove_invalid_words,
+        query.floating_patterns,
+        candidate_words,
+    )
+
+    if query.letter_counts:
+        filtered_words = run_stage(
+            stats,
+            "letter_counts",
+            len(filtered_words),
+            filter_letter_counts,
+            query.letter_counts,
+            filtered_words,
+        )
+
+    return filtered_words
+
+
+def get_permutation_patterns(
+    query: Query, stats: Optional[QueryStats] = None
+) -> Set[str]:
+    """Generate the patterns the permutation engine matches words against
+
+    Arguments:
+    query: query to generate patterns for
+    stats: if given, the stages are recorded here
+
+    Returns: set of patterns, with every arrangement of the known letters allowed by the
+    locked and floating patterns
+    """
+    floating_patterns = set(query.floating_patterns)
 
     # Get string with unique floating letters from the floating patterns
     permutation_letters = get_letters_for_permutations(
-        floating_patterns, locked_pattern, word_length
+        floating_patterns, query.locked_pattern, query.word_length
     )
 
     # Generate all permutations from unique characters
-    possible_permutations = generate_letter_permutations(
-        permutation_letters, word_length
+    possible_permutations = run_stage(
+        stats,
+        "permutations",
+        len(permutation_letters),
+        generate_letter_permutations,
+        permutation_letters,
+        query.word_length,
     )
 
     # merge permutations and reduce by known letter positions
-    valid_permutations = merge_patterns(
-        locked_pattern, floating_patterns, possible_permutations
+    return run_stage(
+        stats,
+        "merge_patterns",
+        len(possible_permutations),
+        merge_patterns,
+        query.locked_pattern,
+        floating_patterns,
+        possible_permutations,
     )
 
-    # get candidate words matching the reduced set of patterns
-    candidate_words = get_words_from_pattern(
-        valid_permutations, excluded_letters, sized_words
+
+def get_candidate_words_by_length(
+    locked_pattern: Optional[str],
+    floating_patterns: Optional[Iterable[str]],
+    excluded_letters: Optional[str],
+    base_words: Union[Set[str], WordIndex, WordStore, Dawg],
+    word_lengths: Iterable[int],
+    engine: str = ENGINE_CONSTRAINT,
+    stats: Optional[QueryStats] = None,
+) -> Dict[int, Set[str]]:
+    """Get potential words for several word lengths in one call
+
+    Locked and floating patterns give the letters from the start of the word, and are padded
+    out with '_' to each length, so '_a' matches words of any length with 'a' second. Words are
+    split by length in a single pass: a WordStore makes the buckets it doesn't have yet for all
+    of the lengths together, and any other collection is split once for every length. A Dawg
+    is walked once for each length, only following the branches holding words of that length.
+
+    Arguments:
+    locked_pattern: string, known to be the right position in word e.g. '_p_l' for apple
+    floating_patterns: set of strings with letters known to be in word, but not in that position
+    excluded_letters: string containing letters not in word
+    base_words: set of words loaded in from source, a WordStore, WordIndex or Dawg
+    word_lengths: lengths of word to be matched
+    engine: which of ENGINES to match words with
+    stats: if given, the stages for every length are recorded here
+
+    Returns: dictionary of word length against the set of words of that length that match
+
+    Exception: if a pattern is longer than one of the word lengths
+    """
+    word_lengths = sorted(set(word_lengths))
+    if isinstance(base_words, WordStore):
+        run_stage(
+            stats, "split_lengths", len(base_words), base_words.buckets, word_lengths
+        )
+        sized_words = {length: base_words for length in word_lengths}
+    elif isinstance(base_words, (WordIndex, Dawg)):
+        sized_words = {length: base_words for length in word_lengths}
+    else:
+        sized_words = run_stage(
+            stats,
+            "split_lengths",
+            len(base_words),
+            split_words_by_length,
+            base_words,
+            word_lengths,
+        )
+
+    candidate_words = {}
+    for length in word_lengths:
+        locked, floating = pad_patterns(locked_pattern, floating_patterns, length)
+        candidate_words[length] = get_candidate_words(
+            locked,
+            floating,
+            excluded_letters,
+            sized_words[length],
+            length,
+            engine,
+            stats,
+        )
+    return candidate_words
+
+
+def pad_patterns(
+    locked_pattern: Optional[str],
+    floating_patterns: Optional[Iterable[str]],
+    word_length: int,
+) -> Tuple[str, Set[str]]:
+    """Pad locked and floating patterns out with '_' to a word length
+
+    Arguments:
+    locked_pattern: locked pattern, giving the letters from the start of the word
+    floating_patterns: floating patterns, giving the letters from the start of the word
+    word_length: length to pad the patterns to
+
+    Returns: tuple of the padded locked pattern, empty if there isn't one, and the padded
+    floating patterns
+
+    Exception: if a pattern is longer than the word length
+    """
+
+    def pad(pattern: str) -> str:
+        if len(pattern) > word_length:
+            raise Exception(
+                f"Pattern '{pattern}' ({len(pattern)}) is longer than the word length of {word_length}"
+            )
+        return pattern + "_" * (word_length - len(pattern))
+
+    locked = pad(locked_pattern) if locked_pattern else ""
+    return locked, {pad(pattern) for pattern in (floating_patterns or ()) if pattern}
+
+
+def iter_candidate_words(
+    locked_pattern: Union[str, Query, None],
+    floating_patterns: Optional[Set[str]],
+    excluded_letters: Optional[str],
+    base_words: Union[Set[str], WordIndex, WordStore, Dawg],
+    word_length: int,
+    limit: Optional[int] = None,
+) -> Iterator[str]:
+    """Yield potential words one at a time, as get_candidate_words would return them
+
+    Words are only checked as the iterator is consumed, so stopping early, or giving a limit,
+    avoids matching and building the full set of words. Words come in dictionary order from a
+    WordStore or WordIndex, and in iteration order from any other collection.
+
+    Arguments:
+    locked_pattern: string, known to be the right position in word e.g. '_p_l_' for apple, or
+    a Query already built for the patterns
+    floating_patterns: set of strings with letters known to be in word, but not in that position
+    excluded_letters: string containing letters not in word
+    base_words: set of words loaded in from source, a WordStore or a WordIndex
+    word_length: length of word to be matched
+    limit: maximum number of words to yield, or None for all of them
+
+    Returns: iterator over words from dictionary that match the patterns
+    """
+    constraints = as_query(
+        locked_pattern, floating_patterns, excluded_letters, word_length
+    ).constraints
+
+    if isinstance(base_words, WordStore):
+        words = base_words.bucket(word_length).iter_query(constraints)
+    elif isinstance(base_words, (WordIndex, Dawg)):
+        words = base_words.iter_query(constraints)
+    else:
+        words = (
+            word for word in base_words if word_matches_constraints(constraints, word)
+        )
+
+    return islice(words, limit)
+
+
+def candidate_words_exist(
+    locked_pattern: Union[str, Query, None],
+    floating_patterns: Optional[Set[str]],
+    excluded_letters: Optional[str],
+    base_words: Union[Set[str], WordIndex, WordStore, Dawg],
+    word_length: int,
+) -> bool:
+    """Check if any words match, stopping at the first one found
+
+    Arguments:
+    locked_pattern: string, known to be the right position in word, or a Query already built
+    for the patterns
+    floating_patterns: set of strings with letters known to be in word, but not in that position
+    excluded_letters: string containing letters not in word
+    base_words: set of words loaded in from source, a WordStore or a WordIndex
+    word_length: length of word to be matched
+
+    Returns: True if at least one word matches, otherwise False
+    """
+    words = iter_candidate_words(
+        locked_pattern, floating_patterns, excluded_letters, base_words, word_length, 1
     )
+    return next(words, None) is not None
 
-    # remove words that are invalid in relation to the known floating patterns
-    filtered_words = remove_invalid_words(floating_patterns, candidate_words)
 
-    return filtered_words
+def get_candidate_words_batch(
+    queries: Iterable[
+        Union[Query, Tuple[Optional[str], Optional[Set[str]], Optional[str]]]
+    ],
+    base_words: Union[Set[str], WordIndex, WordStore, Dawg],
+    word_length: int,
+    engine: str = ENGINE_CONSTRAINT,
+) -> List[FrozenSet[str]]:
+    """Get potential words for many queries against the same dictionary in one call
+
+    The words of the required length are indexed once for the whole batch (or taken from the
+    store's index), each distinct query is compiled once, and queries that compile to the same
+    constraints share a single result.
+
+    Arguments:
+    queries: tuples of (locked pattern, floating patterns, excluded letters), as taken
+    by get_candidate_words, or Query objects
+    base_words: set of words loaded in from source, a WordStore or a WordIndex
+    word_length: length of word to be matched
+    engine: which of ENGINES to match words with
+
+    Returns: list with the set of matching words for each query, in the same order
+    """
+    if engine == ENGINE_PERMUTATION:
+        permutation_words = []
+        for item in queries:
+            if isinstance(item, Query):
+                locked, floating, excluded = item, None, None
+            else:
+                locked, floating, excluded = item
+            permutation_words.append(
+                frozenset(
+                    get_candidate_words(
+                        locked, floating, excluded, base_words, word_length, engine
+                    )
+                )
+            )
+        return permutation_words
+
+    if engine not in ENGINES:
+        raise Exception(f"Unknown engine '{engine}'")
+
+    if isinstance(base_words, WordStore):
+        bucket = base_words.bucket(word_length)
+        matcher = bucket.numpy if engine == ENGINE_NUMPY else bucket.index
+    elif isinstance(base_words, (WordIndex, Dawg)) and engine == ENGINE_CONSTRAINT:
+        matcher = base_words
+    else:
+        sized_words = list(get_words_specified_length(word_length, base_words))
+        if engine == ENGINE_NUMPY:
+            matcher = NumpyBucket(sized_words, word_length)
+        else:
+            matcher = WordIndex(sized_words, word_length)
+
+    compiled: Dict[Tuple[str, FrozenSet[str], str], Query] = {}
+    results: Dict[Query, FrozenSet[str]] = {}
+    batch_words = []
+
+    for item in queries:
+        if isinstance(item, Query):
+            query = as_query(item, None, None, word_length)
+        else:
+            locked_pattern, floating_patterns, excluded_letters = item
+            key = (
+                locked_pattern or "",
+                frozenset(floating_patterns or ()),
+                excluded_letters or "",
+            )
+            if key not in compiled:
+                compiled[key] = Query(*key, word_length)
+            query = compiled[key]
+        if query not in results:
+            results[query] = frozenset(matcher.query(query.constraints))
+        batch_words.append(results[query])
+
+    return batch_words
+
+
+def filter_letter_counts(
+    letter_counts: Iterable[Tuple[str, int, int]], candidate_words: Iterable[str]
+) -> Set[str]:
+    """Keep the words holding an allowed number of copies of each limited letter
+
+    Arguments:
+    letter_counts: tuples of (letter, minimum count, maximum count), as in WordConstraints
+    candidate_words: words to be filtered
+
+    Return: set of words within every limit
+    """
+    letter_counts = tuple(letter_counts)
+    return {
+        word
+        for word in candidate_words
+        if all(
+            minimum <= word.count(letter) <= maximum
+            for letter, minimum, maximum in letter_counts
+        )
+    }
 
 
 def remove_invalid_words(floating_patterns: Set[str], candidate_words: Set[str]):
@@ -83,35 +489,50 @@ def remove_invalid_words(floating_patterns: Set[str], candidate_words: Set[str])
 
     """
     valid_words = set(candidate_words)
-    merged_regex = ""
 
-    if floating_patterns is None:
+    if floating_patterns is None or not valid_words:
         return valid_words
 
-    # convert each floating pattern to a regex
-    first_candidate_word = list(candidate_words)[0]
-    for floater in floating_patterns:
-        if (floater is None) or (len(floater) != len(first_candidate_word)):
-            continue
-        if len(merged_regex) > 0:
-            merged_regex += "|"
-        merged_regex += floater.replace("_", ".")
+    # convert each floating pattern to a regex, sorted so equal sets share a compiled pattern
+    word_length = len(next(iter(valid_words)))
+    merged_regex = "|".join(
+        floater.replace("_", ".")
+        for floater in sorted(filter(None, floating_patterns))
+        if len(floater) == word_length
+    )
 
     if len(merged_regex) == 0:
         return valid_words
 
     # match regex and remove from candidates
+    compiled_regex = compile_pattern(merged_regex)
     for word in candidate_words:
-        if re.match(merged_regex, word):
+        if compiled_regex.match(word):
             valid_words.remove(word)
 
     return valid_words
 
 
-def get_words_specified_length(length: int, input_data: Set[str]) -> Set[str]:
+@functools.lru_cache(maxsize=256)
+def compile_pattern(regex: str) -> re.Pattern:
+    """Compile a regex, keeping the most recently used patterns so each is only compiled once
+
+    Arguments:
+    regex: regular expression to compile
+
+    Returns: the compiled pattern
+    """
+    return re.compile(regex)
+
+
+def get_words_specified_length(
+    length: int, input_data: Union[Set[str], WordStore, Dawg]
+) -> Set[str]:
     """Get words of a specific size
 
-    Filter and return input list of words, only returning those of a given size
+    Filter and return input list of words, only returning those of a given size. A WordStore
+    has already bucketed its words, so its bucket is returned directly without copying, and a
+    Dawg only walks the branches holding words of that size.
 
     Arguments:
     length: length of words to return
@@ -119,30 +540,67 @@ def get_words_specified_length(length: int, input_data: Set[str]) -> Set[str]:
 
     Return: list of filtered words of specified length
     """
+    if isinstance(input_data, WordStore):
+        return input_data.words_of_length(length)
+    if isinstance(input_data, Dawg):
+        return set(input_data.words_of_length(length))
     return set(map(lambda x: x, filter(lambda x: len(x) == length, input_data)))
 
 
+def split_words_by_length(
+    words: Iterable[str], word_lengths: Iterable[int]
+) -> Dict[int, Set[str]]:
+    """Split words of several sizes out of a collection in one pass
+
+    Arguments:
+    words: words to be split
+    word_lengths: lengths of words to keep
+
+    Return: dictionary of length against the set of words of that length
+    """
+    split: Dict[int, Set[str]] = {length: set() for length in word_lengths}
+    for word in words:
+        sized = split.get(len(word))
+        if sized is not None:
+            sized.add(word)
+    return split
+
+
 def get_words_from_pattern(
-    candidate_patterns: Set[str], excluded_letters: str, word_list: Set[str]
+    candidate_patterns: Set[str],
+    excluded_letters: str,
+    word_list: Set[str],
+    word_masks: Optional[Dict[str, int]] = None,
 ) -> Set[str]:
     """Return words that match patterns, without any of the excluded letters
 
     For each of the list of patterns provided, check which words in the word list can provide a
-    match. Candidate words will have none of the excluded letters in them.
+    match. Candidate words will have none of the excluded letters in them. Words containing
+    excluded letters are removed once up front using letter masks, rather than for every pattern.
 
     Arguments:
     candidate_patterns: set of patterns that possible words can meet
     e.g. c_t would match cat, cut, cot etc
     excluded_letters: a string containing letters that cannot be in any candidate words
     word_list: set of valid candidate words that will be filtered down
+    word_masks: precomputed letter masks for the words, from build_letter_masks
 
     Return: list of words that match
     """
+    excluded_mask, excluded_other = split_excluded_letters(excluded_letters)
+    if word_masks is None:
+        word_masks = build_letter_masks(word_list)
+
+    permitted_words = [
+        word
+        for word in word_list
+        if not word_masks[word] & excluded_mask
+        and not any(character in word for character in excluded_other)
+    ]
+
     potential_words = set()
     for pattern in candidate_patterns:
-        filtered_items = get_filtered_pattern_match(
-            pattern, excluded_letters, word_list
-        )
+        filtered_items = get_filtered_pattern_match(pattern, "", permitted_words)
         potential_words.update(set(filtered_items))
 
     return potential_words
@@ -168,7 +626,9 @@ def get_filtered_pattern_match(
     )
 
 
-def is_word_a_pattern_match(pattern: str, excluded_letters: str, word: str) -> bool:
+def is_word_a_pattern_match(
+    pattern: str, excluded_letters: str, word: str, word_mask: Optional[int] = None
+) -> bool:
     """Check that a specific pattern, not containing any of the excluded_letters, or
     in violation of any of the floating patterns, matches an input word
 
@@ -176,21 +636,39 @@ def is_word_a_pattern_match(pattern: str, excluded_letters: str, word: str) -> b
     pattern: pattern to be validated
     excluded_letters: string of character to be excluded from potential matches
     word: the word to be validated
+    word_mask: precomputed letter mask for the word, calculated if not given
 
     Return: True if word is a match, otherwise False
     """
     if (len(pattern) == 0) or (len(word) == 0) or (len(pattern) != len(word)):
         return False
-    if (len(excluded_letters) > 0) and (
-        re.match("^[^" + excluded_letters + "]+$", word) is None
-    ):
-        return False
+    if len(excluded_letters) > 0:
+        excluded_mask, excluded_other = split_excluded_letters(excluded_letters)
+        if word_mask is None:
+            word_mask = letter_mask(word)
+        if word_mask & excluded_mask:
+            return False
+        if any(character in word for character in excluded_other):
+            return False
     for i, character in enumerate(pattern):
         if (character != "_") and (character.lower() != word[i].lower()):
             return False
     return True
 
 
+@functools.lru_cache(maxsize=256)
+def split_excluded_letters(excluded_letters: str) -> Tuple[int, str]:
+    """Split excluded letters into a letter mask, and any other characters that can't be masked
+
+    Arguments:
+    excluded_letters: string of characters to be excluded from potential matches
+
+    Returns: tuple of the letter mask for a-z, and a string of any remaining characters
+    """
+    other = "".join(sorted(set(excluded_letters) - set(ALPHABET)))
+    return letter_mask(excluded_letters), other
+
+
 def generate_letter_permutations(letters: str, word_length: int) -> Set[str]:
     """Generate possible permutations of word patterns
 
@@ -536,3 +1014,36 @@ def calc_letter_frequency(
             response_for_collection = response_for_collection.replace(letter, "")
 
     return collections.Counter(response_for_collection)
+
+
+def get_letter_frequency(
+    candidate_words: Iterable[str],
+    base_words: Union[Set[str], WordIndex, WordStore, Dawg],
+    word_length: int,
+    known_letters: Optional[str] = None,
+) -> LetterFrequency:
+    """Calculate per position, overall and words containing counts of letters in candidate words
+
+    When the words come from a WordStore, the count vectors held by the store for that length
+    are summed, so no words are rebuilt or searched. Otherwise vectors are built for the
+    candidates alone.
+
+    Arguments:
+    candidate_words: words that match the pattern restrictions, all of the same length
+    base_words: words the candidates were chosen from, as passed to get_candidate_words
+    word_length: length of the candidate words
+    known_letters: letters to leave out, such as locked and floating letters, giving back the
+    best guesses for the next letter that hasn't been found yet
+
+    Return: letter frequency tables for the candidates
+    """
+    if isinstance(base_words, WordStore):
+        counts = base_words.bucket(word_length).letter_counts
+    else:
+        candidate_words = set(candidate_words)
+        counts = LetterCounts(candidate_words, word_length)
+
+    frequency = counts.frequency(candidate_words)
+    if known_letters:
+        frequency = frequency.without(known_letters)
+    return frequency
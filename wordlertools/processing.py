@@ -0,0 +1,245 @@
+"""
+Answers queries for the command line and the daemon it starts, keeping dictionaries and query
+results loaded for the life of the process
+"""
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+import wordlertools.numpy_backend as numpy_backend
+import wordlertools.pattern_processor as pattern_processor
+from wordlertools.dictionary import get_feedback_matrix, get_word_store
+from wordlertools.options import DEFAULT_WORD_LENGTH, ENGINE_CONSTRAINT, WORDS_FILE
+from wordlertools.query_cache import (
+    QueryCache,
+    canonical_query,
+    get_cached_candidate_words,
+    get_cached_candidate_words_by_length,
+)
+from wordlertools.query_stats import QueryStats, run_stage
+from wordlertools.solver import suggest_guesses
+
+# query results are kept for the life of the process
+query_cache = QueryCache()
+
+
+def perform_processing(
+    locked_pattern: str,
+    floating_patterns: Set[str],
+    excluded_letters: str,
+    engine: str = ENGINE_CONSTRAINT,
+    limit: Optional[int] = None,
+    stats: Optional[QueryStats] = None,
+    word_length: int = DEFAULT_WORD_LENGTH,
+) -> Set[str]:
+    """
+    Main entry point to start processing of words that match the restrictions given
+
+    Arguments:
+    locked_pattern: string with pattern of letters, locked into the right positions (green)
+    floating_patterns: set of strings, covering patterns with letters known to be in word,
+    but not in those positions (yellow)
+    excluded_letters: string containing letters known to not be in solution
+    engine: which of pattern_processor.ENGINES to match words with
+    limit: maximum number of words to find, stopping as soon as there are enough. Limited
+    queries always use the constraint engine and aren't cached
+    stats: if given, the time taken by each stage of the query is recorded here, including
+    loading the dictionary
+    word_length: length of the answer
+
+    Returns: set of candidate words that contains the answer
+    """
+    words_from_file = run_stage(stats, "load", None, get_word_store, WORDS_FILE)
+
+    if limit is not None:
+        return run_stage(
+            stats,
+            "scan",
+            None,
+            lambda: set(
+                pattern_processor.iter_candidate_words(
+                    locked_pattern,
+                    floating_patterns,
+                    excluded_letters,
+                    words_from_file,
+                    word_length,
+                    limit,
+                )
+            ),
+        )
+
+    return get_cached_candidate_words(
+        query_cache,
+        locked_pattern,
+        floating_patterns,
+        excluded_letters,
+        words_from_file,
+        word_length,
+        engine,
+        stats,
+    )
+
+
+def perform_processing_by_length(
+    locked_pattern: str,
+    floating_patterns: Set[str],
+    excluded_letters: str,
+    word_lengths: Iterable[int],
+    engine: str = ENGINE_CONSTRAINT,
+    stats: Optional[QueryStats] = None,
+) -> Dict[int, FrozenSet[str]]:
+    """
+    Find the words that match the restrictions given for several word lengths at once
+
+    Arguments:
+    locked_pattern: string with pattern of letters, locked into the right positions (green),
+    padded out with '_' to each length
+    floating_patterns: set of strings, covering patterns with letters known to be in word,
+    but not in those positions (yellow), padded out with '_' to each length
+    excluded_letters: string containing letters known to not be in solution
+    word_lengths: lengths of words to find
+    engine: which of pattern_processor.ENGINES to match words with
+    stats: if given, the time taken by each stage of the query is recorded here, including
+    loading the dictionary
+
+    Returns: dictionary of word length against the candidate words of that length
+    """
+    words_from_file = run_stage(stats, "load", None, get_word_store, WORDS_FILE)
+
+    return get_cached_candidate_words_by_length(
+        query_cache,
+        locked_pattern,
+        floating_patterns,
+        excluded_letters,
+        words_from_file,
+        word_lengths,
+        engine,
+        stats,
+    )
+
+
+def perform_suggestion(
+    locked_pattern: str,
+    floating_patterns: Set[str],
+    excluded_letters: str,
+    top_k: int = 5,
+    stats: Optional[QueryStats] = None,
+    word_length: int = DEFAULT_WORD_LENGTH,
+) -> List[Tuple[str, float]]:
+    """
+    Suggest the next guesses, as the words expected to narrow down the candidates the most
+
+    Arguments:
+    locked_pattern: string with pattern of letters, locked into the right positions (green)
+    floating_patterns: set of strings, covering patterns with letters known to be in word,
+    but not in those positions (yellow)
+    excluded_letters: string containing letters known to not be in solution
+    top_k: number of guesses to suggest
+    stats: if given, the time taken by each stage is recorded here, including loading the
+    dictionary
+    word_length: length of the answer
+
+    Returns: list of (guess, expected information in bits), best first
+    """
+    words_from_file = run_stage(stats, "load", None, get_word_store, WORDS_FILE)
+
+    # suggestions are costly to score, so are cached alongside candidate words
+    key = (
+        "suggest",
+        top_k,
+        canonical_query(
+            locked_pattern,
+            floating_patterns,
+            excluded_letters,
+            word_length,
+            words_from_file.version,
+        ),
+    )
+    suggestions = query_cache.get(key)
+    if stats is not None:
+        stats.cache_hit = suggestions is not None
+    if suggestions is None:
+        suggestions = suggest_guesses(
+            locked_pattern,
+            floating_patterns,
+            excluded_letters,
+            words_from_file,
+            word_length,
+            top_k,
+            feedback_matrix=get_feedback_matrix(WORDS_FILE),
+            stats=stats,
+        )
+        query_cache.put(key, suggestions)
+    return suggestions
+
+
+def warm_up(word_lengths: Iterable[int] = (DEFAULT_WORD_LENGTH,)):
+    """Load the dictionary and build everything queries use, so the first query is as fast
+    as the rest
+
+    Arguments:
+    word_lengths: lengths of words to build the indexes for
+    """
+    for bucket in get_word_store(WORDS_FILE).buckets(word_lengths).values():
+        _ = bucket.index
+        _ = bucket.masks
+        if numpy_backend.is_available():
+            _ = bucket.numpy
+    get_feedback_matrix(WORDS_FILE)
+
+
+def handle_daemon_request(request: Dict[str, Any]) -> Any:
+    """Answer a query forwarded from the command line to the daemon
+
+    Arguments:
+    request: decoded request, with command 'words' or 'suggest', the patterns as l, f and x,
+    the word lengths as w, and engine, limit, k and stats as given on the command line
+
+    Return: dictionary with the sorted candidate words as 'words', or for more than one word
+    length the sorted words for each length as 'words_by_length', or the suggestions as
+    'suggestions', and the query stats as 'stats' if they were asked for
+    """
+    stats = QueryStats() if request.get("stats") else None
+    word_lengths = request.get("w") or [DEFAULT_WORD_LENGTH]
+    if request["command"] == "words" and len(word_lengths) > 1:
+        response: Dict[str, Any] = {
+            "words_by_length": {
+                length: sorted(words)
+                for length, words in perform_processing_by_length(
+                    request.get("l"),
+                    request.get("f"),
+                    request.get("x"),
+                    word_lengths,
+                    request.get("engine", ENGINE_CONSTRAINT),
+                    stats,
+                ).items()
+            }
+        }
+    elif request["command"] == "words":
+        response = {
+            "words": sorted(
+                perform_processing(
+                    request.get("l"),
+                    request.get("f"),
+                    request.get("x"),
+                    request.get("engine", ENGINE_CONSTRAINT),
+                    request.get("limit"),
+                    stats,
+                    word_lengths[0],
+                )
+            )
+        }
+    elif request["command"] == "suggest":
+        response = {
+            "suggestions": perform_suggestion(
+                request.get("l"),
+                request.get("f"),
+                request.get("x"),
+                request.get("k", 5),
+                stats,
+                word_lengths[0],
+            )
+        }
+    else:
+        raise Exception(f"Unknown command '{request['command']}'")
+
+    if stats is not None:
+        response["stats"] = stats.as_dict()
+    return response
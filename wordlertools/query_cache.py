@@ -0,0 +1,299 @@
+"""
+Bounded least recently used cache of candidate words, keyed on a canonical form of the query so
+that equivalent constraints written differently share a single entry
+"""
+from collections import OrderedDict
+import threading
+from typing import Any, Dict, FrozenSet, Hashable, Iterable, Optional, Tuple, Union
+from wordlertools.constraints import Query
+import wordlertools.pattern_processor as pattern_processor
+from wordlertools.query_stats import QueryStats
+
+DEFAULT_MAX_SIZE = 1024
+
+
+class QueryCache:
+    """Thread safe LRU cache, counting hits and misses"""
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, count_miss: bool = True) -> Optional[Any]:
+        """Get a cached value, marking it as most recently used
+
+        Arguments:
+        key: key the value was stored against
+        count_miss: False when the caller will look the key up again on a miss, so the miss
+        is only counted once
+
+        Return: the value, or None if it isn't cached
+        """
+        with self._lock:
+            if key not in self._entries:
+                if count_miss:
+                    self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entry if the cache is full
+
+        Arguments:
+        key: key to store the value against
+        value: value to be cached
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Get the size of the cache and its counters
+
+        Return: dictionary with size, max_size, hits and misses
+        """
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def canonical_query(
+    locked_pattern: Union[str, Query, None],
+    floating_patterns: Optional[Iterable[str]],
+    excluded_letters: Optional[str],
+    word_length: int,
+    dictionary_version: Hashable,
+    engine: str = pattern_processor.ENGINE_CONSTRAINT,
+) -> Tuple[str, Tuple[str, ...], str, int, Hashable, str]:
+    """Reduce a query to a canonical form, for use as a cache key
+
+    Patterns are lower cased, a locked pattern with no letters becomes empty, floating
+    patterns without letters are dropped and the rest sorted and deduplicated, and excluded
+    letters are sorted and deduplicated.
+
+    Arguments:
+    locked_pattern: string, known to be the right position in word, or a Query, in which case
+    its patterns are used and floating_patterns and excluded_letters are ignored
+    floating_patterns: set of strings with letters known to be in word, but not in that position
+    excluded_letters: string containing letters not in word
+    word_length: length of word to be matched
+    dictionary_version: identifies the dictionary the query runs against
+    engine: which of pattern_processor.ENGINES the query is matched with, kept apart as the
+    engines record different stages, and can reject different patterns
+
+    Return: tuple that is equal for any two queries giving the same words
+    """
+    if isinstance(locked_pattern, Query):
+        floating_patterns = locked_pattern.floating_patterns
+        excluded_letters = locked_pattern.excluded_letters
+        locked_pattern = locked_pattern.locked_pattern
+    locked = (locked_pattern or "").lower()
+    if not locked.replace("_", ""):
+        locked = ""
+    floating = tuple(
+        sorted(
+            {
+                pattern.lower()
+                for pattern in (floating_patterns or ())
+                if pattern and pattern.replace("_", "")
+            }
+        )
+    )
+    excluded = "".join(sorted(set((excluded_letters or "").lower())))
+    return (locked, floating, excluded, word_length, dictionary_version, engine)
+
+
+def dictionary_version(base_words: Any) -> Hashable:
+    """Identify the dictionary being queried
+
+    Word stores carry their own version. Any other collection is identified by the object
+    itself, so must not be changed while results for it are cached.
+
+    Arguments:
+    base_words: dictionary words, as passed to get_candidate_words
+
+    Return: hashable version for the dictionary
+    """
+    version = getattr(base_words, "version", None)
+    if version is not None:
+        return version
+    return ("id", id(base_words))
+
+
+def find_cached_candidate_words(
+    cache: QueryCache,
+    locked_pattern: Union[str, Query, None],
+    floating_patterns: Optional[Iterable[str]],
+    excluded_letters: Optional[str],
+    base_words: Any,
+    word_length: int,
+    engine: str = pattern_processor.ENGINE_CONSTRAINT,
+) -> Optional[FrozenSet[str]]:
+    """Look a query up in the cache without running it, for callers that answer hits straight
+    away and pass misses on to get_cached_candidate_words elsewhere, such as a worker thread
+
+    A miss isn't counted here, as get_cached_candidate_words counts it.
+
+    Arguments:
+    cache: cache to look the query up in
+    locked_pattern: string, known to be the right position in word, or a Query already built
+    for the patterns
+    floating_patterns: set of strings with letters known to be in word, but not in that position
+    excluded_letters: string containing letters not in word
+    base_words: words that possible answers will be chosen from
+    word_length: length of word to be matched
+    engine: which of pattern_processor.ENGINES the query would be matched with
+
+    Return: immutable set of matching words, or None if the query isn't cached
+    """
+    return cache.get(
+        canonical_query(
+            locked_pattern,
+            floating_patterns,
+            excluded_letters,
+            word_length,
+            dictionary_version(base_words),
+            engine,
+        ),
+        count_miss=False,
+    )
+
+
+def get_cached_candidate_words(
+    cache: QueryCache,
+    locked_pattern: Union[str, Query, None],
+    floating_patterns: Optional[Iterable[str]],
+    excluded_letters: Optional[str],
+    base_words: Any,
+    word_length: int,
+    engine: str = pattern_processor.ENGINE_CONSTRAINT,
+    stats: Optional[QueryStats] = None,
+) -> FrozenSet[str]:
+    """Get candidate words from the cache, running get_candidate_words on a miss
+
+    Arguments:
+    cache: cache to look the query up in
+    locked_pattern: string, known to be the right position in word, or a Query already built
+    for the patterns
+    floating_patterns: set of strings with letters known to be in word, but not in that position
+    excluded_letters: string containing letters not in word
+    base_words: words that possible answers will be chosen from
+    word_length: length of word to be matched
+    engine: which of pattern_processor.ENGINES to match words with on a miss
+    stats: if given, records whether the query was cached, and the stages run on a miss
+
+    Return: immutable set of matching words, shared with other callers of the same query
+    """
+    key = canonical_query(
+        locked_pattern,
+        floating_patterns,
+        excluded_letters,
+        word_length,
+        dictionary_version(base_words),
+        engine,
+    )
+    candidate_words = cache.get(key)
+    if stats is not None:
+        stats.cache_hit = candidate_words is not None
+    if candidate_words is None:
+        candidate_words = frozenset(
+            pattern_processor.get_candidate_words(
+                locked_pattern,
+                set(floating_patterns or ()),
+                excluded_letters,
+                base_words,
+                word_length,
+                engine,
+                stats,
+            )
+        )
+        cache.put(key, candidate_words)
+    return candidate_words
+
+
+def get_cached_candidate_words_by_length(
+    cache: QueryCache,
+    locked_pattern: Optional[str],
+    floating_patterns: Optional[Iterable[str]],
+    excluded_letters: Optional[str],
+    base_words: Any,
+    word_lengths: Iterable[int],
+    engine: str = pattern_processor.ENGINE_CONSTRAINT,
+    stats: Optional[QueryStats] = None,
+) -> Dict[int, FrozenSet[str]]:
+    """Get candidate words for several word lengths, from the cache where possible
+
+    Each length is cached on its own, against the patterns padded to that length, so it's
+    shared with queries for that length alone. Lengths not cached are found together in one
+    call to get_candidate_words_by_length.
+
+    Arguments:
+    cache: cache to look the query up in
+    locked_pattern: string, giving the letters known to be in the right position from the
+    start of the word
+    floating_patterns: set of strings with letters known to be in word, but not in that position
+    excluded_letters: string containing letters not in word
+    base_words: words that possible answers will be chosen from
+    word_lengths: lengths of word to be matched
+    engine: which of pattern_processor.ENGINES to match words with on a miss
+    stats: if given, records whether every length was cached, and the stages run for the rest
+
+    Return: dictionary of word length against the immutable set of matching words, shortest
+    first
+    """
+    version = dictionary_version(base_words)
+    keys = {
+        length: canonical_query(
+            *pattern_processor.pad_patterns(locked_pattern, floating_patterns, length),
+            excluded_letters,
+            length,
+            version,
+            engine,
+        )
+        for length in sorted(set(word_lengths))
+    }
+
+    candidate_words: Dict[int, FrozenSet[str]] = {}
+    for length, key in keys.items():
+        cached = cache.get(key)
+        if cached is not None:
+            candidate_words[length] = cached
+    missing = [length for length in keys if length not in candidate_words]
+    if stats is not None:
+        stats.cache_hit = not missing
+
+    if missing:
+        found = pattern_processor.get_candidate_words_by_length(
+            locked_pattern,
+            floating_patterns,
+            excluded_letters,
+            base_words,
+            missing,
+            engine,
+            stats,
+        )
+        for length, words in found.items():
+            candidate_words[length] = frozenset(words)
+            cache.put(keys[length], candidate_words[length])
+
+    return {length: candidate_words[length] for length in keys}
@@ -0,0 +1,161 @@
+"""
+Optional timing of each stage of a query, recording wall time and the number of items going in
+and coming out, to show which stage a slow query spends its time in
+"""
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+
+class StageStats(NamedTuple):
+    """Timing for one stage of a query
+
+    name: stage name, such as 'merge_patterns' or 'scan'
+    seconds: wall time taken by the stage
+    input_size: number of items going into the stage, such as words scanned, if known
+    output_size: number of items the stage produced, such as patterns kept, if known
+    """
+
+    name: str
+    seconds: float
+    input_size: Optional[int]
+    output_size: Optional[int]
+
+
+class QueryStats:
+    """Stages of a query, in the order they ran"""
+
+    def __init__(self):
+        self.stages: List[StageStats] = []
+        self.cache_hit: Optional[bool] = None
+
+    def run(
+        self,
+        name: str,
+        input_size: Optional[int],
+        function: Callable[..., Any],
+        *args: Any,
+    ) -> Any:
+        """Run a stage, recording how long it took and the size of its result
+
+        Arguments:
+        name: stage name
+        input_size: number of items going into the stage, or None if not known
+        function: stage to run
+        args: arguments for the stage
+
+        Return: the result of the stage
+        """
+        start = time.perf_counter()
+        result = function(*args)
+        seconds = time.perf_counter() - start
+        output_size = (
+            len(result) if isinstance(result, (set, frozenset, list, dict)) else None
+        )
+        self.stages.append(StageStats(name, seconds, input_size, output_size))
+        return result
+
+    @property
+    def total_seconds(self) -> float:
+        """Wall time taken across every stage"""
+        return sum(stage.seconds for stage in self.stages)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Stats as a dictionary that can be encoded as JSON
+
+        Return: dictionary with the total time in ms, whether the query was cached, and
+        each stage's time in ms and sizes
+        """
+        return {
+            "total_ms": self.total_seconds * 1000,
+            "cache_hit": self.cache_hit,
+            "stages": [
+                {
+                    "name": stage.name,
+                    "ms": stage.seconds * 1000,
+                    "input_size": stage.input_size,
+                    "output_size": stage.output_size,
+                }
+                for stage in self.stages
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, stats_dict: Dict[str, Any]) -> "QueryStats":
+        """Rebuild stats from as_dict, such as stats sent back from the daemon
+
+        Arguments:
+        stats_dict: dictionary from as_dict
+
+        Return: stats with the same stages
+        """
+        stats = cls()
+        stats.cache_hit = stats_dict["cache_hit"]
+        stats.stages = [
+            StageStats(
+                stage["name"],
+                stage["ms"] / 1000,
+                stage["input_size"],
+                stage["output_size"],
+            )
+            for stage in stats_dict["stages"]
+        ]
+        return stats
+
+    def server_timing(self, total_seconds: Optional[float] = None) -> str:
+        """Format the stages as the value of a Server-Timing HTTP header
+
+        Arguments:
+        total_seconds: time taken to handle the whole request, added as a 'total' metric
+
+        Return: header value with a metric for each stage, durations in ms
+        """
+        metrics = [
+            f"{stage.name};dur={stage.seconds * 1000:.3f}" for stage in self.stages
+        ]
+        if self.cache_hit is not None:
+            metrics.append(f'cache;desc="{"hit" if self.cache_hit else "miss"}"')
+        if total_seconds is not None:
+            metrics.append(f"total;dur={total_seconds * 1000:.3f}")
+        return ", ".join(metrics)
+
+    def format(self) -> str:
+        """Format the stages as a table, one line per stage
+
+        Return: table of stage name, time in ms, and sizes going in and out
+        """
+
+        def size(value: Optional[int]) -> str:
+            return "-" if value is None else str(value)
+
+        lines = [
+            f"{stage.name:<22}{stage.seconds * 1000:>10.3f} ms"
+            f"{size(stage.input_size):>10} in{size(stage.output_size):>10} out"
+            for stage in self.stages
+        ]
+        lines.append(f"{'total':<22}{self.total_seconds * 1000:>10.3f} ms")
+        if self.cache_hit is not None:
+            lines.append(f"cache {'hit' if self.cache_hit else 'miss'}")
+        return "\n".join(lines)
+
+
+def run_stage(
+    stats: Optional[QueryStats],
+    name: str,
+    input_size: Optional[int],
+    function: Callable[..., Any],
+    *args: Any,
+) -> Any:
+    """Run a stage, timing it only when stats are being collected
+
+    Arguments:
+    stats: stats to record the stage in, or None to just run it
+    name: stage name
+    input_size: number of items going into the stage, or None if not known
+    function: stage to run
+    args: arguments for the stage
+
+    Return: the result of the stage
+    """
+    if stats is None:
+        return function(*args)
+    return stats.run(name, input_size, function, *args)
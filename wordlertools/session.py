@@ -0,0 +1,272 @@
+"""
+Game sessions that keep the current candidate words between guesses, so each new guess only
+filters the words still left rather than the whole dictionary
+"""
+from collections import OrderedDict
+import threading
+import time
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set
+import uuid
+import wordlertools.pattern_processor as pattern_processor
+from wordlertools.constraints import (
+    WordConstraints,
+    compile_constraints,
+    filter_words,
+    known_letters_to_patterns,
+)
+
+DEFAULT_TTL_SECONDS = 30 * 60
+DEFAULT_MAX_SESSIONS = 10000
+
+
+class GameSession:
+    """State of one game, built up from the patterns for each guess in turn
+
+    What each guess shows about each letter is kept separately, and the patterns for the game
+    so far are rebuilt from it after every guess, as simulator.feedback_to_patterns does from
+    feedback. The number of copies of a letter known to be in the word is the most marked in
+    any one guess, so a letter floating in one guess and locked in a later one is counted once.
+    """
+
+    def __init__(self, base_words: Any, word_length: int):
+        self.base_words = base_words
+        self.word_length = word_length
+        self.locked_pattern = "_" * word_length
+        self.floating_patterns: Set[str] = set()
+        self.excluded_letters = ""
+        self.least: Dict[str, int] = {}
+        self.not_at: Dict[str, Set[int]] = {}
+        self.greyed: Set[str] = set()
+        self.constraints: Optional[WordConstraints] = None
+        self.candidates: Optional[FrozenSet[str]] = None
+        self.last_used = time.monotonic()
+        self._lock = threading.Lock()
+
+    def apply_guess(
+        self,
+        locked_pattern: Optional[str],
+        floating_patterns: Optional[Iterable[str]],
+        excluded_letters: Optional[str],
+    ) -> FrozenSet[str]:
+        """Add the patterns learnt from a guess, and narrow the candidate words
+
+        Arguments:
+        locked_pattern: letters locked into the right position by this guess, e.g. '_a___'
+        floating_patterns: patterns of letters in the word, but not in that position
+        excluded_letters: letters not in the word
+
+        Return: the candidate words left after the guess
+
+        Exception: if a locked letter conflicts with a letter already locked in that position
+        """
+        with self._lock:
+            return self._apply_guess(
+                locked_pattern, floating_patterns, excluded_letters
+            )
+
+    def _apply_guess(
+        self,
+        locked_pattern: Optional[str],
+        floating_patterns: Optional[Iterable[str]],
+        excluded_letters: Optional[str],
+    ) -> FrozenSet[str]:
+        """Unlocked implementation of apply_guess"""
+        guess_locked = (locked_pattern or "").lower()
+        guess_floating = [
+            pattern.lower() for pattern in (floating_patterns or ()) if pattern
+        ]
+        for floater in guess_floating:
+            if len(floater) != self.word_length:
+                raise Exception(
+                    f"Floating pattern length is not valid: {floater} ({len(floater)}) is different to expected length {self.word_length}"
+                )
+        merged = merge_locked_patterns(
+            self.locked_pattern, guess_locked, self.word_length
+        )
+
+        least = dict(self.least)
+        not_at = {letter: set(positions) for letter, positions in self.not_at.items()}
+        for floater in guess_floating:
+            for i, letter in enumerate(floater):
+                if letter != "_":
+                    not_at.setdefault(letter, set()).add(i)
+        marked = set(guess_locked.replace("_", "")).union(*guess_floating) - {"_"}
+        for letter in marked:
+            count = guess_locked.count(letter) + max(
+                (floater.count(letter) for floater in guess_floating), default=0
+            )
+            least[letter] = max(least.get(letter, 0), count)
+        greyed = self.greyed | set((excluded_letters or "").lower())
+
+        locked, floating, excluded = known_letters_to_patterns(
+            merged, least, not_at, greyed, self.word_length
+        )
+        constraints = compile_constraints(locked, floating, excluded, self.word_length)
+
+        if (
+            self.candidates is not None
+            and self.constraints is not None
+            and is_narrowing(self.constraints, constraints)
+        ):
+            candidates = frozenset(filter_words(constraints, self.candidates))
+        else:
+            candidates = frozenset(
+                pattern_processor.get_candidate_words(
+                    locked, floating, excluded, self.base_words, self.word_length
+                )
+            )
+
+        self.locked_pattern = locked
+        self.floating_patterns = floating
+        self.excluded_letters = excluded
+        self.least = least
+        self.not_at = not_at
+        self.greyed = greyed
+        self.constraints = constraints
+        self.candidates = candidates
+        self.last_used = time.monotonic()
+        return candidates
+
+
+def merge_locked_patterns(current: str, new: str, word_length: int) -> str:
+    """Combine two locked patterns into one
+
+    Arguments:
+    current: locked pattern so far
+    new: locked pattern from the latest guess, or empty if nothing new was locked
+    word_length: length of word to be matched
+
+    Return: locked pattern with letters from both
+
+    Exception: if the patterns have different letters locked in the same position
+    """
+    if not new:
+        return current
+    if len(new) != word_length:
+        raise Exception(
+            f"Locked letters provided '{new}' ({len(new)}) do not match the required pattern length of {word_length}"
+        )
+    merged = []
+    for known, letter in zip(current, new.lower()):
+        if known != "_" and letter not in ("_", known):
+            raise Exception(
+                f"Locked letter '{letter}' conflicts with '{known}' already locked"
+            )
+        merged.append(letter if known == "_" else known)
+    return "".join(merged)
+
+
+def is_narrowing(previous: WordConstraints, current: WordConstraints) -> bool:
+    """Check whether every word matching the current constraints also matched the previous
+
+    When true, the current candidates can be found by filtering the previous ones. This
+    isn't always the case, as a locked letter being floated into every other position
+    stops it being counted as a repeat.
+
+    Arguments:
+    previous: constraints for the candidates held so far
+    current: constraints after the latest guess
+
+    Return: True if the current constraints only remove words, otherwise False
+    """
+    if previous.word_length != current.word_length:
+        return False
+    for before, after in zip(previous.allowed_letters, current.allowed_letters):
+        if not after <= before:
+            return False
+    required = {
+        letter: (count, set(positions))
+        for letter, count, positions in current.required_letters
+    }
+    for letter, count, positions in previous.required_letters:
+        if letter not in required:
+            return False
+        current_count, current_positions = required[letter]
+        if current_count < count or not current_positions <= set(positions):
+            return False
+    limits = {
+        letter: (minimum, maximum) for letter, minimum, maximum in current.letter_counts
+    }
+    for letter, minimum, maximum in previous.letter_counts:
+        if letter not in limits:
+            return False
+        current_minimum, current_maximum = limits[letter]
+        if current_minimum < minimum or current_maximum > maximum:
+            return False
+    return set(previous.rejected_patterns) <= set(current.rejected_patterns)
+
+
+class SessionStore:
+    """Thread safe collection of game sessions by id, evicting sessions left unused for
+    longer than their time to live, or the least recently used once full
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, GameSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def create(self, base_words: Any, word_length: int) -> str:
+        """Start a new game session
+
+        Arguments:
+        base_words: words that possible answers will be chosen from
+        word_length: length of word to be matched
+
+        Return: id of the new session
+        """
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self._evict_expired()
+            self._sessions[session_id] = GameSession(base_words, word_length)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session_id
+
+    def get(self, session_id: str) -> Optional[GameSession]:
+        """Get a session, refreshing its time to live
+
+        Arguments:
+        session_id: id returned when the session was created
+
+        Return: the session, or None if it doesn't exist or has expired
+        """
+        with self._lock:
+            self._evict_expired()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.last_used = time.monotonic()
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id: str) -> bool:
+        """End a session
+
+        Arguments:
+        session_id: id returned when the session was created
+
+        Return: True if the session existed, otherwise False
+        """
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _evict_expired(self):
+        """Remove sessions unused for longer than the time to live. Sessions are held in
+        order of last use, so only the oldest need to be checked.
+        """
+        expiry = time.monotonic() - self.ttl_seconds
+        expired: List[str] = []
+        for session_id, session in self._sessions.items():
+            if session.last_used >= expiry:
+                break
+            expired.append(session_id)
+        for session_id in expired:
+            del self._sessions[session_id]
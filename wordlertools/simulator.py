@@ -0,0 +1,363 @@
+"""
+Plays whole games against a list of answers, turning the feedback for each guess back into
+locked, floating and excluded patterns for get_candidate_words, exactly as a player would. Used
+to measure how well a guess strategy solves, and end to end throughput of candidate matching.
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+import random
+import time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+import wordlertools.pattern_processor as pattern_processor
+from wordlertools.constraints import known_letters_to_patterns
+from wordlertools.parallel import split_ranges
+from wordlertools.feedback_matrix import feedback_matrix_path_for, load_feedback_matrix
+from wordlertools.snapshot import is_snapshot_current
+from wordlertools.solver import GREEN, YELLOW, feedback_code, rank_guesses
+from wordlertools.word_store import WordBucket, WordStore
+
+DEFAULT_MAX_GUESSES = 6
+
+# a strategy picks the next guess from the candidates left and the (guess, feedback) so far
+Strategy = Callable[[FrozenSet[str], List[Tuple[str, int]]], str]
+
+
+class SimulationResult(NamedTuple):
+    """Outcome of simulating games against a list of answers
+
+    games: number of games played
+    failures: games not solved within the maximum number of guesses
+    total_guesses: guesses taken across the games that were solved
+    guess_counts: number of solved games for each number of guesses taken
+    seconds: wall time taken to play every game
+    """
+
+    games: int
+    failures: int
+    total_guesses: int
+    guess_counts: Dict[int, int]
+    seconds: float
+
+    @property
+    def average_guesses(self) -> float:
+        """Mean guesses taken over the games that were solved"""
+        solved = self.games - self.failures
+        return self.total_guesses / solved if solved else 0.0
+
+    @property
+    def failure_rate(self) -> float:
+        """Fraction of games not solved"""
+        return self.failures / self.games if self.games else 0.0
+
+    @property
+    def games_per_second(self) -> float:
+        """Games played for each second of wall time"""
+        return self.games / self.seconds if self.seconds else 0.0
+
+
+def feedback_to_patterns(
+    history: Sequence[Tuple[str, int]], word_length: int
+) -> Tuple[str, Set[str], str]:
+    """Turn the feedback from every guess so far into patterns for get_candidate_words
+
+    Green letters are locked. A letter marked grey everywhere in a guess, and never green or
+    yellow, is excluded. For any other letter, the most copies marked green or yellow in one
+    guess is the least number the answer holds, turned into patterns by
+    constraints.known_letters_to_patterns.
+
+    Arguments:
+    history: (guess, feedback code) for each guess so far
+    word_length: length of the words
+
+    Return: tuple of locked pattern, set of floating patterns and excluded letters
+    """
+    locked = ["_"] * word_length
+    least: Dict[str, int] = {}
+    not_at: Dict[str, Set[int]] = {}
+    greyed: Set[str] = set()
+
+    for guess, code in history:
+        marked: Dict[str, int] = {}
+        for i, letter in enumerate(guess):
+            mark = code // 3**i % 3
+            if mark == GREEN:
+                locked[i] = letter
+                marked[letter] = marked.get(letter, 0) + 1
+            elif mark == YELLOW:
+                marked[letter] = marked.get(letter, 0) + 1
+                not_at.setdefault(letter, set()).add(i)
+            else:
+                greyed.add(letter)
+                not_at.setdefault(letter, set()).add(i)
+        for letter, count in marked.items():
+            least[letter] = max(least.get(letter, 0), count)
+
+    return known_letters_to_patterns(locked, least, not_at, greyed, word_length)
+
+
+def play_game(
+    answer: str,
+    base_words: Any,
+    word_length: int,
+    strategy: Strategy,
+    max_guesses: int = DEFAULT_MAX_GUESSES,
+) -> Optional[int]:
+    """Play one game, narrowing the candidates with get_candidate_words after each guess
+
+    Arguments:
+    answer: word to be found
+    base_words: words that possible answers will be chosen from
+    word_length: length of word to be matched
+    strategy: picks each guess from the candidates left and the feedback so far
+    max_guesses: guesses allowed before the game is lost
+
+    Return: number of guesses taken, or None if the answer wasn't found
+    """
+    candidates = frozenset(
+        pattern_processor.get_words_specified_length(word_length, base_words)
+    )
+    history: List[Tuple[str, int]] = []
+    for turn in range(1, max_guesses + 1):
+        guess = strategy(candidates, history)
+        if guess == answer:
+            return turn
+        history.append((guess, feedback_code(guess, answer)))
+        locked, floating, excluded = feedback_to_patterns(history, word_length)
+        # patterns can be looser than the feedback, so drop wrong guesses that still match
+        candidates = frozenset(
+            pattern_processor.get_candidate_words(
+                locked, floating, excluded, base_words, word_length
+            )
+        ).difference(guess for guess, _ in history)
+    return None
+
+
+def first_candidate(candidates: FrozenSet[str], history: List[Tuple[str, int]]) -> str:
+    """Strategy guessing the first candidate alphabetically, the cheapest possible strategy
+
+    Arguments:
+    candidates: words that could still be the answer
+    history: (guess, feedback code) for each guess so far
+
+    Return: next guess
+    """
+    return min(candidates)
+
+
+class EntropyStrategy:
+    """Strategy guessing the word expected to narrow down the candidates the most
+
+    Guesses are picked from the words given, or from the candidates left if none are. The
+    opening guess is the same for every game, so it's worked out once and reused.
+    """
+
+    def __init__(
+        self,
+        word_length: int,
+        guesses: Optional[Union[Sequence[str], WordBucket]] = None,
+        opening: Optional[str] = None,
+        feedback_matrix: Any = None,
+    ):
+        self.word_length = word_length
+        self.guesses = guesses
+        self.opening = opening
+        self.feedback_matrix = feedback_matrix
+
+    def __call__(
+        self, candidates: FrozenSet[str], history: List[Tuple[str, int]]
+    ) -> str:
+        if len(candidates) <= 2:
+            return min(candidates)
+        if not history and self.opening is not None:
+            return self.opening
+        guesses = self.guesses if self.guesses is not None else candidates
+        ((guess, _),) = rank_guesses(
+            guesses, candidates, self.word_length, 1, self.feedback_matrix
+        )
+        if not history:
+            self.opening = guess
+        return guess
+
+
+# set in each worker process by _init_worker
+_worker_base_words: Any = None
+_worker_word_length = 0
+_worker_strategy: Optional[Strategy] = None
+_worker_max_guesses = DEFAULT_MAX_GUESSES
+
+
+def _init_worker(
+    base_words: Any, word_length: int, strategy: Strategy, max_guesses: int
+):
+    """Hold the dictionary and strategy for the life of a worker process
+
+    Arguments:
+    base_words: words that possible answers will be chosen from
+    word_length: length of word to be matched
+    strategy: picks each guess
+    max_guesses: guesses allowed before a game is lost
+    """
+    global _worker_base_words, _worker_word_length, _worker_strategy, _worker_max_guesses
+    _worker_base_words = base_words
+    _worker_word_length = word_length
+    _worker_strategy = strategy
+    _worker_max_guesses = max_guesses
+
+
+def _play_games(answers: Sequence[str]) -> List[Optional[int]]:
+    """Play a game against each of a chunk of answers in a worker
+
+    Arguments:
+    answers: words to be found
+
+    Return: guesses taken for each answer, or None where it wasn't found
+    """
+    return [
+        play_game(
+            answer,
+            _worker_base_words,
+            _worker_word_length,
+            _worker_strategy,
+            _worker_max_guesses,
+        )
+        for answer in answers
+    ]
+
+
+def simulate(
+    answers: Sequence[str],
+    base_words: Any,
+    word_length: int,
+    strategy: Strategy = first_candidate,
+    max_guesses: int = DEFAULT_MAX_GUESSES,
+    workers: Optional[int] = None,
+    chunks_per_worker: int = 4,
+) -> SimulationResult:
+    """Play a game against every answer, spread across worker processes
+
+    Arguments:
+    answers: words to be found, one game each
+    base_words: words that possible answers will be chosen from
+    word_length: length of word to be matched
+    strategy: picks each guess. Workers are forked where possible, so it needn't be picklable
+    max_guesses: guesses allowed before a game is lost
+    workers: number of worker processes, defaulting to the number of CPUs. With 1, games are
+    played in this process
+    chunks_per_worker: number of chunks of answers for each worker, to even out slow games
+
+    Return: summary of the games played
+    """
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+
+    if workers == 1:
+        _init_worker(base_words, word_length, strategy, max_guesses)
+        results = _play_games(answers)
+    else:
+        start_methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context(
+            "fork" if "fork" in start_methods else None
+        )
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(base_words, word_length, strategy, max_guesses),
+        ) as executor:
+            futures = [
+                executor.submit(_play_games, answers[first:last])
+                for first, last in split_ranges(
+                    len(answers), workers * chunks_per_worker
+                )
+                if last > first
+            ]
+            results = [turns for future in futures for turns in future.result()]
+
+    guess_counts: Dict[int, int] = {}
+    for turns in results:
+        if turns is not None:
+            guess_counts[turns] = guess_counts.get(turns, 0) + 1
+
+    return SimulationResult(
+        games=len(results),
+        failures=sum(1 for turns in results if turns is None),
+        total_guesses=sum(turns for turns in results if turns is not None),
+        guess_counts=dict(sorted(guess_counts.items())),
+        seconds=time.perf_counter() - start,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Play a game against every answer in a word list and report how it went"
+    )
+    parser.add_argument(
+        "filename", nargs="?", default="./data/words_alpha.txt", help="word list"
+    )
+    parser.add_argument(
+        "-w", "--word_length", type=int, default=5, help="length of words"
+    )
+    parser.add_argument(
+        "-n", "--sample", type=int, help="play against this many random answers"
+    )
+    parser.add_argument(
+        "-s",
+        "--strategy",
+        choices=["first", "entropy"],
+        default="first",
+        help="how each guess is picked",
+    )
+    parser.add_argument("-j", "--workers", type=int, help="worker processes")
+    parser.add_argument(
+        "-g", "--max_guesses", type=int, default=DEFAULT_MAX_GUESSES, help="guesses"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed for --sample")
+    args = parser.parse_args()
+
+    with open(args.filename, "r", encoding="utf8") as word_file:
+        store = WordStore(word_file.read().split())
+    words = list(store.bucket(args.word_length).words)
+    if args.sample:
+        words = random.Random(args.seed).sample(words, min(args.sample, len(words)))
+
+    chosen_strategy: Strategy = first_candidate
+    if args.strategy == "entropy":
+        matrix_path = feedback_matrix_path_for(args.filename)
+        chosen_strategy = EntropyStrategy(
+            args.word_length,
+            feedback_matrix=(
+                load_feedback_matrix(matrix_path)
+                if is_snapshot_current(args.filename, matrix_path)
+                else None
+            ),
+        )
+        # work the opening guess out once, before the workers start
+        chosen_strategy(frozenset(store.bucket(args.word_length).words), [])
+
+    result = simulate(
+        words,
+        store,
+        args.word_length,
+        chosen_strategy,
+        args.max_guesses,
+        args.workers,
+    )
+    print(f"games: {result.games}")
+    print(f"average guesses: {result.average_guesses:.3f}")
+    print(f"failure rate: {result.failure_rate:.2%}")
+    print(f"games per second: {result.games_per_second:.1f}")
+    print(f"guesses taken: {result.guess_counts}")
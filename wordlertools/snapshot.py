@@ -0,0 +1,164 @@
+"""
+Compact binary snapshot of a word list, compiled once from the text dictionary and then opened
+with mmap so words and letter masks are read in place rather than parsed on every start
+"""
+import argparse
+import mmap
+import os
+import struct
+import sys
+from typing import Iterator, List, Sequence, Union, overload
+from wordlertools.constraints import letter_mask
+from wordlertools.word_store import WordBucket, WordStore
+
+MAGIC = b"WORDLER1"
+HEADER = struct.Struct("<8sI")
+BUCKET_ENTRY = struct.Struct("<IIQQ")
+SNAPSHOT_SUFFIX = ".snapshot"
+
+
+class PackedWords(Sequence[str]):
+    """Read only sequence over fixed width words packed back to back in a buffer"""
+
+    def __init__(self, buffer: mmap.mmap, offset: int, word_length: int, count: int):
+        self._buffer = buffer
+        self._offset = offset
+        self._word_length = word_length
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    @overload
+    def __getitem__(self, index: int) -> str:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[str]:
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("word index out of range")
+        start = self._offset + index * self._word_length
+        return self._buffer[start : start + self._word_length].decode("ascii")
+
+    def __iter__(self) -> Iterator[str]:
+        end = self._offset + self._count * self._word_length
+        text = self._buffer[self._offset : end].decode("ascii")
+        for start in range(0, len(text), self._word_length):
+            yield text[start : start + self._word_length]
+
+
+def snapshot_path_for(filename: str) -> str:
+    """Get the path of the snapshot compiled from a text word list
+
+    Arguments:
+    filename: the text file containing words
+
+    Return: path for the snapshot, next to the text file
+    """
+    return os.path.splitext(filename)[0] + SNAPSHOT_SUFFIX
+
+
+def compile_snapshot(store: WordStore, snapshot_path: str):
+    """Write the words in a store out as a binary snapshot
+
+    The file holds a header, a table giving each bucket's word length, word count and the
+    offsets of its data, then for each bucket the words packed at a fixed width followed by
+    a little endian 32 bit letter mask per word, in the same order as the words.
+
+    Arguments:
+    store: store of words to be written
+    snapshot_path: file to write the snapshot to
+    """
+    lengths = store.lengths()
+    offset = HEADER.size + BUCKET_ENTRY.size * len(lengths)
+    entries = []
+    blocks = []
+
+    for length in lengths:
+        words = store.bucket(length).words
+        packed = "".join(words).encode("ascii")
+        masks = struct.pack(f"<{len(words)}I", *(letter_mask(word) for word in words))
+        padding = b"\0" * (-(offset + len(packed)) % 4)
+        entries.append(
+            BUCKET_ENTRY.pack(
+                length, len(words), offset, offset + len(packed) + len(padding)
+            )
+        )
+        blocks.extend([packed, padding, masks])
+        offset += len(packed) + len(padding) + len(masks)
+
+    with open(snapshot_path, "wb") as snapshot_file:
+        snapshot_file.write(HEADER.pack(MAGIC, len(lengths)))
+        snapshot_file.writelines(entries)
+        snapshot_file.writelines(blocks)
+
+
+def load_snapshot(snapshot_path: str) -> WordStore:
+    """Open a snapshot as a word store, without copying the words out of the file
+
+    Arguments:
+    snapshot_path: file written by compile_snapshot
+
+    Return: store of words backed by the memory mapped file
+
+    Exception: if the file isn't a snapshot
+    """
+    with open(snapshot_path, "rb") as snapshot_file:
+        buffer = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, bucket_count = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise Exception(f"'{snapshot_path}' is not a word snapshot")
+
+    buckets = []
+    for i in range(bucket_count):
+        length, count, words_offset, masks_offset = BUCKET_ENTRY.unpack_from(
+            buffer, HEADER.size + i * BUCKET_ENTRY.size
+        )
+        masks: Sequence[int] = memoryview(buffer)[
+            masks_offset : masks_offset + count * 4
+        ].cast("I")
+        if sys.byteorder != "little":
+            masks = struct.unpack(f"<{count}I", masks.tobytes())
+        buckets.append(
+            WordBucket(length, PackedWords(buffer, words_offset, length, count), masks)
+        )
+
+    return WordStore.from_buckets(buckets)
+
+
+def is_snapshot_current(filename: str, snapshot_path: str) -> bool:
+    """Check a snapshot exists, and was compiled after the text word list last changed
+
+    Arguments:
+    filename: the text file containing words
+    snapshot_path: the snapshot compiled from it
+
+    Return: True if the snapshot can be used in place of the text file, otherwise False
+    """
+    if not os.path.exists(snapshot_path):
+        return False
+    return os.path.getmtime(snapshot_path) >= os.path.getmtime(filename)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compile a text word list into a binary snapshot"
+    )
+    parser.add_argument(
+        "filename", nargs="?", default="./data/words_alpha.txt", help="word list"
+    )
+    parser.add_argument("-o", "--output", help="snapshot file to write")
+    args = parser.parse_args()
+
+    output = args.output or snapshot_path_for(args.filename)
+    with open(args.filename, "r", encoding="utf8") as word_file:
+        compile_snapshot(WordStore(word_file.read().split()), output)
+    print(f"Wrote {output}")
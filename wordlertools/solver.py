@@ -0,0 +1,408 @@
+"""
+Suggests the next guess, scoring each allowed guess by how much it's expected to narrow down the
+candidate words. Each guess splits the candidates into groups by the feedback it would get if
+that candidate were the answer, and guesses are ranked by the entropy of that split.
+
+Feedback is encoded as one base 3 digit per position, 0 for a letter not in the word (grey), 1
+for a letter in the wrong position (yellow) and 2 for a letter in the right position (green),
+with the first position as the lowest digit. With numpy installed, feedback is worked out for
+a chunk of guesses against every candidate at once.
+"""
+from collections import Counter
+import heapq
+import math
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
+from wordlertools.constraints import Query
+import wordlertools.pattern_processor as pattern_processor
+from wordlertools.numpy_backend import NumpyBucket, is_available, load_numpy
+from wordlertools.query_stats import QueryStats, run_stage
+from wordlertools.word_store import WordBucket, WordStore
+
+if TYPE_CHECKING:
+    import numpy as np
+
+GREY = 0
+YELLOW = 1
+GREEN = 2
+
+# pairs of guess and answer worked out together, bounding memory used for each chunk
+CHUNK_PAIRS = 1 << 20
+
+
+def feedback_code(guess: str, answer: str) -> int:
+    """Work out the feedback for a guess if the word is the answer
+
+    Letters are marked green first. Each remaining letter is then marked yellow, in order from
+    the start of the guess, while the answer still has an unmatched copy of it, so a repeated
+    letter is only marked as many times as it appears in the answer.
+
+    Arguments:
+    guess: word guessed
+    answer: word being guessed, of the same length
+
+    Return: feedback encoded as base 3 digits
+    """
+    unmatched = Counter(
+        answer_letter
+        for letter, answer_letter in zip(guess, answer)
+        if letter != answer_letter
+    )
+    code = 0
+    for i, (letter, answer_letter) in enumerate(zip(guess, answer)):
+        if letter == answer_letter:
+            code += GREEN * 3**i
+        elif unmatched[letter] > 0:
+            unmatched[letter] -= 1
+            code += YELLOW * 3**i
+    return code
+
+
+def partition_entropy(group_sizes: Iterable[int]) -> float:
+    """Entropy, in bits, of splitting words into groups
+
+    Arguments:
+    group_sizes: number of words in each group
+
+    Return: expected information from learning which group the answer is in
+    """
+    sizes = [size for size in group_sizes if size]
+    total = sum(sizes)
+    if total == 0:
+        return 0.0
+    return math.log2(total) - sum(size * math.log2(size) for size in sizes) / total
+
+
+def score_guesses(
+    guesses: Sequence[str],
+    answers: Sequence[str],
+    word_length: int,
+    guess_matrix: Optional[NumpyBucket] = None,
+    feedback_matrix: Any = None,
+) -> List[float]:
+    """Score each guess by the entropy of the feedback it gets across the possible answers
+
+    Arguments:
+    guesses: words that can be guessed
+    answers: words that could still be the answer
+    word_length: length of the words
+    guess_matrix: letter matrices already built for the guesses, in the same order
+    feedback_matrix: precomputed FeedbackMatrix to look feedback up in, used when it holds
+    every guess and answer
+
+    Return: entropy in bits for each guess, in the same order as the guesses
+    """
+    if not guesses:
+        return []
+    if not answers:
+        return [0.0] * len(guesses)
+    if not is_available():
+        return [
+            partition_entropy(
+                Counter(feedback_code(guess, answer) for answer in answers).values()
+            )
+            for guess in guesses
+        ]
+
+    np = load_numpy()
+    if (
+        feedback_matrix is not None
+        and feedback_matrix.word_length == word_length
+        and feedback_matrix.covers(guesses)
+        and feedback_matrix.covers(answers)
+    ):
+        guess_ids = np.array([feedback_matrix.word_ids[word] for word in guesses])
+        answer_ids = np.array([feedback_matrix.word_ids[word] for word in answers])
+
+        def chunk_codes(start: int, end: int) -> "np.ndarray":
+            return feedback_matrix.array[np.ix_(guess_ids[start:end], answer_ids)]
+
+    else:
+        if guess_matrix is None:
+            guess_matrix = NumpyBucket(guesses, word_length)
+        guess_letters = guess_matrix.letters
+        answer_matrix = NumpyBucket(answers, word_length)
+
+        def chunk_codes(start: int, end: int) -> "np.ndarray":
+            return feedback_codes(guess_letters[start:end], answer_matrix)
+
+    return _score_guesses_numpy(chunk_codes, len(guesses), len(answers), word_length)
+
+
+def code_size(word_length: int) -> int:
+    """Smallest number of bytes, a power of two, holding every feedback code for a word length
+
+    Arguments:
+    word_length: length of the words
+
+    Return: bytes for each feedback code
+    """
+    size = 1
+    while 3**word_length > 1 << 8 * size:
+        size *= 2
+    return size
+
+
+def code_dtype(word_length: int) -> "np.dtype":
+    """Smallest little endian unsigned integer type holding every feedback code for a word length
+
+    Arguments:
+    word_length: length of the words
+
+    Return: numpy dtype for feedback codes
+    """
+    return load_numpy().dtype(f"<u{code_size(word_length)}")
+
+
+def feedback_codes(guess_letters: "np.ndarray", answers: NumpyBucket) -> "np.ndarray":
+    """Work out feedback for a chunk of guesses against every answer at once
+
+    For a guess with no repeated letters, a letter that isn't green is yellow whenever the
+    answer contains it. Guesses with repeated letters need the copies counting, so are worked
+    out separately by _repeated_feedback_codes.
+
+    Arguments:
+    guess_letters: C x L matrix of letter codes for the guesses
+    answers: answers as letter and letter count matrices
+
+    Return: C x A matrix of feedback codes
+    """
+    np = load_numpy()
+    dtype = code_dtype(answers.word_length)
+    answer_letters = answers.letters.T
+    present = answers.counts.T > 0
+    codes = np.zeros((len(guess_letters), len(answers)), dtype=dtype)
+    for i in range(answers.word_length):
+        letter = guess_letters[:, i]
+        green = letter[:, None] == answer_letters[i]
+        codes += green.astype(dtype) * dtype.type(GREEN * 3**i)
+        codes += (present[letter] & ~green).astype(dtype) * dtype.type(YELLOW * 3**i)
+
+    ordered = np.sort(guess_letters, axis=1)
+    repeated = np.flatnonzero((ordered[:, 1:] == ordered[:, :-1]).any(axis=1))
+    if len(repeated):
+        codes[repeated] = _repeated_feedback_codes(guess_letters[repeated], answers)
+    return codes
+
+
+def _repeated_feedback_codes(
+    guess_letters: "np.ndarray", answers: NumpyBucket
+) -> "np.ndarray":
+    """Work out feedback for guesses that can have repeated letters
+
+    A letter that isn't green is yellow when the answer has more copies of it that aren't
+    matched by a green than there are earlier positions in the guess with the same letter
+    that aren't green.
+
+    Arguments:
+    guess_letters: C x L matrix of letter codes for the guesses
+    answers: answers as letter and letter count matrices
+
+    Return: C x A matrix of feedback codes
+    """
+    np = load_numpy()
+    dtype = code_dtype(answers.word_length)
+    word_length = answers.word_length
+    answer_letters = answers.letters.T
+    answer_counts = answers.counts.T.astype(np.int16)
+    green = [guess_letters[:, [i]] == answer_letters[i] for i in range(word_length)]
+    same = guess_letters[:, :, None] == guess_letters[:, None, :]
+
+    codes = np.zeros((len(guess_letters), len(answers)), dtype=dtype)
+    for i in range(word_length):
+        unmatched = answer_counts[guess_letters[:, i]]
+        earlier = np.zeros(unmatched.shape, dtype=np.int16)
+        for j in range(word_length):
+            same_letter = same[:, i, [j]]
+            unmatched -= green[j] & same_letter
+            if j < i:
+                earlier += ~green[j] & same_letter
+        yellow = ~green[i] & (earlier < unmatched)
+        codes += green[i].astype(dtype) * dtype.type(GREEN * 3**i)
+        codes += yellow.astype(dtype) * dtype.type(YELLOW * 3**i)
+    return codes
+
+
+def _score_guesses_numpy(
+    chunk_codes: Callable[[int, int], "np.ndarray"],
+    guess_count: int,
+    answer_count: int,
+    word_length: int,
+) -> List[float]:
+    """Vectorised implementation of score_guesses
+
+    Arguments:
+    chunk_codes: gets the feedback codes for guesses from start to end against every answer
+    guess_count: number of guesses
+    answer_count: number of answers
+    word_length: length of the words
+
+    Return: entropy in bits for each guess
+    """
+    np = load_numpy()
+    code_count = 3**word_length
+    chunk_size = max(1, CHUNK_PAIRS // answer_count)
+    scores: List[float] = []
+
+    for start in range(0, guess_count, chunk_size):
+        codes = chunk_codes(start, start + chunk_size)
+        rows = codes.shape[0]
+
+        if code_count <= answer_count * 4:
+            # count each feedback code for each guess in one pass, as a row per guess
+            offsets = np.arange(rows, dtype=np.int64)[:, None] * code_count
+            group_sizes = np.bincount(
+                (codes + offsets).ravel(), minlength=rows * code_count
+            ).reshape(rows, code_count)
+            weighted = (
+                group_sizes * np.log2(np.maximum(group_sizes, 1), dtype=np.float64)
+            ).sum(axis=1)
+        else:
+            # sorted codes come in runs, one for each group of answers with the same feedback
+            codes = np.sort(codes, axis=1)
+            starts = np.ones(codes.shape, dtype=bool)
+            starts[:, 1:] = codes[:, 1:] != codes[:, :-1]
+            run_starts = np.flatnonzero(starts)
+            run_sizes = np.diff(np.append(run_starts, codes.size))
+            weighted = np.bincount(
+                run_starts // answer_count,
+                weights=run_sizes * np.log2(run_sizes),
+                minlength=rows,
+            )
+        scores.extend((math.log2(answer_count) - weighted / answer_count).tolist())
+
+    return scores
+
+
+def sample_answers(answers: Sequence[str], max_answers: Optional[int]) -> Sequence[str]:
+    """Pick answers evenly spaced through a list, when there are more than wanted
+
+    Arguments:
+    answers: answers in order
+    max_answers: most answers to keep, or None to keep them all
+
+    Return: the answers kept, in the same order
+    """
+    if max_answers is None or len(answers) <= max_answers:
+        return answers
+    return [answers[i * len(answers) // max_answers] for i in range(max_answers)]
+
+
+def rank_guesses(
+    guesses: Union[Iterable[str], WordBucket],
+    answers: Iterable[str],
+    word_length: int,
+    top_k: int = 5,
+    feedback_matrix: Any = None,
+    max_answers: Optional[int] = None,
+) -> List[Tuple[str, float]]:
+    """Rank guesses by the entropy of the feedback they get across the possible answers
+
+    Where guesses score the same, those that could be the answer come first, then
+    alphabetically. Scoring takes time in proportion to the number of guesses times the number
+    of answers, so it can be bounded by scoring against a sample of the answers, evenly spaced
+    through them in alphabetical order.
+
+    Arguments:
+    guesses: words that can be guessed, or a bucket from a WordStore to reuse the letter
+    matrices it holds
+    answers: words that could still be the answer
+    word_length: length of the words
+    top_k: number of guesses to return
+    feedback_matrix: precomputed FeedbackMatrix to look feedback up in
+    max_answers: if given, score against at most this many of the answers
+
+    Return: list of (guess, entropy in bits), best first
+    """
+    guess_matrix = None
+    if isinstance(guesses, WordBucket):
+        if is_available():
+            guess_matrix = guesses.numpy
+        guesses = guesses.words
+    else:
+        guesses = sorted(set(word for word in guesses if len(word) == word_length))
+    answer_set = set(answers)
+    scored_answers = sample_answers(sorted(answer_set), max_answers)
+    scores = score_guesses(
+        guesses, scored_answers, word_length, guess_matrix, feedback_matrix
+    )
+    ranked = heapq.nsmallest(
+        top_k,
+        zip(guesses, scores),
+        key=lambda scored: (
+            -round(scored[1], 9),
+            scored[0] not in answer_set,
+            scored[0],
+        ),
+    )
+    return [(guess, score) for guess, score in ranked]
+
+
+def suggest_guesses(
+    locked_pattern: Union[str, Query, None],
+    floating_patterns: Optional[Set[str]],
+    excluded_letters: Optional[str],
+    base_words: Any,
+    word_length: int,
+    top_k: int = 5,
+    candidates_only: bool = False,
+    feedback_matrix: Any = None,
+    stats: Optional[QueryStats] = None,
+    max_answers: Optional[int] = None,
+) -> List[Tuple[str, float]]:
+    """Suggest the next guesses, as the words expected to narrow down the candidates the most
+
+    Arguments:
+    locked_pattern: string, known to be the right position in word, or a Query already built
+    for the patterns
+    floating_patterns: set of strings with letters known to be in word, but not in that position
+    excluded_letters: string containing letters not in word
+    base_words: set of words loaded in from source, a WordStore or a WordIndex
+    word_length: length of word to be matched
+    top_k: number of guesses to return
+    candidates_only: only suggest words that could be the answer, rather than any word
+    feedback_matrix: precomputed FeedbackMatrix to look feedback up in, rather than working
+    feedback out for every pair
+    stats: if given, the time taken by each stage, including ranking the guesses, is
+    recorded here
+    max_answers: if given, score guesses against at most this many of the candidates, to
+    bound the time taken when there are many
+
+    Return: list of (guess, entropy in bits), best first
+    """
+    candidate_words = pattern_processor.get_candidate_words(
+        locked_pattern,
+        floating_patterns,
+        excluded_letters,
+        base_words,
+        word_length,
+        stats=stats,
+    )
+    if candidates_only:
+        guesses: Union[Iterable[str], WordBucket] = candidate_words
+    elif isinstance(base_words, WordStore):
+        guesses = base_words.bucket(word_length)
+    else:
+        guesses = base_words
+    return run_stage(
+        stats,
+        "rank_guesses",
+        len(candidate_words),
+        rank_guesses,
+        guesses,
+        candidate_words,
+        word_length,
+        top_k,
+        feedback_matrix,
+        max_answers,
+    )
@@ -0,0 +1,180 @@
+"""
+Precomputed bitset index over a list of words, so that queries become a handful of
+bitwise operations rather than a loop over every word
+"""
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+from wordlertools.constraints import WordConstraints
+
+
+class WordIndex:
+    """Index of words of a single length
+
+    Each word is given an id from its position in the sorted word list. For every (position, letter)
+    pair, and every letter contained anywhere in a word, a bitset is held with the bit for each
+    matching word id set. For each letter there is also a bitset of the words holding at least
+    one copy, at least two copies, and so on, so limits on the number of copies are a single
+    bitwise operation. Bitsets are plain Python integers.
+    """
+
+    def __init__(self, words: Iterable[str], word_length: int):
+        self.word_length = word_length
+        self.words: Tuple[str, ...] = tuple(
+            sorted(word for word in words if len(word) == word_length)
+        )
+        self.all_words = (1 << len(self.words)) - 1
+
+        size = (len(self.words) + 7) // 8
+        positions: List[Dict[str, bytearray]] = [{} for _ in range(word_length)]
+        copies: Dict[str, List[bytearray]] = {}
+
+        for word_id, word in enumerate(self.words):
+            offset, bit = divmod(word_id, 8)
+            flag = 1 << bit
+            for i, letter in enumerate(word):
+                positions[i].setdefault(letter, bytearray(size))[offset] |= flag
+            for letter in set(word):
+                letter_copies = copies.setdefault(letter, [])
+                for count in range(word.count(letter)):
+                    if count == len(letter_copies):
+                        letter_copies.append(bytearray(size))
+                    letter_copies[count][offset] |= flag
+
+        self.positions: Tuple[Dict[str, int], ...] = tuple(
+            {letter: int.from_bytes(data, "little") for letter, data in column.items()}
+            for column in positions
+        )
+        # copies[letter][n] holds words with more than n copies of the letter
+        self.copies: Dict[str, Tuple[int, ...]] = {
+            letter: tuple(int.from_bytes(data, "little") for data in letter_copies)
+            for letter, letter_copies in copies.items()
+        }
+        self.contains: Dict[str, int] = {
+            letter: letter_copies[0] for letter, letter_copies in self.copies.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.words)
+
+    def match_bits(self, constraints: WordConstraints) -> int:
+        """Evaluate constraints against the index
+
+        Arguments:
+        constraints: constraints compiled for the query
+
+        Return: bitset with the ids of all matching words set
+        """
+        if constraints.word_length != self.word_length:
+            return 0
+
+        bits = self.all_words
+
+        # letters not allowed in any position can be removed in one step
+        anywhere = set().union(*constraints.allowed_letters)
+        for letter, word_bits in self.contains.items():
+            if letter not in anywhere:
+                bits &= ~word_bits
+
+        for column, allowed in zip(self.positions, constraints.allowed_letters):
+            if len(allowed) == 1:
+                (letter,) = allowed
+                bits &= column.get(letter, 0)
+                continue
+            for letter, word_bits in column.items():
+                if letter in anywhere and letter not in allowed:
+                    bits &= ~word_bits
+
+        for letter, count, positions in constraints.required_letters:
+            bits &= self._at_least(
+                count, [self.positions[i].get(letter, 0) for i in positions]
+            )
+
+        for pattern in constraints.rejected_patterns:
+            rejected = self.all_words
+            for i, letter in pattern:
+                rejected &= self.positions[i].get(letter, 0)
+            bits &= ~rejected
+
+        for letter, minimum, maximum in constraints.letter_counts:
+            letter_copies = self.copies.get(letter, ())
+            if minimum > len(letter_copies):
+                return 0
+            if minimum > 0:
+                bits &= letter_copies[minimum - 1]
+            if maximum < len(letter_copies):
+                bits &= ~letter_copies[maximum]
+
+        return bits
+
+    def query(self, constraints: WordConstraints) -> Set[str]:
+        """Get the words that match the constraints
+
+        Arguments:
+        constraints: constraints compiled for the query
+
+        Return: set of words that match
+        """
+        return self.words_from_bits(self.match_bits(constraints))
+
+    def iter_query(self, constraints: WordConstraints) -> Iterator[str]:
+        """Yield the words that match the constraints in word order, only looking up each
+        word as it's needed
+
+        Arguments:
+        constraints: constraints compiled for the query
+
+        Return: iterator over matching words
+        """
+        for word_id in bit_ids(self.match_bits(constraints)):
+            yield self.words[word_id]
+
+    def words_from_bits(self, bits: int) -> Set[str]:
+        """Convert a bitset of word ids back into words
+
+        Arguments:
+        bits: bitset of word ids
+
+        Return: set of words with their bit set
+        """
+        return {self.words[word_id] for word_id in bit_ids(bits)}
+
+    def _at_least(self, count: int, bitsets: List[int]) -> int:
+        """Bitset of words set in at least count of the bitsets given
+
+        Arguments:
+        count: minimum number of bitsets a word must be set in
+        bitsets: bitsets to be counted across
+
+        Return: bitset of words meeting the count
+        """
+        if count <= 0:
+            return self.all_words
+        if count == 1:
+            result = 0
+            for word_bits in bitsets:
+                result |= word_bits
+            return result
+
+        # at_least[j] holds words seen in j or more of the bitsets processed so far
+        at_least = [self.all_words] + [0] * count
+        for word_bits in bitsets:
+            for j in range(count, 0, -1):
+                at_least[j] |= at_least[j - 1] & word_bits
+        return at_least[count]
+
+
+def bit_ids(bits: int) -> Iterator[int]:
+    """Yield the ids of the set bits in a bitset, lowest first
+
+    Arguments:
+    bits: bitset to be decoded
+
+    Return: iterator over the set bit positions
+    """
+    binary = bin(bits)[:1:-1]
+    word_id = binary.find("1")
+    while word_id != -1:
+        yield word_id
+        word_id = binary.find("1", word_id + 1)
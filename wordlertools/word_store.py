@@ -0,0 +1,295 @@
+"""
+Dictionary words bucketed by length, so queries only ever touch words of the length being
+solved for
+"""
+from collections import Counter
+from itertools import count
+import threading
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+from wordlertools.constraints import (
+    WordConstraints,
+    build_letter_masks,
+    word_matches_constraints,
+)
+from wordlertools.letter_frequency import LetterCounts
+from wordlertools.numpy_backend import NumpyBucket
+from wordlertools.word_index import WordIndex
+
+# a bucket is scanned directly for its first queries, then indexed once it's being reused
+INDEX_AFTER_QUERIES = 2
+
+_store_versions = count(1)
+
+
+class WordBucket:
+    """Words of a single length, with their letter masks, set view and bitset index built
+    the first time each is needed and then shared
+
+    Words can be any sequence, such as a view over a memory mapped snapshot. If a letter mask
+    for each word is supplied, in the same order as the words, scans reject words on their
+    mask before the word itself is read.
+    """
+
+    def __init__(
+        self,
+        word_length: int,
+        words: Sequence[str],
+        mask_array: Optional[Sequence[int]] = None,
+    ):
+        self.word_length = word_length
+        self.words: Sequence[str] = words
+        self.mask_array = mask_array
+        self._word_set: Optional[FrozenSet[str]] = None
+        self._masks: Optional[Dict[str, int]] = None
+        self._index: Optional[WordIndex] = None
+        self._numpy: Optional[NumpyBucket] = None
+        self._letter_counts: Optional[LetterCounts] = None
+        self._queries = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.words)
+
+    @property
+    def word_set(self) -> FrozenSet[str]:
+        """Immutable set of the words in the bucket"""
+        if self._word_set is None:
+            with self._lock:
+                if self._word_set is None:
+                    self._word_set = frozenset(self.words)
+        return self._word_set
+
+    @property
+    def masks(self) -> Dict[str, int]:
+        """Letter mask for each word in the bucket"""
+        if self._masks is None:
+            with self._lock:
+                if self._masks is None:
+                    if self.mask_array is None:
+                        self._masks = build_letter_masks(self.words)
+                    else:
+                        self._masks = dict(zip(self.words, self.mask_array))
+        return self._masks
+
+    @property
+    def index(self) -> WordIndex:
+        """Bitset index over the words in the bucket"""
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = WordIndex(self.words, self.word_length)
+        return self._index
+
+    @property
+    def numpy(self) -> NumpyBucket:
+        """Letter and letter count matrices over the words in the bucket, for the numpy backend"""
+        if self._numpy is None:
+            with self._lock:
+                if self._numpy is None:
+                    self._numpy = NumpyBucket(self.words, self.word_length)
+        return self._numpy
+
+    @property
+    def letter_counts(self) -> LetterCounts:
+        """Letter count vector for each word in the bucket, and the frequency tables for all of
+        them, for working out letter frequencies of candidate words
+        """
+        if self._letter_counts is None:
+            with self._lock:
+                if self._letter_counts is None:
+                    self._letter_counts = LetterCounts(self.words, self.word_length)
+        return self._letter_counts
+
+    def query(self, constraints: WordConstraints) -> Set[str]:
+        """Get the words in the bucket that match the constraints
+
+        Arguments:
+        constraints: constraints compiled for the query
+
+        Return: set of words that match
+        """
+        self._queries += 1
+        if self._index is None and self._queries < INDEX_AFTER_QUERIES:
+            return self._scan(constraints)
+        return self.index.query(constraints)
+
+    def iter_query(self, constraints: WordConstraints) -> Iterator[str]:
+        """Yield the words in the bucket that match the constraints, in word order, without
+        checking any more words than needed to produce each one
+
+        Arguments:
+        constraints: constraints compiled for the query
+
+        Return: iterator over matching words
+        """
+        if self._index is not None:
+            return self._index.iter_query(constraints)
+        return self._iter_scan(constraints)
+
+    def _scan(self, constraints: WordConstraints) -> Set[str]:
+        """Check each word in the bucket against the constraints in turn
+
+        Arguments:
+        constraints: constraints compiled for the query
+
+        Return: set of words that match
+        """
+        return set(self._iter_scan(constraints))
+
+    def _iter_scan(self, constraints: WordConstraints) -> Iterator[str]:
+        """Check each word in the bucket against the constraints in turn, yielding matches
+
+        Arguments:
+        constraints: constraints compiled for the query
+
+        Return: iterator over matching words
+        """
+        if self.mask_array is None:
+            for word in self.words:
+                if word_matches_constraints(constraints, word):
+                    yield word
+            return
+
+        excluded_mask = constraints.excluded_mask
+        required_mask = constraints.required_mask
+        for word_id, mask in enumerate(self.mask_array):
+            if mask & excluded_mask or mask & required_mask != required_mask:
+                continue
+            word = self.words[word_id]
+            if word_matches_constraints(constraints, word):
+                yield word
+
+
+class WordStore:
+    """Collection of dictionary words, split into a bucket for each length the first time that
+    length is asked for
+
+    Only the number of words of each length is worked out when the store is created. Buckets,
+    and the indexes built over them, are made for the lengths queried and then kept, so a
+    store that is only ever asked about one length never sorts or holds the others.
+
+    Each store is given a version number unique within the process, so results cached
+    against one store are never returned for another.
+    """
+
+    def __init__(self, words: Iterable[str]):
+        self._unbucketed: Tuple[str, ...] = tuple(set(words))
+        self._sizes: Dict[int, int] = dict(Counter(map(len, self._unbucketed)))
+        self._buckets: Dict[int, WordBucket] = {}
+        self._size = len(self._unbucketed)
+        self._lock = threading.Lock()
+        self.version = next(_store_versions)
+
+    @classmethod
+    def from_buckets(cls, buckets: Iterable[WordBucket]) -> "WordStore":
+        """Create a store from buckets that have already been split by length
+
+        Arguments:
+        buckets: buckets of words, each holding a different word length
+
+        Return: store holding the buckets
+        """
+        store = cls(())
+        store._buckets = {bucket.word_length: bucket for bucket in buckets}
+        store._sizes = {
+            length: len(bucket) for length, bucket in store._buckets.items()
+        }
+        store._size = sum(store._sizes.values())
+        return store
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[str]:
+        buckets = self.buckets(self.lengths())
+        for length in self.lengths():
+            yield from buckets[length]
+
+    def __contains__(self, word: object) -> bool:
+        return (
+            isinstance(word, str)
+            and len(word) in self._sizes
+            and word in self.bucket(len(word)).word_set
+        )
+
+    def lengths(self) -> Tuple[int, ...]:
+        """Get the word lengths held in the store, shortest first"""
+        return tuple(sorted(self._sizes))
+
+    def bucket(self, length: int) -> WordBucket:
+        """Get the bucket of words of a given length
+
+        Arguments:
+        length: length of words in the bucket
+
+        Return: the bucket, empty if no words have that length
+        """
+        bucket = self._buckets.get(length)
+        if bucket is None:
+            if length not in self._sizes:
+                return WordBucket(length, ())
+            bucket = self.buckets((length,))[length]
+        return bucket
+
+    def buckets(self, lengths: Iterable[int]) -> Dict[int, WordBucket]:
+        """Get the buckets for several word lengths, splitting out any not yet made in a
+        single pass over the words
+
+        Arguments:
+        lengths: lengths of words wanted
+
+        Return: dictionary of length against its bucket, empty for lengths with no words
+        """
+        lengths = set(lengths)
+        missing = {length for length in lengths if length not in self._buckets}
+        if missing & self._sizes.keys():
+            with self._lock:
+                self._split(missing - self._buckets.keys())
+        return {
+            length: self._buckets.get(length) or WordBucket(length, ())
+            for length in lengths
+        }
+
+    def _split(self, lengths: Set[int]):
+        """Make buckets for word lengths, holding the lock
+
+        Arguments:
+        lengths: lengths to make buckets for, that don't have one yet
+        """
+        split: Dict[int, List[str]] = {
+            length: [] for length in lengths if length in self._sizes
+        }
+        if not split:
+            return
+        for word in self._unbucketed:
+            words = split.get(len(word))
+            if words is not None:
+                words.append(word)
+        for length, words in split.items():
+            self._buckets[length] = WordBucket(length, tuple(sorted(words)))
+        # once every length has a bucket, the unsplit words are no longer needed
+        if len(self._buckets) == len(self._sizes):
+            self._unbucketed = ()
+
+    def words_of_length(self, length: int) -> FrozenSet[str]:
+        """Get an immutable view of the words of a given length, without copying them
+
+        Arguments:
+        length: length of words to return
+
+        Return: set of the words of that length
+        """
+        return self.bucket(length).word_set